@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""Run many skill client calls concurrently from JSONL specs."""
+
+import argparse
+import contextlib
+import contextvars
+import importlib.util
+import io
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+SKILLS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "skills")
+
+CLIENTS = {
+    "context7": os.path.join(SKILLS_DIR, "context7", "scripts", "context7.py"),
+    "deps-dev": os.path.join(SKILLS_DIR, "deps-dev", "scripts", "deps-dev.py"),
+    "exa": os.path.join(SKILLS_DIR, "exa", "scripts", "exa.py"),
+}
+
+DEFAULT_WORKERS = 8
+
+_modules: dict = {}
+_modules_lock = threading.Lock()
+
+
+class ContextStream:
+    """Stream proxy that routes writes to the buffer captured in the current context.
+
+    The buffer is held in a context variable rather than per thread, so worker
+    threads a client starts with thread_pool() write to the same buffer.
+    """
+
+    def __init__(self, fallback):
+        self._fallback = fallback
+        self._buffer = contextvars.ContextVar("buffer", default=None)
+
+    @contextlib.contextmanager
+    def capture(self, buffer):
+        """Route writes made in this context, and in contexts copied from it, to buffer."""
+        token = self._buffer.set(buffer)
+        try:
+            yield buffer
+        finally:
+            self._buffer.reset(token)
+
+    def write(self, text: str) -> int:
+        return (self._buffer.get() or self._fallback).write(text)
+
+    def flush(self) -> None:
+        (self._buffer.get() or self._fallback).flush()
+
+    def __getattr__(self, name: str):
+        return getattr(self._fallback, name)
+
+
+def load_client(name: str):
+    """Import a skill client script by name, once per process."""
+    with _modules_lock:
+        if name not in _modules:
+            if name not in CLIENTS:
+                raise ValueError(
+                    f"Unknown client '{name}'. Supported clients: {', '.join(CLIENTS)}"
+                )
+            spec = importlib.util.spec_from_file_location(
+                f"ccc_{name.replace('-', '_')}", CLIENTS[name]
+            )
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            _modules[name] = module
+        return _modules[name]
+
+
+def repeatable_flags(parser: argparse.ArgumentParser, subcommand: str) -> set[str]:
+    """Option strings of a subcommand that are given once per value (action="append")."""
+    for action in parser._actions:
+        if isinstance(action, argparse._SubParsersAction) and subcommand in action.choices:
+            parser = action.choices[subcommand]
+    return {
+        flag
+        for action in parser._actions
+        if isinstance(action, argparse._AppendAction)
+        for flag in action.option_strings
+    }
+
+
+def build_argv(subcommand: str, args, repeatable: set[str] = frozenset()) -> list[str]:
+    """Convert spec args (list or mapping of option names) to argv.
+
+    List values repeat the flag for options in repeatable and are comma-joined
+    for the others, which take comma-separated values.
+    """
+    if args is None:
+        return [subcommand]
+    if isinstance(args, list):
+        return [subcommand, *(str(a) for a in args)]
+    if not isinstance(args, dict):
+        raise ValueError("'args' must be a list or an object")
+
+    argv = [subcommand]
+    for key, value in args.items():
+        flag = "--" + key.replace("_", "-")
+        if value is True:
+            argv.append(flag)
+        elif value is False or value is None:
+            continue
+        elif isinstance(value, list) and flag in repeatable:
+            for v in value:
+                argv += [flag, str(v)]
+        elif isinstance(value, list):
+            argv += [flag, ",".join(str(v) for v in value)]
+        else:
+            argv += [flag, str(value)]
+    return argv
+
+
+def run_spec(spec: dict) -> dict:
+    """Run a single spec, capturing its output and errors."""
+    result = {"id": spec.get("id"), "client": spec.get("client")}
+    stdout, stderr = io.StringIO(), io.StringIO()
+    start = time.monotonic()
+    exit_code = 0
+    try:
+        with sys.stdout.capture(stdout), sys.stderr.capture(stderr):
+            module = load_client(spec.get("client", ""))
+            prog = os.path.basename(CLIENTS[spec["client"]])
+            parser = module.build_parser(prog)
+            subcommand = spec.get("subcommand", "")
+            argv = build_argv(subcommand, spec.get("args"), repeatable_flags(parser, subcommand))
+            args = parser.parse_args(argv)
+            module.run(args)
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else 1
+    except Exception as e:
+        # ClientError and anything unexpected become per-item errors
+        result["error"] = str(e)
+        exit_code = 1
+
+    result["ok"] = exit_code == 0
+    result["exit_code"] = exit_code
+    result["elapsed"] = round(time.monotonic() - start, 3)
+    result["stdout"] = stdout.getvalue()
+    result["stderr"] = stderr.getvalue()
+    if not result["ok"] and "error" not in result:
+        result["error"] = result["stderr"].strip() or f"Exited with code {exit_code}"
+    return result
+
+
+def run_batch(lines, workers: int, out) -> int:
+    """Run specs from lines, writing each result as soon as it finishes."""
+    write_lock = threading.Lock()
+    slots = threading.BoundedSemaphore(workers * 2)
+    failures = 0
+
+    def emit(record: dict) -> None:
+        nonlocal failures
+        with write_lock:
+            if not record["ok"]:
+                failures += 1
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+
+    def finish(future) -> None:
+        slots.release()
+        emit(future.result())
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for number, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                spec = json.loads(line)
+                if not isinstance(spec, dict):
+                    raise ValueError("spec must be a JSON object")
+            except ValueError as e:
+                emit({"id": None, "line": number, "ok": False, "error": f"Invalid spec: {e}"})
+                continue
+            spec.setdefault("id", number)
+            slots.acquire()
+            pool.submit(run_spec, spec).add_done_callback(finish)
+
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Run skill client calls concurrently from JSONL on stdin"
+    )
+    parser.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Maximum concurrent requests (default: {DEFAULT_WORKERS})",
+    )
+    args = parser.parse_args()
+
+    out = sys.stdout
+    sys.stdout = ContextStream(sys.stdout)
+    sys.stderr = ContextStream(sys.stderr)
+    failures = run_batch(sys.stdin, max(1, args.workers), out)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,760 @@
+#!/usr/bin/env python3
+"""Benchmark the skill clients against local stand-ins for their APIs."""
+
+import argparse
+import functools
+import http.server
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from batch import CLIENTS, ContextStream, load_client, run_spec
+from build import build_zipapp
+
+BASE_URL_ENV = {
+    "context7": ("CONTEXT7_BASE_URL", "/context7"),
+    "deps-dev": ("DEPS_DEV_BASE_URL", "/deps-dev/v3"),
+    "exa": ("EXA_BASE_URL", "/exa"),
+}
+API_KEYS = {"CONTEXT7_API_KEY": "ctx7sk-bench", "EXA_API_KEY": "bench"}
+
+# Median server time in seconds and log-normal spread per endpoint
+MOCK_LATENCY = {
+    "context7/libs/search": (0.08, 0.4),
+    "context7/context": (0.15, 0.5),
+    "exa/search": (0.30, 0.5),
+    "exa/contents": (0.40, 0.6),
+    "exa/context": (0.50, 0.5),
+    "deps-dev/package": (0.04, 0.3),
+    "deps-dev/version": (0.03, 0.3),
+    "deps-dev/dependencies": (0.25, 0.4),
+    "deps-dev/advisory": (0.03, 0.3),
+}
+DOCS_KB = 24
+MOCK_GZIP_MIN_BYTES = 1024
+PAGE_KB = 6
+DEFAULT_LARGE_KB = 8 * 1024
+DEFAULT_REQUESTS = 50
+DEFAULT_CONCURRENCY = 8
+DEFAULT_COLD_RUNS = 5
+DEFAULT_LATENCY_SCALE = 0.1
+DEFAULT_FAULT_RATE = 0.02
+DEFAULT_THRESHOLD = 10.0
+WARMUP_REQUESTS = 3
+WORDS = (
+    "request response client server cache latency stream token buffer socket "
+    "library version package search query result content snippet index retry"
+).split()
+
+SCENARIOS = {
+    "context7.search": ("context7", lambda i: [
+        "search", "--library", f"lib{i}", "--query", "hooks", "--no-cache",
+    ]),
+    "context7.docs": ("context7", lambda i: [
+        "docs", "--library-id", f"/bench/lib{i}", "--query", "routing", "--no-cache",
+    ]),
+    "exa.search": ("exa", lambda i: ["search", "--query", f"benchmark query {i}"]),
+    "exa.contents": ("exa", lambda i: [
+        "contents", "--urls", ",".join(f"https://example.com/{i}/{n}" for n in range(5)),
+    ]),
+    "deps-dev.package": ("deps-dev", lambda i: [
+        "package", "--system", "npm", "--package", f"bench-pkg-{i}", "--refresh",
+    ]),
+    "deps-dev.version": ("deps-dev", lambda i: [
+        "version", "--system", "npm", "--package", f"bench-pkg-{i}", "--version", "1.0.0",
+    ]),
+}
+COLD_START = {
+    "context7.cold_start": "context7.docs",
+    "exa.cold_start": "exa.search",
+    "deps-dev.cold_start": "deps-dev.version",
+}
+# Calls made twice through the ccc zipapp on an empty cache: the first sends a request,
+# the second is served from the cache
+STARTUP = {
+    "context7": lambda i: ["docs", "--library-id", f"/bench/startup{i}", "--query", "routing"],
+    "deps-dev": lambda i: [
+        "version", "--system", "npm", "--package", f"bench-startup-{i}", "--version", "1.0.0",
+    ],
+    "exa": lambda i: ["contents", "--urls", f"https://example.com/startup/{i}"],
+}
+# Most import time (python -X importtime, p50 in ms) a call that sends a request may spend.
+# These calls measure about 70 ms, so the budget leaves room for slower machines.
+STARTUP_BUDGET_MS = {"context7": 120.0, "deps-dev": 120.0, "exa": 120.0}
+# Import time of the cached call through the standalone scripts before the zipapp, which
+# loaded http.client, ssl and argparse on every call. Cached calls must stay below it.
+STARTUP_BASELINE_MS = {"context7": 70.0, "deps-dev": 85.0, "exa": 80.0}
+DEFAULT_STARTUP_RUNS = 10
+LARGE_PAYLOADS = {
+    "context7.docs.large": ("context7", [
+        "docs", "--library-id", "/bench/large", "--query", "everything", "--no-cache",
+    ]),
+    "exa.contents.large": ("exa", [
+        "contents", "--urls", ",".join(f"https://example.com/large/{n}" for n in range(8)),
+    ]),
+}
+
+
+@functools.lru_cache(maxsize=64)
+def filler(size: int, seed: int = 0) -> str:
+    """Deterministic prose of roughly size characters."""
+    rng = random.Random(seed)
+    words = [rng.choice(WORDS) for _ in range(min(size, 65536) // 7 + 1)]
+    lines = [" ".join(words[i : i + 12]) for i in range(0, len(words), 12)]
+    block = "\n".join(lines)
+    return (block * (size // len(block) + 1))[:size]
+
+
+def dependency_graph(name: str, version: str) -> dict:
+    """Deterministic resolved graph; a trailing number in the name sets its size."""
+    digits = name.rsplit("-", 1)[-1]
+    size = int(digits) if digits.isdigit() else 30
+    rng = random.Random(name)
+    nodes = [{
+        "versionKey": {"system": "NPM", "name": name, "version": version},
+        "bundled": False,
+        "relation": "SELF",
+        "errors": [],
+    }]
+    edges = []
+    for i in range(1, size):
+        # Roughly one package in ten is resolved at two different versions
+        package = f"dep-{i % max(1, size * 9 // 10)}"
+        nodes.append({
+            "versionKey": {"system": "NPM", "name": package, "version": f"1.{i % 7}.{i % 3}"},
+            "bundled": False,
+            "relation": "DIRECT" if i < 10 else "INDIRECT",
+            "errors": [],
+        })
+        parent = 0 if i < 10 else rng.randrange(1, i)
+        edges.append({"fromNode": parent, "toNode": i, "requirement": f"^1.{i % 7}.0"})
+    return {"nodes": nodes, "edges": edges, "error": ""}
+
+
+@functools.lru_cache(maxsize=8)
+def docs_text(size: int) -> str:
+    """Context7-style snippets separated by dashed rules, totalling about size chars."""
+    snippets = []
+    total = 0
+    n = 0
+    while total < size:
+        snippet = (
+            f"### Snippet {n}\n\nSource: https://example.com/docs/{n}\n\n"
+            f"{filler(1500, n % 16)}\n\n```js\nconst value{n} = load({n});\n```"
+        )
+        snippets.append(snippet)
+        total += len(snippet)
+        n += 1
+    return ("\n\n" + "-" * 32 + "\n\n").join(snippets)
+
+
+class MockHandler(http.server.BaseHTTPRequestHandler):
+    """Stand-in for the Context7, Exa and deps.dev endpoints the clients use."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self.dispatch(b"")
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = zlib.decompress(body, 16 + zlib.MAX_WBITS)
+        self.dispatch(body)
+
+    def dispatch(self, body: bytes) -> None:
+        url = urllib.parse.urlsplit(self.path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        parts = url.path.strip("/").split("/")
+        try:
+            data = json.loads(body) if body else {}
+        except ValueError:
+            data = {}
+
+        if parts[0] == "context7" and parts[1:3] == ["libs", "search"]:
+            endpoint = "context7/libs/search"
+        elif parts[0] == "context7" and parts[1:2] == ["context"]:
+            endpoint = "context7/context"
+        elif parts[0] == "exa" and len(parts) == 2:
+            endpoint = f"exa/{parts[1]}"
+        elif parts[0] == "deps-dev" and parts[-1].endswith(":dependencies"):
+            endpoint = "deps-dev/dependencies"
+        elif parts[0] == "deps-dev" and parts[-2:-1] == ["advisories"]:
+            endpoint = "deps-dev/advisory"
+        elif parts[0] == "deps-dev" and "packages" in parts:
+            endpoint = "deps-dev/version" if "versions" in parts else "deps-dev/package"
+        else:
+            endpoint = None
+        if endpoint not in MOCK_LATENCY:
+            self.reply(404, {"error": "not found"})
+            return
+
+        median, sigma = MOCK_LATENCY[endpoint]
+        time.sleep(self.server.latency_scale * median * math.exp(random.gauss(0, sigma)))
+
+        fault = self.server.fault(endpoint, self.path.encode("utf-8") + body)
+        if fault:
+            headers = {"Retry-After": "0"} if fault == 429 else {}
+            self.reply(fault, {"message": "injected fault"}, headers)
+            return
+
+        if endpoint == "context7/libs/search":
+            self.reply(200, {"results": [
+                {
+                    "id": f"/bench/{query.get('libraryName', 'lib')}-{n}",
+                    "title": f"{query.get('libraryName', 'lib')} {n}",
+                    "description": filler(200, n),
+                    "totalSnippets": 100 * (n + 1),
+                    "trustScore": 9 - n * 0.5,
+                }
+                for n in range(10)
+            ]})
+        elif endpoint == "context7/context" and "moved" in query.get("libraryId", ""):
+            new_id = query["libraryId"].replace("moved", "current")
+            self.reply(301, {"redirectUrl": new_id})
+        elif endpoint == "context7/context":
+            size = self.server.large_kb if "large" in query.get("libraryId", "") else DOCS_KB
+            text = docs_text(size * 1024)
+            if query.get("type") == "json":
+                snippets = text.split("\n\n" + "-" * 32 + "\n\n")
+                self.reply(200, {"snippets": [{"content": s} for s in snippets]})
+            else:
+                self.reply(200, text.encode("utf-8"), content_type="text/plain; charset=utf-8")
+        elif endpoint == "exa/search":
+            self.reply(200, {"results": [
+                {
+                    "title": f"{data.get('query', '')} result {n}",
+                    "url": f"https://example.com/search/{n}",
+                    "publishedDate": "2024-01-01T00:00:00.000Z",
+                    "text": filler(PAGE_KB * 1024 // 3, n),
+                }
+                for n in range(data.get("numResults", 10))
+            ]})
+        elif endpoint == "exa/contents":
+            urls = data.get("urls", [])
+            large = any("large" in u for u in urls)
+            size = (self.server.large_kb * 1024 // max(1, len(urls))) if large else PAGE_KB * 1024
+            self.reply(200, {
+                "results": [
+                    {"url": u, "title": f"Page {n}", "text": filler(size, n)}
+                    for n, u in enumerate(urls)
+                ],
+                "statuses": [{"id": u, "status": "success"} for u in urls],
+            })
+        elif endpoint == "exa/context":
+            self.reply(200, {
+                "response": filler(4096), "resultsCount": 5, "outputTokens": 1024,
+            })
+        elif endpoint == "deps-dev/package":
+            name = urllib.parse.unquote(parts[parts.index("packages") + 1])
+            versions = [f"{a}.{b}.{c}" for a in range(3) for b in range(10) for c in range(10)]
+            self.reply(200, {
+                "packageKey": {"system": "NPM", "name": name},
+                "versions": [
+                    {
+                        "versionKey": {"system": "NPM", "name": name, "version": v},
+                        "publishedAt": "2024-01-01T00:00:00Z",
+                        "isDefault": v == versions[-1],
+                    }
+                    for v in versions
+                ],
+            })
+        elif endpoint == "deps-dev/dependencies":
+            name = urllib.parse.unquote(parts[parts.index("packages") + 1])
+            self.reply(200, dependency_graph(name, urllib.parse.unquote(parts[-1]).split(":")[0]))
+        elif endpoint == "deps-dev/advisory":
+            advisory_id = urllib.parse.unquote(parts[-1])
+            score = zlib.crc32(advisory_id.encode()) % 100 / 10
+            self.reply(200, {
+                "advisoryKey": {"id": advisory_id},
+                "url": f"https://osv.dev/vulnerability/{advisory_id}",
+                "title": f"Bench advisory {advisory_id}",
+                "aliases": [f"CVE-2024-{advisory_id[-4:]}"],
+                "cvss3Score": score,
+                "cvss3Vector": "CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:H/A:H",
+            })
+        else:
+            name = urllib.parse.unquote(parts[parts.index("packages") + 1])
+            version = urllib.parse.unquote(parts[-1])
+            # About one version in twenty has one of 50 known advisories
+            digest = zlib.crc32(f"{name}@{version}".encode())
+            advisory_id = f"GHSA-bench-{digest // 20 % 50:04d}"
+            advisories = [{"id": advisory_id}] if digest % 20 == 0 else []
+            self.reply(200, {
+                "versionKey": {"system": "NPM", "name": name, "version": version},
+                "publishedAt": "2024-01-01T00:00:00Z",
+                "isDefault": False,
+                "licenses": ["MIT"],
+                "advisoryKeys": advisories,
+            })
+
+    def reply(self, status: int, payload, headers: dict | None = None,
+              content_type: str = "application/json") -> None:
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        # Like most CDNs, compress anything but tiny bodies when the client allows it
+        if len(body) >= MOCK_GZIP_MIN_BYTES and "gzip" in self.headers.get("Accept-Encoding", ""):
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            body = compressor.compress(body) + compressor.flush()
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MockServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, port: int, latency_scale: float, fault_rate: float, large_kb: int):
+        super().__init__(("127.0.0.1", port), MockHandler)
+        self.latency_scale = latency_scale
+        self.fault_rate = fault_rate
+        self.large_kb = large_kb
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def fault(self, endpoint: str, request: bytes) -> int | None:
+        """Pick a retryable status for the first attempt of a sampled request."""
+        digest = zlib.crc32(request)
+        with self._lock:
+            if digest in self._seen:
+                return None
+            self._seen.add(digest)
+        if digest / 2**32 >= self.fault_rate:
+            return None
+        choices = (202, 429, 503) if endpoint == "context7/context" else (429, 503)
+        return choices[digest % len(choices)]
+
+
+def percentiles(samples: list[float]) -> dict:
+    """Nearest-rank p50/p95/p99 plus mean, in milliseconds."""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def rank(p: float) -> float:
+        return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+    return {
+        "p50": round(rank(50) * 1000, 2),
+        "p95": round(rank(95) * 1000, 2),
+        "p99": round(rank(99) * 1000, 2),
+        "mean": round(sum(ordered) / len(ordered) * 1000, 2),
+    }
+
+
+def timed_spec(client: str, argv: list[str]) -> tuple[float, bool]:
+    """Run one in-process client call and return (seconds, ok)."""
+    start = time.perf_counter()
+    result = run_spec({"client": client, "subcommand": argv[0], "args": argv[1:]})
+    return time.perf_counter() - start, result["ok"]
+
+
+def measure_scenario(client: str, make_argv, args: argparse.Namespace, offset: int) -> dict:
+    """Sequential latency, then latency and throughput under concurrency."""
+    for i in range(WARMUP_REQUESTS):
+        timed_spec(client, make_argv(offset + i))
+    offset += WARMUP_REQUESTS
+
+    sequential = [timed_spec(client, make_argv(offset + i)) for i in range(args.requests)]
+    offset += args.requests
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        loaded = list(pool.map(
+            lambda i: timed_spec(client, make_argv(offset + i)), range(args.requests)
+        ))
+    wall = time.perf_counter() - start
+
+    return {
+        "latency_ms": percentiles([t for t, _ in sequential]),
+        "loaded_latency_ms": percentiles([t for t, _ in loaded]),
+        "throughput_rps": round(len(loaded) / wall, 2),
+        "errors": sum(1 for _, ok in sequential + loaded if not ok),
+    }
+
+
+def run_subprocess(command: list[str], env: dict) -> tuple[float, float, int]:
+    """Run a script in a fresh interpreter and return (seconds, peak RSS MB, exit code)."""
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, *command],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return elapsed, round(usage.ru_maxrss / scale, 1), proc.returncode
+
+
+def start_mock(args: argparse.Namespace) -> tuple[subprocess.Popen, int]:
+    """Start the stand-in servers in their own process so they do not skew timings."""
+    proc = subprocess.Popen(
+        [
+            sys.executable, os.path.abspath(__file__), "mock", "--port", "0",
+            "--latency-scale", str(args.latency_scale),
+            "--fault-rate", str(args.fault_rate),
+            "--large-kb", str(args.large_kb),
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    return proc, json.loads(proc.stdout.readline())["port"]
+
+
+def bench_env(port: int, workdir: str) -> dict:
+    """Environment pointing the clients at the mock APIs and a scratch cache."""
+    env = {
+        **os.environ,
+        **API_KEYS,
+        "XDG_CACHE_HOME": workdir,
+        "TMPDIR": workdir,
+        "CCC_NO_DAEMON": "1",
+    }
+    for name, prefix in BASE_URL_ENV.values():
+        env[name] = f"http://127.0.0.1:{port}{prefix}"
+    return env
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args: argparse.Namespace) -> None:
+    """Run the benchmark suite and write results to a JSON file."""
+    if not hasattr(os, "wait4"):
+        print("Error: Benchmarks need os.wait4 (Linux or macOS)", file=sys.stderr)
+        sys.exit(1)
+
+    mock, port = start_mock(args)
+    workdir = tempfile.mkdtemp(prefix="ccc_bench_")
+    env = bench_env(port, workdir)
+    os.environ.update(env)
+    tempfile.tempdir = workdir
+
+    def selected(name: str) -> bool:
+        return not args.only or any(pattern in name for pattern in args.only)
+
+    results = {}
+    try:
+        for name, scenario in COLD_START.items():
+            if not selected(name):
+                continue
+            client, make_argv = SCENARIOS[scenario]
+            runs = [run_subprocess([CLIENTS[client], *make_argv(-1 - n)], env) for n in range(args.cold_runs)]
+            results[name] = {
+                "cold_start_ms": percentiles([t for t, _, _ in runs]),
+                "peak_rss_mb": max(rss for _, rss, _ in runs),
+                "errors": sum(1 for _, _, code in runs if code),
+            }
+            print(f"{name}: {results[name]['cold_start_ms']['p50']} ms", file=sys.stderr)
+
+        for name, (client, argv) in LARGE_PAYLOADS.items():
+            if not selected(name):
+                continue
+            elapsed, rss, code = run_subprocess([CLIENTS[client], *argv], env)
+            results[name] = {
+                "elapsed_ms": round(elapsed * 1000, 2),
+                "peak_rss_mb": rss,
+                "payload_kb": args.large_kb,
+                "errors": int(code != 0),
+            }
+            print(f"{name}: {rss} MB peak RSS", file=sys.stderr)
+
+        stdout, stderr = sys.stdout, sys.stderr
+        sys.stdout = ContextStream(stdout)
+        sys.stderr = ContextStream(stderr)
+        try:
+            for offset, (name, (client, make_argv)) in enumerate(SCENARIOS.items()):
+                if not selected(name):
+                    continue
+                # Measure the client itself rather than its configured request pacing
+                limiter = load_client(client).API.rate_limiter
+                limiter.rate = limiter.burst = 1_000_000
+                results[name] = measure_scenario(client, make_argv, args, offset * 100_000)
+                stderr.write(
+                    f"{name}: p50 {results[name]['latency_ms']['p50']} ms, "
+                    f"{results[name]['throughput_rps']} req/s\n"
+                )
+        finally:
+            sys.stdout, sys.stderr = stdout, stderr
+    finally:
+        mock.terminate()
+        mock.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "version": 1,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "cold_runs": args.cold_runs,
+            "latency_scale": args.latency_scale,
+            "fault_rate": args.fault_rate,
+            "large_kb": args.large_kb,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+
+def import_time(command: list[str], env: dict) -> tuple[float, int]:
+    """Run a script under -X importtime and return (seconds spent importing, exit code)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *command],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    total = 0
+    for line in proc.stderr.splitlines():
+        # "import time: <self us> | <cumulative us> | <module>", after one header line
+        fields = line.split(":", 1)[-1].split("|")
+        if line.startswith("import time:") and fields[0].strip().isdigit():
+            total += int(fields[0])
+    return total / 1_000_000, proc.returncode
+
+
+def cold_env(env: dict, workdir: str) -> dict:
+    """Copy of env with an empty cache, so no call is paced or served by an earlier one."""
+    return {**env, "XDG_CACHE_HOME": tempfile.mkdtemp(dir=workdir)}
+
+
+def startup(args: argparse.Namespace) -> None:
+    """Check the import time of cold ccc calls against the budget and the baseline."""
+    mock, port = start_mock(args)
+    workdir = tempfile.mkdtemp(prefix="ccc_bench_")
+    env = bench_env(port, workdir)
+    failures = 0
+    try:
+        pyz = build_zipapp(os.path.join(workdir, "ccc.pyz"))
+        print(
+            f"{'command':<10} {'request':>9} {'budget':>8} {'cached':>9} {'baseline':>9}",
+            file=sys.stderr,
+        )
+        for client, make_argv in STARTUP.items():
+            request, cached, errors = [], [], 0
+            for n in range(args.runs):
+                command = [pyz, client, *make_argv(n)]
+                call_env = cold_env(env, workdir)
+                for samples in (request, cached):
+                    seconds, code = import_time(command, call_env)
+                    samples.append(seconds)
+                    errors += int(bool(code))
+
+            request_ms = percentiles(request)["p50"]
+            cached_ms = percentiles(cached)["p50"]
+            budget, baseline = STARTUP_BUDGET_MS[client], STARTUP_BASELINE_MS[client]
+            problems = []
+            if request_ms > budget:
+                problems.append("over budget")
+            if cached_ms >= baseline:
+                problems.append("not faster than baseline")
+            if errors:
+                problems.append(f"{errors} failed")
+            failures += bool(problems)
+            print(
+                f"{client:<10} {request_ms:>7.1f}ms {budget:>6.0f}ms "
+                f"{cached_ms:>7.1f}ms {baseline:>7.0f}ms  {', '.join(problems)}".rstrip(),
+                file=sys.stderr,
+            )
+    finally:
+        mock.terminate()
+        mock.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if failures:
+        sys.exit(1)
+
+
+def flatten(results: dict, prefix: str = "") -> dict:
+    """Flatten nested metrics into {"scenario.metric.stat": value}."""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+
+def compare(args: argparse.Namespace) -> None:
+    """Compare two result files and fail on regressions beyond the threshold."""
+    with open(args.baseline) as f:
+        old = flatten(json.load(f)["results"])
+    with open(args.current) as f:
+        new = flatten(json.load(f)["results"])
+
+    regressions = 0
+    width = max((len(k) for k in new), default=10)
+    for key in sorted(new):
+        if key not in old:
+            continue
+        before, after = old[key], new[key]
+        change = (after - before) / before * 100 if before else 0.0
+        # Throughput is the only metric where higher is better
+        worse = -change if key.endswith("throughput_rps") else change
+        flag = ""
+        if worse > args.threshold and not key.endswith("errors"):
+            flag = "  REGRESSION"
+            regressions += 1
+        elif key.endswith("errors") and after > before:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{key:<{width}}  {before:>10}  {after:>10}  {change:+7.1f}%{flag}")
+
+    if regressions:
+        print(f"\n{regressions} metric(s) regressed by more than {args.threshold}%")
+        sys.exit(1)
+
+
+def mock(args: argparse.Namespace) -> None:
+    """Serve the stand-in APIs in the foreground."""
+    server = MockServer(args.port, args.latency_scale, args.fault_rate, args.large_kb)
+    port = server.server_address[1]
+    print(json.dumps({"port": port}), flush=True)
+    for name, prefix in BASE_URL_ENV.values():
+        print(f"export {name}=http://127.0.0.1:{port}{prefix}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def add_mock_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--latency-scale",
+        type=float,
+        default=DEFAULT_LATENCY_SCALE,
+        help=f"Multiplier for simulated server latency, 0 to disable (default: {DEFAULT_LATENCY_SCALE})",
+    )
+    parser.add_argument(
+        "--fault-rate",
+        type=float,
+        default=DEFAULT_FAULT_RATE,
+        help=f"Fraction of requests first answered with 202/429/503 (default: {DEFAULT_FAULT_RATE})",
+    )
+    parser.add_argument(
+        "--large-kb",
+        type=int,
+        default=DEFAULT_LARGE_KB,
+        help=f"Size of large docs/contents payloads in KB (default: {DEFAULT_LARGE_KB})",
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the context7, deps-dev and exa clients against local mock APIs"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmarks")
+    run_parser.add_argument(
+        "--output", "-o", default="bench-results.json", help="Results file (default: bench-results.json)"
+    )
+    run_parser.add_argument(
+        "--requests",
+        "-n",
+        type=int,
+        default=DEFAULT_REQUESTS,
+        help=f"Requests per scenario and phase (default: {DEFAULT_REQUESTS})",
+    )
+    run_parser.add_argument(
+        "--concurrency",
+        "-c",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Concurrent requests in the throughput phase (default: {DEFAULT_CONCURRENCY})",
+    )
+    run_parser.add_argument(
+        "--cold-runs",
+        type=int,
+        default=DEFAULT_COLD_RUNS,
+        help=f"Fresh interpreter runs per cold-start scenario (default: {DEFAULT_COLD_RUNS})",
+    )
+    run_parser.add_argument(
+        "--only", nargs="+", help="Only run scenarios whose name contains one of these"
+    )
+    add_mock_arguments(run_parser)
+    run_parser.set_defaults(func=run)
+
+    startup_parser = subparsers.add_parser(
+        "startup", help="Check the startup budget of the ccc zipapp"
+    )
+    startup_parser.add_argument(
+        "--runs",
+        type=int,
+        default=DEFAULT_STARTUP_RUNS,
+        help=f"Runs per client, each on an empty cache (default: {DEFAULT_STARTUP_RUNS})",
+    )
+    # Startup is measured without simulated server time or injected faults
+    startup_parser.set_defaults(
+        func=startup, latency_scale=0.0, fault_rate=0.0, large_kb=DEFAULT_LARGE_KB
+    )
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two results files")
+    compare_parser.add_argument("baseline", help="Earlier results file")
+    compare_parser.add_argument("current", help="Newer results file")
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"Percent change that counts as a regression (default: {DEFAULT_THRESHOLD})",
+    )
+    compare_parser.set_defaults(func=compare)
+
+    mock_parser = subparsers.add_parser("mock", help="Serve the mock APIs in the foreground")
+    mock_parser.add_argument("--port", type=int, default=8765, help="Port (default: 8765)")
+    add_mock_arguments(mock_parser)
+    mock_parser.set_defaults(func=mock)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Build ccc.pyz, a zipapp bundling the skill clients as precompiled modules.
+
+Building also vendors ccc_common.py, the code the clients share, into each
+skill's scripts directory so every skill still runs on its own.
+"""
+
+import argparse
+import importlib.util
+import marshal
+import os
+import sys
+import zipfile
+
+from ccc import SKILLS_DIR, module_name
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(SCRIPTS_DIR, "..", "..", "dist", "ccc.pyz")
+
+COMMON_MODULE = os.path.join(SCRIPTS_DIR, "ccc_common.py")
+VENDOR_CLIENTS = ("context7", "deps-dev", "exa")
+VENDOR_HEADER = (
+    b"# Vendored from core/scripts/ccc_common.py by core/scripts/build.py; do not edit.\n"
+)
+
+MODULES = {
+    "__main__": os.path.join(SCRIPTS_DIR, "ccc.py"),
+    "ccc_common": COMMON_MODULE,
+    module_name("context7"): os.path.join(SKILLS_DIR, "context7", "scripts", "context7.py"),
+    module_name("deps-dev"): os.path.join(SKILLS_DIR, "deps-dev", "scripts", "deps-dev.py"),
+    module_name("exa"): os.path.join(SKILLS_DIR, "exa", "scripts", "exa.py"),
+}
+
+# Hash-based pyc that is never checked against its source (PEP 552)
+PYC_UNCHECKED_HASH = 0b01
+
+
+def compile_pyc(source: bytes, filename: str) -> bytes:
+    """Compile source to pyc bytes that zipimport loads without recompiling."""
+    code = compile(source, filename, "exec", dont_inherit=True)
+    return (
+        importlib.util.MAGIC_NUMBER
+        + PYC_UNCHECKED_HASH.to_bytes(4, "little")
+        + importlib.util.source_hash(source)
+        + marshal.dumps(code)
+    )
+
+
+def vendor_common(check: bool = False) -> list[str]:
+    """Copy ccc_common.py into each skill's scripts directory.
+
+    Returns the copies that were out of date. With check, nothing is written.
+    """
+    with open(COMMON_MODULE, "rb") as f:
+        source = VENDOR_HEADER + f.read()
+    stale = []
+    for client in VENDOR_CLIENTS:
+        path = os.path.join(SKILLS_DIR, client, "scripts", "ccc_common.py")
+        try:
+            with open(path, "rb") as f:
+                current = f.read() == source
+        except FileNotFoundError:
+            current = False
+        if current:
+            continue
+        stale.append(path)
+        if not check:
+            with open(path, "wb") as f:
+                f.write(source)
+    return stale
+
+
+def build_zipapp(output: str, interpreter: str = "/usr/bin/env python3") -> str:
+    """Write the zipapp to output and return its path.
+
+    Each module is stored uncompressed as both source and bytecode. Interpreters
+    with a different bytecode version ignore the pyc and compile the source.
+    """
+    output = os.path.abspath(output)
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    archive = os.path.basename(output)
+    partial = f"{output}.tmp"
+    with open(partial, "wb") as f:
+        f.write(f"#!{interpreter}\n".encode("utf-8"))
+        with zipfile.ZipFile(f, "w", zipfile.ZIP_STORED) as zf:
+            for name, path in MODULES.items():
+                with open(path, "rb") as src:
+                    source = src.read()
+                zf.writestr(f"{name}.py", source)
+                zf.writestr(f"{name}.pyc", compile_pyc(source, f"{archive}/{name}.py"))
+    os.chmod(partial, 0o755)
+    os.replace(partial, output)
+    return output
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Build the ccc zipapp for the context7, deps-dev and exa clients"
+    )
+    parser.add_argument(
+        "--output", "-o", default=DEFAULT_OUTPUT, help="Archive path (default: dist/ccc.pyz)"
+    )
+    parser.add_argument(
+        "--python",
+        default="/usr/bin/env python3",
+        help="Interpreter for the shebang line (default: /usr/bin/env python3)",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Only report vendored copies of ccc_common.py that are out of date",
+    )
+    args = parser.parse_args()
+    stale = vendor_common(check=args.check)
+    for path in stale:
+        print(f"{'Stale' if args.check else 'Vendored'} {os.path.relpath(path)}")
+    if args.check:
+        sys.exit(1 if stale else 0)
+    path = build_zipapp(args.output, args.python)
+    print(f"Built {os.path.relpath(path)} for Python {sys.version_info[0]}.{sys.version_info[1]}")
+
+
+if __name__ == "__main__":
+    main()
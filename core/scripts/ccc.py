@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Single command-line entry point for the context7, deps-dev and exa clients.
+
+Only the client named by the first argument is imported, so every call pays
+for one module. Inside the zipapp built by build.py the clients are bundled as
+precompiled modules; from a checkout they are loaded from the skill scripts.
+"""
+
+import importlib
+import importlib.util
+import os
+import sys
+
+SKILLS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "skills")
+
+CLIENTS = {
+    "context7": "Search libraries and fetch their documentation",
+    "deps-dev": "Look up package versions and scan lockfiles",
+    "exa": "Web search, code context and content extraction",
+}
+
+USAGE = """\
+usage: ccc {context7,deps-dev,exa} ...
+
+Command-line client for the Context7, deps.dev and Exa APIs.
+
+commands:
+%s
+Run 'ccc <command> --help' for the subcommands of each client.
+""" % "".join(f"  {name:<10} {help}\n" for name, help in CLIENTS.items())
+
+
+def module_name(client: str) -> str:
+    return f"ccc_{client.replace('-', '_')}"
+
+
+def load_client(client: str):
+    """Import a client from the zipapp, falling back to its skill script."""
+    try:
+        return importlib.import_module(module_name(client))
+    except ModuleNotFoundError as e:
+        if e.name != module_name(client):
+            raise
+
+    path = os.path.join(SKILLS_DIR, client, "scripts", f"{client}.py")
+    spec = importlib.util.spec_from_file_location(module_name(client), path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def main(argv: list[str] | None = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        sys.stdout.write(USAGE)
+        sys.exit(0 if argv else 2)
+    if argv[0] not in CLIENTS:
+        sys.stderr.write(USAGE)
+        print(f"ccc: error: unknown command '{argv[0]}'", file=sys.stderr)
+        sys.exit(2)
+
+    load_client(argv[0]).main(argv[1:], prog=f"ccc {argv[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1285 @@
+"""Shared HTTP transport, rate limiting, statistics and output for the skill clients.
+
+The context7, deps-dev and exa clients import this module. Each skill runs on
+its own, so build.py vendors a copy into every skill's scripts directory; edit
+this file and rebuild rather than changing the copies.
+"""
+
+from __future__ import annotations
+
+import bisect
+import codecs
+import contextlib
+import contextvars
+import functools
+import importlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.parse
+import zlib
+
+try:
+    import fcntl
+except ImportError:  # Windows: no coalescing, rate limits are per process
+    fcntl = None
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access."""
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def __getattr__(self, attr: str):
+        return getattr(importlib.import_module(self._name), attr)
+
+
+# Argument parsing, networking, TLS, the caches and thread pools load only once
+# a command needs them: daemon-forwarded calls never parse arguments, and cache
+# hits never open a connection
+argparse = LazyModule("argparse")
+concurrent_futures = LazyModule("concurrent.futures")
+http_client = LazyModule("http.client")
+socket = LazyModule("socket")
+ssl = LazyModule("ssl")
+tempfile = LazyModule("tempfile")
+
+CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "ccc"
+)
+DAEMON_SOCKET = os.environ.get("CCC_DAEMON_SOCKET") or os.path.join(
+    CACHE_DIR, "daemon.sock"
+)
+MAX_OUTPUT_CHARS = 30000
+
+
+class ClientError(Exception):
+    """Raised when a request cannot be completed."""
+
+
+# HTTP transport with persistent connections, cached DNS and TLS session reuse.
+
+POOL_MAX_IDLE = 32
+STREAM_CHUNK_SIZE = 64 * 1024
+# Request bodies at least this large are sent gzip-compressed
+GZIP_MIN_BYTES = 16 * 1024
+
+_pool: dict[tuple, list] = {}
+_pool_lock = threading.Lock()
+_dns_cache: dict[tuple, tuple] = {}
+_tls_sessions: dict[str, ssl.SSLSession] = {}
+_ssl_context: ssl.SSLContext | None = None
+_plain_body_hosts: set[tuple] = set()
+# Each run gets its own tracer, so concurrent runs in one process do not share one
+_tracer: contextvars.ContextVar = contextvars.ContextVar("tracer", default=None)
+
+
+class Tracer:
+    """Writes Chrome trace-event spans, one JSON object per line.
+
+    Targets ending in .json get a leading "[" and trailing commas so the file
+    loads directly in chrome://tracing or Perfetto; other files and "-"
+    (stderr) get plain JSON lines.
+    """
+
+    def __init__(self, target: str, category: str):
+        self.category = category
+        self._origin = time.time() - time.perf_counter()
+        self._lock = threading.Lock()
+        self._file = None
+        self._suffix = "\n"
+        if target != "-":
+            self._file = open(target, "a", buffering=1, encoding="utf-8")
+            if target.endswith(".json"):
+                self._suffix = ",\n"
+                if self._file.tell() == 0:
+                    self._file.write("[\n")
+
+    def emit(self, name: str, start: float, end: float, args: dict) -> None:
+        record = {
+            "name": name,
+            "cat": self.category,
+            "ph": "X",
+            "ts": round((self._origin + start) * 1e6, 1),
+            "dur": round((end - start) * 1e6, 1),
+            "pid": os.getpid(),
+            "tid": threading.get_native_id(),
+            "args": args,
+        }
+        line = json.dumps(record) + self._suffix
+        with self._lock:
+            (self._file or sys.stderr).write(line)
+
+    def close(self) -> None:
+        if self._file:
+            self._file.close()
+
+
+@contextlib.contextmanager
+def span(name: str, **args):
+    """Record the block as a trace span; the yielded dict collects extra args."""
+    tracer = _tracer.get()
+    if tracer is None:
+        yield args
+        return
+    start = time.perf_counter()
+    try:
+        yield args
+    finally:
+        tracer.emit(name, start, time.perf_counter(), args)
+
+
+@contextlib.contextmanager
+def tracing(target: str | None, category: str, command: str):
+    """Trace a command to target ("-" for stderr), falling back to $CCC_TRACE."""
+    target = target or os.environ.get("CCC_TRACE")
+    if not target:
+        yield
+        return
+    tracer = Tracer(target, category)
+    token = _tracer.set(tracer)
+    try:
+        with span(command):
+            yield
+    finally:
+        _tracer.reset(token)
+        tracer.close()
+
+
+@functools.cache
+def context_pool_class() -> type:
+    """Define the context-preserving thread pool once concurrent.futures is needed."""
+
+    class ContextThreadPoolExecutor(concurrent_futures.ThreadPoolExecutor):
+        def submit(self, fn, /, *args, **kwargs):
+            return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+    return ContextThreadPoolExecutor
+
+
+def thread_pool(max_workers: int) -> concurrent_futures.ThreadPoolExecutor:
+    """Thread pool whose tasks run in a copy of the context that submitted them.
+
+    Tasks trace, hedge, count statistics and write captured output like the run
+    that started them.
+    """
+    return context_pool_class()(max_workers=max_workers)
+
+
+class Response:
+    """Fully read HTTP response."""
+
+    def __init__(self, url: str, status: int, reason: str, headers, body: bytes):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+    def text(self) -> str:
+        return self.body.decode("utf-8")
+
+
+def resolve(host: str, port: int) -> tuple:
+    """Resolve a host once for the life of the process."""
+    address = _dns_cache.get((host, port))
+    if address is None:
+        with span("dns", host=host):
+            info = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        address = _dns_cache[(host, port)] = info[0][4][:2]
+    return address
+
+
+def open_socket(conn: http_client.HTTPConnection) -> socket.socket:
+    """Open a TCP socket for a connection using the DNS cache."""
+    address = resolve(conn.host, conn.port)
+    with span("connect", address=f"{address[0]}:{address[1]}"):
+        sock = socket.create_connection(address, conn.timeout, conn.source_address)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sock
+
+
+@functools.cache
+def connection_classes() -> tuple[type, type]:
+    """Define the pooled connection classes once http.client is needed."""
+
+    class PooledHTTPConnection(http_client.HTTPConnection):
+        def connect(self) -> None:
+            self.sock = open_socket(self)
+            if self._tunnel_host:
+                self._tunnel()
+
+    class PooledHTTPSConnection(http_client.HTTPSConnection):
+        def connect(self) -> None:
+            self.sock = open_socket(self)
+            if self._tunnel_host:
+                self._tunnel()
+            server_hostname = self._tunnel_host or self.host
+            with span("tls", host=server_hostname) as info:
+                self.sock = self._context.wrap_socket(
+                    self.sock,
+                    server_hostname=server_hostname,
+                    session=_tls_sessions.get(server_hostname),
+                )
+                info["resumed"] = self.sock.session_reused
+
+    return PooledHTTPConnection, PooledHTTPSConnection
+
+
+@functools.cache
+def optional_module(name: str):
+    """Import an optional module once, returning None when it is not installed."""
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+@functools.cache
+def accept_encoding() -> str:
+    """Content codings this process can decode, for the Accept-Encoding header."""
+    encodings = ["gzip", "deflate"]
+    if optional_module("brotli"):
+        encodings.append("br")
+    if optional_module("compression.zstd") or optional_module("zstandard"):
+        encodings.append("zstd")
+    return ", ".join(encodings)
+
+
+def content_decoder(encoding: str):
+    """Return incremental (decompress, flush) functions for a Content-Encoding.
+
+    Returns None when the coding is not supported.
+    """
+    if encoding in ("gzip", "x-gzip", "deflate"):
+        # 32 + MAX_WBITS accepts both gzip and zlib framing
+        decoder = zlib.decompressobj(32 + zlib.MAX_WBITS)
+        return decoder.decompress, decoder.flush
+    if encoding == "br" and (brotli := optional_module("brotli")):
+        return brotli.Decompressor().process, lambda: b""
+    if encoding == "zstd" and (zstd := optional_module("compression.zstd")):
+        return zstd.ZstdDecompressor().decompress, lambda: b""
+    if encoding == "zstd" and (zstd := optional_module("zstandard")):
+        decoder = zstd.ZstdDecompressor().decompressobj()
+        return decoder.decompress, decoder.flush
+    return None
+
+
+def gzip_body(body: bytes) -> bytes:
+    """Compress a request body for Content-Encoding: gzip."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(body) + compressor.flush()
+
+
+def race_responses(
+    conn: http_client.HTTPConnection, open_backup, delay: float, info: dict
+) -> tuple[http_client.HTTPConnection, http_client.HTTPResponse]:
+    """Wait for conn's response, racing a backup connection if it takes longer than delay.
+
+    open_backup() returns a second connection with the same request already sent,
+    or None. The first response wins and the other connection is shut down.
+    """
+    finished = threading.Event()
+    outcomes = []
+    lock = threading.Lock()
+
+    def wait_for(racer: http_client.HTTPConnection) -> None:
+        try:
+            outcome = (racer, racer.getresponse(), None)
+        except Exception as e:
+            outcome = (racer, None, e)
+        with lock:
+            outcomes.append(outcome)
+        finished.set()
+
+    racers = [conn]
+    threading.Thread(target=wait_for, args=(conn,), daemon=True).start()
+    if not finished.wait(delay) and (backup := open_backup()) is not None:
+        racers.append(backup)
+        info["hedged"] = True
+        threading.Thread(target=wait_for, args=(backup,), daemon=True).start()
+
+    while True:
+        finished.wait()
+        with lock:
+            finished.clear()
+            winner = next((o for o in outcomes if o[1] is not None), None)
+            if winner or len(outcomes) == len(racers):
+                break
+    for racer in racers:
+        if winner is None or racer is not winner[0]:
+            # Shutting down wakes a thread still blocked reading from the socket
+            with contextlib.suppress(OSError):
+                if racer.sock:
+                    racer.sock.shutdown(socket.SHUT_RDWR)
+            racer.close()
+    if winner is None:
+        raise outcomes[0][2]
+    if len(racers) > 1:
+        info["hedge_won"] = winner[0] is not conn
+    return winner[0], winner[1]
+
+
+def proxy_for(scheme: str, host: str) -> tuple[str, int] | None:
+    """Return the (host, port) of the proxy configured for a URL, if any."""
+    proxy = os.environ.get(f"{scheme}_proxy") or os.environ.get(f"{scheme.upper()}_PROXY")
+    if not proxy:
+        return None
+    no_proxy = os.environ.get("no_proxy") or os.environ.get("NO_PROXY") or ""
+    for domain in (d.strip().lstrip(".") for d in no_proxy.split(",")):
+        if domain == "*" or (domain and (host == domain or host.endswith(f".{domain}"))):
+            return None
+    parsed = urllib.parse.urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+    return parsed.hostname, parsed.port or 80
+
+
+def get_connection(key: tuple, timeout: float) -> tuple[http_client.HTTPConnection, bool]:
+    """Take an idle pooled connection for key, or create a new one."""
+    with _pool_lock:
+        idle = _pool.get(key)
+        if idle:
+            conn = idle.pop()
+            conn.timeout = timeout
+            if conn.sock:
+                conn.sock.settimeout(timeout)
+            return conn, True
+
+    global _ssl_context
+    scheme, host, port = key
+    proxy = proxy_for(scheme, host)
+    target = proxy or (host, port)
+    http_class, https_class = connection_classes()
+    if scheme == "https":
+        if _ssl_context is None:
+            _ssl_context = ssl.create_default_context()
+        conn = https_class(*target, timeout=timeout, context=_ssl_context)
+    else:
+        conn = http_class(*target, timeout=timeout)
+    if proxy:
+        conn.set_tunnel(host, port)
+    return conn, False
+
+
+def release_connection(
+    key: tuple, conn: http_client.HTTPConnection, response: http_client.HTTPResponse
+) -> None:
+    """Return a connection to the pool unless the server is closing it."""
+    if isinstance(conn.sock, ssl.SSLSocket) and conn.sock.session:
+        _tls_sessions[key[1]] = conn.sock.session
+    if response.will_close:
+        conn.close()
+        return
+    with _pool_lock:
+        idle = _pool.setdefault(key, [])
+        if len(idle) < POOL_MAX_IDLE:
+            idle.append(conn)
+            return
+    conn.close()
+
+
+@contextlib.contextmanager
+def http_stream(
+    method: str, url: str, headers: dict | None = None, body: bytes | None = None,
+    timeout: float = 30, attempt: int = 0, stats: dict | None = None,
+    hedge_after: float | None = None,
+):
+    """Send a request over a pooled keep-alive connection and yield the unread response.
+
+    Compressed responses are decoded as they are read, and large bodies are sent
+    gzip-compressed unless the host has rejected that before. When stats is given,
+    the status, retry attempt, wire size and bytes saved by compression are
+    recorded in it. With hedge_after, a duplicate request is sent on another
+    connection if no response has started after that many seconds, as far as the
+    hedge budget allows; only use it for idempotent requests. Raises
+    http.client.HTTPException or OSError on network failures.
+    """
+    parts = urllib.parse.urlsplit(url)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    key = (parts.scheme, parts.hostname, port)
+    path = parts.path or "/"
+    if parts.query:
+        path += f"?{parts.query}"
+    headers = {"Accept-Encoding": accept_encoding(), **(headers or {})}
+    payload = body
+    if body and len(body) >= GZIP_MIN_BYTES and key not in _plain_body_hosts:
+        payload = gzip_body(body)
+        headers["Content-Encoding"] = "gzip"
+
+    def open_backup() -> http_client.HTTPConnection | None:
+        if not take_hedge_token():
+            return None
+        backup, _ = get_connection(key, timeout)
+        try:
+            if backup.sock is None:
+                backup.connect()
+            backup.request(method, path, body=payload, headers=headers)
+        except (http_client.HTTPException, OSError):
+            backup.close()
+            return None
+        return backup
+
+    with span(
+        "http", method=method, url=f"{parts.netloc}{parts.path}", attempt=attempt,
+        request_bytes=len(payload or b""), response_bytes=0,
+    ) as info:
+        stale_retry = 0
+        while True:
+            conn, reused = get_connection(key, timeout)
+            try:
+                if conn.sock is None:
+                    conn.connect()
+                with span("ttfb"):
+                    conn.request(method, path, body=payload, headers=headers)
+                    if hedge_after is None:
+                        response = conn.getresponse()
+                    else:
+                        conn, response = race_responses(conn, open_backup, hedge_after, info)
+            except TimeoutError:
+                conn.close()
+                raise
+            except (http_client.HTTPException, OSError):
+                conn.close()
+                # The server may have dropped an idle pooled connection; retry once fresh
+                if reused and stale_retry == 0:
+                    stale_retry += 1
+                    continue
+                raise
+            if payload is not body and response.status in (400, 415):
+                # The server may not take compressed bodies; send them plain from now on
+                response.read()
+                release_connection(key, conn, response)
+                _plain_body_hosts.add(key)
+                payload = body
+                del headers["Content-Encoding"]
+                info["request_bytes"] = len(body)
+                continue
+            break
+
+        info.update(status=response.status, reused=reused)
+        if stats is not None:
+            stats.update(status=response.status, retries=attempt)
+            stats["throttled"] += response.status == 429
+            stats["saved"] += len(body or b"") - len(payload or b"")
+        if _tracer.get() is not None or stats is not None:
+            response.read = counted_read(response.read, info, stats)
+        encoding = (response.getheader("Content-Encoding") or "identity").strip().lower()
+        if encoding != "identity":
+            decoder = content_decoder(encoding)
+            if decoder is None:
+                conn.close()
+                raise http_client.HTTPException(f"Unsupported Content-Encoding '{encoding}'")
+            info["encoding"] = encoding
+            response.read = decoded_read(response.read, decoder, info, stats)
+        try:
+            yield response
+        except BaseException:
+            conn.close()
+            raise
+        # Only a fully read response leaves the connection reusable
+        if response.isclosed():
+            release_connection(key, conn, response)
+        else:
+            conn.close()
+
+
+def counted_read(read, info: dict, stats: dict | None):
+    """Wrap a response's read() to count body bytes and trace each call."""
+
+    def wrapper(*args):
+        with span("body") as body:
+            data = read(*args)
+            body["bytes"] = len(data)
+        info["response_bytes"] += len(data)
+        if stats is not None:
+            stats["bytes"] += len(data)
+        return data
+
+    return wrapper
+
+
+def decoded_read(read, decoder: tuple, info: dict, stats: dict | None):
+    """Wrap a response's read() to decompress the body as it streams in.
+
+    Like read(), the wrapper returns b"" only at the end of the body, but a call may
+    return more bytes than requested.
+    """
+    decompress, flush = decoder
+    info["decoded_bytes"] = 0
+
+    def wrapper(*args):
+        while True:
+            data = read(*args)
+            if not data:
+                decoded = flush()
+            else:
+                with span("decompress", bytes=len(data)):
+                    decoded = decompress(data)
+            info["decoded_bytes"] += len(decoded)
+            if stats is not None:
+                stats["saved"] += len(decoded) - len(data)
+            if decoded or not data:
+                return decoded
+
+    return wrapper
+
+
+def http_request(
+    method: str, url: str, headers: dict | None = None, body: bytes | None = None,
+    timeout: float = 30, attempt: int = 0, stats: dict | None = None,
+    hedge_after: float | None = None,
+) -> Response:
+    """Send a request over a pooled keep-alive connection and read the whole body."""
+    with http_stream(
+        method, url, headers, body, timeout, attempt, stats, hedge_after
+    ) as response:
+        data = response.read()
+    return Response(url, response.status, response.reason, response.headers, data)
+
+
+def iter_text(response: http_client.HTTPResponse):
+    """Yield the response body as text, decoding UTF-8 incrementally."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    while chunk := response.read(STREAM_CHUNK_SIZE):
+        if text := decoder.decode(chunk):
+            yield text
+    if tail := decoder.decode(b"", final=True):
+        yield tail
+
+
+# Rate limiting and retries shared by every process that talks to the same API.
+
+RATE_DIR = os.path.join(CACHE_DIR, "ratelimit")
+RATE_JITTER = 0.25
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+RETRY_MAX_WAIT = 120.0
+# Hedged requests are extra load, so they draw on their own small bucket as well
+HEDGE_RATE = 0.1
+HEDGE_BURST = 3
+
+
+class RateLimiter:
+    """Token bucket whose state is shared across processes through a locked file.
+
+    Every request takes a token before it is sent. A 429 or an exhausted quota
+    reported by the server blocks all processes until the advertised reset.
+    Commands that send thousands of requests can raise the budget with bulk().
+    """
+
+    def __init__(self, name: str, rate: float, burst: int):
+        self.path = os.path.join(RATE_DIR, f"{name}.json")
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._bulk = contextvars.ContextVar(f"{name}_bulk", default=None)
+
+    @contextlib.contextmanager
+    def bulk(self, rate: float, burst: int):
+        """Allow up to rate and burst for requests made in this context and its pools."""
+        token = self._bulk.set((rate, burst))
+        try:
+            yield
+        finally:
+            self._bulk.reset(token)
+
+    def budget(self) -> tuple[float, int]:
+        """Return the (rate, burst) in effect, raised by an enclosing bulk() if any."""
+        bulk = self._bulk.get()
+        if bulk is None:
+            return self.rate, self.burst
+        return max(self.rate, bulk[0]), max(self.burst, bulk[1])
+
+    @contextlib.contextmanager
+    def _state(self):
+        """Yield the refilled bucket state under an exclusive lock, then save it."""
+        rate, burst = self.budget()
+        with self._lock:
+            try:
+                os.makedirs(RATE_DIR, exist_ok=True)
+                f = open(self.path, "a+")
+            except OSError:
+                # Without a state file, pace this process only
+                f = None
+            with f or contextlib.nullcontext():
+                state = {}
+                if f is not None:
+                    if fcntl is not None:
+                        fcntl.flock(f, fcntl.LOCK_EX)
+                    f.seek(0)
+                    try:
+                        state = json.loads(f.read() or "{}")
+                    except ValueError:
+                        pass
+                now = time.time()
+                elapsed = max(0.0, now - state.get("updated", now))
+                tokens = state.get("tokens", burst) + elapsed * rate
+                state = {
+                    "tokens": min(burst, tokens),
+                    "updated": now,
+                    "blocked_until": state.get("blocked_until", 0.0),
+                }
+                yield state
+                if f is not None:
+                    f.seek(0)
+                    f.truncate()
+                    f.write(json.dumps(state))
+
+    def acquire(self) -> None:
+        """Wait until a request may be sent."""
+        while True:
+            with self._state() as state:
+                wait = state["blocked_until"] - state["updated"]
+                if wait <= 0:
+                    if state["tokens"] >= 1:
+                        state["tokens"] -= 1
+                        return
+                    wait = (1 - state["tokens"]) / self.budget()[0]
+            with span("rate_limit"):
+                time.sleep(wait + random.uniform(0, RATE_JITTER))
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available right now."""
+        with self._state() as state:
+            if state["blocked_until"] > state["updated"] or state["tokens"] < 1:
+                return False
+            state["tokens"] -= 1
+            return True
+
+    def block(self, seconds: float) -> None:
+        """Hold back every process for seconds."""
+        with self._state() as state:
+            state["blocked_until"] = max(state["blocked_until"], state["updated"] + seconds)
+            state["tokens"] = 0.0
+
+    def observe(self, headers) -> None:
+        """Adjust the bucket from the server's rate-limit headers, if any."""
+        remaining = header_number(headers, "RateLimit-Remaining", "X-RateLimit-Remaining")
+        if remaining is None:
+            return
+        reset = header_number(headers, "RateLimit-Reset", "X-RateLimit-Reset")
+        if remaining < 1 and reset:
+            # Reset is either delta seconds or an epoch timestamp
+            self.block(reset - time.time() if reset > 1e9 else reset)
+        elif remaining < self.budget()[1]:
+            with self._state() as state:
+                state["tokens"] = min(state["tokens"], remaining)
+
+
+def header_number(headers, *names: str) -> float | None:
+    """Return the first numeric value among the named headers."""
+    for name in names:
+        value = headers.get(name)
+        if value:
+            try:
+                return float(value.split(",")[0].split(";")[0])
+            except ValueError:
+                continue
+    return None
+
+
+def retry_delay(attempt: int, retry_after: str | None = None) -> float:
+    """Seconds to wait before retrying, honouring Retry-After when present.
+
+    Otherwise backoff is exponential with jitter, so parallel clients spread
+    out instead of retrying in lockstep.
+    """
+    if retry_after:
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            import email.utils
+
+            try:
+                delay = email.utils.parsedate_to_datetime(retry_after).timestamp() - time.time()
+            except (TypeError, ValueError):
+                delay = None
+        if delay is not None:
+            return max(0.0, delay) + random.uniform(0, RATE_JITTER)
+    backoff = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt)
+    return random.uniform(backoff / 2, backoff)
+
+
+def wait_before_retry(status: int, retry_after: str | None, attempt: int) -> bool:
+    """Wait before retrying a failed request; return False if the wait is too long."""
+    delay = retry_delay(attempt, retry_after)
+    if delay > RETRY_MAX_WAIT:
+        return False
+    print(f"Retrying in {delay:.1f}s... (attempt {attempt + 1})", file=sys.stderr)
+    api = _api.get()
+    if status == 429 and api is not None:
+        # The next acquire() waits out the block, in this and every other process
+        api.rate_limiter.block(delay)
+    else:
+        with span("backoff", status=status):
+            time.sleep(delay)
+    return True
+
+
+class Api:
+    """An API a client talks to: its name in statistics and its shared rate budgets."""
+
+    def __init__(self, name: str, rate: float, burst: int):
+        self.name = name
+        self.rate_limiter = RateLimiter(name, rate, burst)
+        self.hedge_limiter = RateLimiter(f"{name}-hedge", HEDGE_RATE, HEDGE_BURST)
+
+
+# The API of the running command, set by run_client() like the tracer, so clients
+# sharing this module in one process keep their own statistics and budgets
+_api: contextvars.ContextVar = contextvars.ContextVar("api", default=None)
+
+
+def take_hedge_token() -> bool:
+    """Allow a hedged request only within both the hedge and the API budget."""
+    api = _api.get()
+    return (
+        api is not None and api.hedge_limiter.try_acquire() and api.rate_limiter.try_acquire()
+    )
+
+
+# Usage statistics appended by every invocation and rolled up into histograms.
+
+STATS_LOG = os.path.join(CACHE_DIR, "stats.log")
+STATS_PATH = os.path.join(CACHE_DIR, "stats.json")
+STATS_COMPACT_BYTES = 64 * 1024
+# Timeouts and hedge delays follow an endpoint's latency once it has this many
+# first-attempt successes on record
+ADAPTIVE_MIN_SAMPLES = 20
+ADAPTIVE_TIMEOUT_FACTOR = 4.0
+ADAPTIVE_TIMEOUT_MIN = 5.0
+HEDGE_MIN_DELAY = 0.1
+HEDGE_PERCENTILE = 95
+# Upper bounds in milliseconds; the final bucket counts anything slower
+STATS_BUCKETS_MS = (
+    10, 25, 50, 100, 175, 250, 400, 600, 1000, 1500, 2500, 4000, 6000, 10000, 15000,
+    25000, 40000, 60000, 120000,
+)
+
+
+def record_stats(
+    kind: str, endpoint: str, status: int, elapsed: float, size: int, retries: int,
+    throttled: int = 0, saved: int = 0,
+) -> None:
+    """Append one record to the stats log with a single small write.
+
+    kind is "net" for API requests, "cache" for locally served ones and
+    "spill" for output saved to a temp file. size counts bytes on the wire and
+    saved the bytes that compression kept off it.
+    """
+    api = _api.get()
+    if api is None or os.environ.get("CCC_NO_STATS"):
+        return
+    line = (
+        f"{kind}\t{api.name}\t{endpoint}\t{status}\t{elapsed * 1000:.1f}"
+        f"\t{size}\t{retries}\t{throttled}\t{saved}\n"
+    )
+    try:
+        try:
+            fd = os.open(STATS_LOG, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        except FileNotFoundError:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            fd = os.open(STATS_LOG, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            os.write(fd, line.encode("utf-8"))
+            oversized = os.fstat(fd).st_size > STATS_COMPACT_BYTES
+        finally:
+            os.close(fd)
+        if oversized:
+            compact_stats()
+    except OSError:
+        pass
+
+
+@contextlib.contextmanager
+def request_stats(endpoint: str):
+    """Record one logical API request, including its retries, when the block exits.
+
+    The yielded dict is filled in by http_stream(stats=...).
+    """
+    stats = {"status": 0, "bytes": 0, "retries": 0, "throttled": 0, "saved": 0}
+    start = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        record_stats(
+            "net", endpoint, stats["status"], time.perf_counter() - start,
+            stats["bytes"], stats["retries"], stats["throttled"], stats["saved"],
+        )
+        transfer = _transfer.get()
+        if transfer is not None:
+            with _transfer_lock:
+                transfer["bytes"] += stats["bytes"]
+                transfer["saved"] += stats["saved"]
+
+
+# Response bytes and compression savings of the running command, set by run_client()
+# so each invocation can report what compression kept off the network
+_transfer: contextvars.ContextVar = contextvars.ContextVar("transfer", default=None)
+_transfer_lock = threading.Lock()
+
+
+def report_compression(transfer: dict) -> None:
+    """Print a one-line summary on stderr if compression saved any bytes."""
+    if transfer["saved"] > 0:
+        print(
+            f"Compression: {transfer['saved'] / 1024:.1f} KB not transferred, "
+            f"{transfer['bytes'] / 1024:.1f} KB of responses received",
+            file=sys.stderr,
+        )
+
+
+def compact_stats() -> dict:
+    """Fold the stats log into the rolled-up histograms and return them."""
+    rollup = {"since": time.time(), "endpoints": {}}
+    folding = f"{STATS_LOG}.folding"
+    with contextlib.suppress(OSError), open(f"{STATS_LOG}.lock", "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        with contextlib.suppress(OSError, ValueError), open(STATS_PATH) as f:
+            rollup = json.load(f)
+        # Move the log aside first so concurrent writers start a fresh one
+        with contextlib.suppress(FileNotFoundError):
+            if not os.path.exists(folding):
+                os.replace(STATS_LOG, folding)
+        try:
+            with open(folding, encoding="utf-8", errors="replace") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return rollup
+
+        endpoints = rollup["endpoints"]
+        for line in lines:
+            fields = line.split("\t")
+            if len(fields) == 8:
+                fields.append("0")
+            if len(fields) != 9:
+                continue
+            kind, client, endpoint, status, ms, size, retries, throttled, saved = fields
+            entry = endpoints.setdefault(f"{client} {endpoint}", {
+                "count": 0, "cached": 0, "spills": 0, "retries": 0, "throttled": 0,
+                "bytes": 0, "statuses": {}, "buckets": [0] * (len(STATS_BUCKETS_MS) + 1),
+            })
+            entry.setdefault("saved", 0)
+            entry.setdefault("net_buckets", [0] * (len(STATS_BUCKETS_MS) + 1))
+            if kind == "spill":
+                entry["spills"] += 1
+                continue
+            entry["count"] += 1
+            entry["cached"] += kind == "cache"
+            entry["statuses"][status] = entry["statuses"].get(status, 0) + 1
+            entry["retries"] += int(retries)
+            entry["throttled"] += int(throttled)
+            entry["bytes"] += int(size)
+            entry["saved"] += int(saved)
+            entry["buckets"][bisect.bisect_left(STATS_BUCKETS_MS, float(ms))] += 1
+            if kind == "net" and retries == "0" and status.startswith("2"):
+                entry["net_buckets"][bisect.bisect_left(STATS_BUCKETS_MS, float(ms))] += 1
+
+        tmp_path = f"{STATS_PATH}.{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            json.dump(rollup, f)
+        os.replace(tmp_path, STATS_PATH)
+        os.unlink(folding)
+    return rollup
+
+
+def histogram_percentile(buckets: list[int], percentile: float) -> float | None:
+    """Estimate a percentile in milliseconds by interpolating within its bucket."""
+    total = sum(buckets)
+    if not total:
+        return None
+    rank = percentile / 100 * total
+    seen = 0
+    for i, count in enumerate(buckets):
+        if count and seen + count >= rank:
+            low = STATS_BUCKETS_MS[i - 1] if i else 0
+            if i == len(STATS_BUCKETS_MS):
+                return float(low)
+            return round(low + (STATS_BUCKETS_MS[i] - low) * (rank - seen) / count, 1)
+        seen += count
+    return None
+
+
+_latency_rollup: tuple[float, dict] = (0.0, {})
+_hedging: contextvars.ContextVar = contextvars.ContextVar(
+    "hedging", default=bool(os.environ.get("CCC_HEDGE"))
+)
+
+
+def endpoint_latency(endpoint: str, percentile: float) -> float | None:
+    """Seconds within which this share of first attempts succeeded, if well known."""
+    global _latency_rollup
+    api = _api.get()
+    if api is None:
+        return None
+    try:
+        mtime = os.stat(STATS_PATH).st_mtime
+    except OSError:
+        return None
+    if mtime != _latency_rollup[0]:
+        try:
+            with open(STATS_PATH) as f:
+                _latency_rollup = (mtime, json.load(f).get("endpoints", {}))
+        except (OSError, ValueError):
+            return None
+    buckets = _latency_rollup[1].get(f"{api.name} {endpoint}", {}).get("net_buckets")
+    if not buckets or sum(buckets) < ADAPTIVE_MIN_SAMPLES:
+        return None
+    value = histogram_percentile(buckets, percentile)
+    return None if value is None else value / 1000
+
+
+def request_timeout(endpoint: str, default: float) -> float:
+    """Socket timeout for a first attempt: a multiple of the endpoint's p99, capped at default."""
+    p99 = endpoint_latency(endpoint, 99)
+    if p99 is None:
+        return default
+    return min(default, max(ADAPTIVE_TIMEOUT_MIN, p99 * ADAPTIVE_TIMEOUT_FACTOR))
+
+
+def hedge_delay(endpoint: str) -> float | None:
+    """Seconds to wait before hedging a request, or None when hedging is off."""
+    if not _hedging.get():
+        return None
+    latency = endpoint_latency(endpoint, HEDGE_PERCENTILE)
+    return None if latency is None else max(HEDGE_MIN_DELAY, latency)
+
+
+def show_stats(args: argparse.Namespace) -> None:
+    """Report latency percentiles and error rates per endpoint."""
+    rollup = compact_stats()
+    if args.reset:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(STATS_PATH)
+        print("Statistics reset")
+        return
+
+    endpoints = {
+        key: entry
+        for key, entry in sorted(rollup["endpoints"].items())
+        if args.all or key.startswith(f"{_api.get().name} ")
+    }
+    report = {}
+    for key, entry in endpoints.items():
+        count = entry["count"]
+        errors = sum(n for s, n in entry["statuses"].items() if not 200 <= int(s) < 400)
+        report[key] = {
+            "requests": count,
+            "cached": entry["cached"],
+            **{
+                f"p{p}_ms": histogram_percentile(entry["buckets"], p)
+                for p in (50, 95, 99)
+            },
+            "error_rate": round(errors / count, 4) if count else 0.0,
+            "rate_limited": entry["throttled"],
+            "retries": entry["retries"],
+            "avg_bytes": entry["bytes"] // count if count else 0,
+            "saved_bytes": entry.get("saved", 0),
+            "spills": entry["spills"],
+            "statuses": entry["statuses"],
+        }
+
+    if args.format == "json":
+        since = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(rollup["since"]))
+        print(json.dumps({"since": since, "endpoints": report}, indent=2))
+        return
+    if not report:
+        print("No statistics recorded yet")
+        return
+
+    def ms(value: float | None) -> str:
+        if value is None:
+            return "-"
+        return f">{STATS_BUCKETS_MS[-1]}" if value >= STATS_BUCKETS_MS[-1] else f"{value:.0f}"
+
+    header = ["Endpoint", "Requests", "Cached", "p50 ms", "p95 ms", "p99 ms",
+              "Errors", "429s", "Retries", "Avg KB", "Saved KB", "Spills"]
+    rows = [
+        [
+            key, str(r["requests"]), str(r["cached"]), ms(r["p50_ms"]), ms(r["p95_ms"]),
+            ms(r["p99_ms"]), f"{r['error_rate']:.1%}", str(r["rate_limited"]),
+            str(r["retries"]), f"{r['avg_bytes'] / 1024:.1f}",
+            f"{r['saved_bytes'] / 1024:.0f}", str(r["spills"]),
+        ]
+        for key, r in report.items()
+    ]
+    widths = [max(len(row[i]) for row in [header, *rows]) for i in range(len(header))]
+    for row in [header, *rows]:
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip())
+    since = time.strftime("%Y-%m-%d", time.localtime(rollup["since"]))
+    print(f"\nSince {since}. Latency percentiles are estimated from fixed histogram buckets.")
+
+
+# Coalescing of identical requests made at the same time by several processes
+
+COALESCE_DIR = os.path.join(CACHE_DIR, "inflight")
+COALESCE_TIMEOUT = 60
+COALESCE_WINDOW = 5
+COALESCE_POLL = 0.05
+COALESCE_PRUNE_INTERVAL = 60
+
+
+class Inflight:
+    """Cross-process rendezvous so identical concurrent requests hit the network once.
+
+    The first process to lock a key performs the request and publishes the body;
+    the others wait for the lock and reuse it. The OS releases the lock if the
+    leader crashes, and waiting gives up after COALESCE_TIMEOUT. With fresh, only a
+    result published after this request arrived is reused, not one from just before.
+    """
+
+    def __init__(self, key: str, fresh: bool = False):
+        self.lock_path = os.path.join(COALESCE_DIR, f"{key}.lock")
+        self.result_path = os.path.join(COALESCE_DIR, f"{key}.result")
+        self.fresh = fresh
+        self.result = None
+        self._fd = None
+
+    def __enter__(self) -> "Inflight":
+        if fcntl is None:
+            return self
+        start = time.time()
+        try:
+            os.makedirs(COALESCE_DIR, exist_ok=True)
+            self._fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        except OSError:
+            return self
+
+        while True:
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.time() - start > COALESCE_TIMEOUT:
+                    # The leader is stuck; make the request independently
+                    os.close(self._fd)
+                    self._fd = None
+                    return self
+                time.sleep(COALESCE_POLL)
+
+        # Reuse a result published while we waited or just before we arrived
+        oldest = start if self.fresh else min(start, time.time() - COALESCE_WINDOW)
+        try:
+            if os.stat(self.result_path).st_mtime >= oldest:
+                with open(self.result_path, "rb") as f:
+                    self.result = f.read()
+        except OSError:
+            pass
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._fd is None:
+            return
+        if self.result is None:
+            # Retire the lock while holding it. Waiters already blocked on it still
+            # get the result, and later requests start from a new lock file.
+            with contextlib.suppress(OSError):
+                if os.stat(self.lock_path).st_ino == os.fstat(self._fd).st_ino:
+                    os.unlink(self.lock_path)
+        os.close(self._fd)
+        self._fd = None
+        if self.result is None:
+            self._prune()
+
+    @contextlib.contextmanager
+    def writer(self):
+        """Yield a binary file whose contents are published if the block succeeds."""
+        if self._fd is None:
+            with open(os.devnull, "wb") as f:
+                yield f
+            return
+        tmp_path = f"{self.result_path}.{os.getpid()}.{threading.get_ident()}"
+        try:
+            with open(tmp_path, "wb") as f:
+                yield f
+            os.replace(tmp_path, self.result_path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_path)
+            raise
+
+    def publish(self, data: bytes) -> None:
+        with self.writer() as f:
+            f.write(data)
+
+    def _prune(self) -> None:
+        """Remove expired results and abandoned lock files, at most once per interval."""
+        marker = os.path.join(COALESCE_DIR, ".pruned")
+        now = time.time()
+        try:
+            if now - os.stat(marker).st_mtime < COALESCE_PRUNE_INTERVAL:
+                return
+        except FileNotFoundError:
+            pass
+        except OSError:
+            return
+        with contextlib.suppress(OSError):
+            with open(marker, "a"):
+                os.utime(marker)
+            for entry in os.scandir(COALESCE_DIR):
+                if entry.name.startswith("."):
+                    continue
+                max_age = 86400 if entry.name.endswith(".lock") else 60
+                with contextlib.suppress(OSError):
+                    if now - entry.stat().st_mtime > max_age:
+                        os.unlink(entry.path)
+
+
+# Output that spills to a temp file when it is too long for the caller
+class SpooledOutput:
+    """Output writer that spills to a temp file once past MAX_OUTPUT_CHARS.
+
+    Line and character stats are tracked as text is written.
+    """
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.path = None
+        self.chars = 0
+        self.newlines = 0
+        self.max_line_chars = 0
+        self._line_chars = 0
+        self._buffer = []
+        self._file = None
+
+    def __enter__(self) -> "SpooledOutput":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        elif self._file:
+            self._file.close()
+            os.unlink(self.path)
+
+    def write(self, text: str) -> None:
+        with span("write", chars=len(text)):
+            self._track(text)
+            if self._file:
+                self._file.write(text)
+                return
+            self._buffer.append(text)
+            if self.chars > MAX_OUTPUT_CHARS:
+                fd, self.path = tempfile.mkstemp(prefix=f"{self.prefix}_", suffix=".txt")
+                self._file = os.fdopen(fd, "w")
+                self._file.writelines(self._buffer)
+                self._buffer = []
+
+    def _track(self, text: str) -> None:
+        self.chars += len(text)
+        start = 0
+        while (end := text.find("\n", start)) >= 0:
+            self.max_line_chars = max(self.max_line_chars, self._line_chars + end - start)
+            self._line_chars = 0
+            self.newlines += 1
+            start = end + 1
+        self._line_chars += len(text) - start
+
+    def close(self) -> None:
+        """Print buffered output, or summarize the temp file it spilled to."""
+        if self._file is None:
+            with span("write", chars=self.chars):
+                print("".join(self._buffer))
+            return
+
+        self._file.close()
+        record_stats("spill", self.prefix, 0, 0.0, self.chars, 0)
+        print(f"Response too long, saved to file:", file=sys.stderr)
+        print(f"  Path: {self.path}", file=sys.stderr)
+        print(f"  Lines: {self.newlines + 1}", file=sys.stderr)
+        print(f"  Characters: {self.chars}", file=sys.stderr)
+        print(
+            f"  Max line length: {max(self.max_line_chars, self._line_chars)}",
+            file=sys.stderr,
+        )
+
+
+# Running a command, in the warm daemon when one is up
+def run_in_daemon(client: str, argv: list[str], env_names: tuple) -> int | None:
+    """Forward argv to the warm daemon and relay its output.
+
+    The env_names variables are sent along so the daemon only runs the command
+    when its environment matches. Returns the exit code, or None when the command
+    should run in-process.
+    """
+    if (
+        os.environ.get("CCC_NO_DAEMON")
+        or not os.path.exists(DAEMON_SOCKET)
+        or not hasattr(socket, "AF_UNIX")
+        # Standard input is not forwarded, so commands reading it run here
+        or any(arg == "-" or arg.endswith("=-") for arg in argv)
+    ):
+        return None
+
+    try:
+        cwd = os.getcwd()
+    except OSError:
+        return None
+    request = {
+        "client": client,
+        "argv": argv,
+        "cwd": cwd,
+        "env": {name: os.environ.get(name) for name in env_names},
+    }
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(2)
+        sock.connect(DAEMON_SOCKET)
+        stream = sock.makefile("rwb")
+        stream.write(json.dumps(request).encode("utf-8") + b"\n")
+        stream.flush()
+        reply = json.loads(stream.readline() or b"{}")
+    except (OSError, ValueError):
+        sock.close()
+        return None
+    if not reply.get("accepted"):
+        sock.close()
+        return None
+
+    sock.settimeout(None)
+    relayed = False
+    with sock, stream:
+        while True:
+            try:
+                line = stream.readline()
+                frame = json.loads(line) if line else None
+            except (OSError, ValueError):
+                # A daemon that dies mid-command can leave a truncated frame
+                frame = None
+            if not isinstance(frame, dict):
+                break
+            if "exit" in frame:
+                return frame["exit"]
+            target = sys.stdout if "out" in frame else sys.stderr
+            target.write(frame.get("out", frame.get("err", "")))
+            target.flush()
+            relayed = True
+    if not relayed:
+        # Nothing reached the caller yet, so the command can still run here
+        return None
+    print("Error: Daemon connection lost", file=sys.stderr)
+    return 1
+
+
+def run_client(api: Api, args: argparse.Namespace) -> None:
+    """Run a parsed command against api, tracing it when requested.
+
+    Afterwards a line on stderr reports the bytes compression saved, if any.
+    """
+    api_token = _api.set(api)
+    hedge_token = _hedging.set(args.hedge or bool(os.environ.get("CCC_HEDGE")))
+    transfer_token = _transfer.set({"bytes": 0, "saved": 0})
+    try:
+        with tracing(args.trace, api.name, args.command):
+            args.func(args)
+        report_compression(_transfer.get())
+    finally:
+        _transfer.reset(transfer_token)
+        _hedging.reset(hedge_token)
+        _api.reset(api_token)
+
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""Resident daemon that keeps the skill clients warm behind a Unix socket."""
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+import traceback
+
+from batch import CLIENTS, ContextStream, load_client
+
+CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "ccc"
+)
+DAEMON_SOCKET = os.environ.get("CCC_DAEMON_SOCKET") or os.path.join(
+    CACHE_DIR, "daemon.sock"
+)
+DEFAULT_IDLE_TIMEOUT = 30 * 60
+FLUSH_CHARS = 8192
+
+
+class FrameWriter:
+    """Text stream that relays writes to the client as JSON frames.
+
+    The command's worker threads write to it too, so buffering is locked.
+    """
+
+    def __init__(self, wfile, kind: str, lock: threading.Lock):
+        self._wfile = wfile
+        self._kind = kind
+        self._lock = lock
+        self._buffer_lock = threading.Lock()
+        self._buffer = []
+        self._size = 0
+
+    def write(self, text: str) -> int:
+        with self._buffer_lock:
+            self._buffer.append(text)
+            self._size += len(text)
+            full = self._size >= FLUSH_CHARS
+        if "\n" in text or full:
+            self.flush()
+        return len(text)
+
+    def flush(self) -> None:
+        with self._buffer_lock:
+            if not self._buffer:
+                return
+            data = "".join(self._buffer)
+            self._buffer, self._size = [], 0
+        send_frame(self._wfile, {self._kind: data}, self._lock)
+
+
+def send_frame(wfile, frame: dict, lock: threading.Lock) -> None:
+    """Write one JSON frame to the client."""
+    with lock:
+        wfile.write(json.dumps(frame).encode("utf-8") + b"\n")
+        wfile.flush()
+
+
+def resolve_paths(args, names: tuple, cwd: str) -> None:
+    """Make the path arguments in names absolute against the caller's directory.
+
+    The daemon shares one working directory between callers, so relative paths
+    must not reach the client as they are.
+    """
+    # An unset --trace falls back to $CCC_TRACE, which is relative to the caller too
+    if "trace" in names and not getattr(args, "trace", None):
+        args.trace = os.environ.get("CCC_TRACE")
+    for name in names:
+        value = getattr(args, name, None)
+        if isinstance(value, list):
+            setattr(args, name, [os.path.join(cwd, v) if v != "-" else v for v in value])
+        elif value and value != "-":
+            setattr(args, name, os.path.join(cwd, value))
+
+
+def run_command(name: str, argv: list[str], cwd: str | None = None) -> int:
+    """Run a client command the same way its main() would, from the caller's cwd."""
+    module = load_client(name)
+    try:
+        args = module.build_parser(os.path.basename(CLIENTS[name])).parse_args(argv)
+        if cwd:
+            resolve_paths(args, getattr(module, "PATH_ARGS", ()), cwd)
+        module.run(args)
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else 1
+    except module.ClientError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    except Exception:
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+class DaemonHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        self.server.touch()
+        lock = threading.Lock()
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError:
+            return
+
+        if request.get("command") == "shutdown":
+            send_frame(self.wfile, {"accepted": True}, lock)
+            threading.Thread(target=self.server.shutdown).start()
+            return
+
+        # Commands that depend on a different environment run in the caller instead
+        env = request.get("env") or {}
+        if request.get("client") not in CLIENTS or any(
+            os.environ.get(name) != value for name, value in env.items()
+        ):
+            send_frame(self.wfile, {"accepted": False}, lock)
+            return
+
+        send_frame(self.wfile, {"accepted": True}, lock)
+        stdout = FrameWriter(self.wfile, "out", lock)
+        stderr = FrameWriter(self.wfile, "err", lock)
+        with sys.stdout.capture(stdout), sys.stderr.capture(stderr):
+            exit_code = run_command(
+                request["client"], request.get("argv", []), request.get("cwd")
+            )
+        stdout.flush()
+        stderr.flush()
+        send_frame(self.wfile, {"exit": exit_code}, lock)
+        self.server.touch()
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, idle_timeout: float):
+        super().__init__(path, DaemonHandler)
+        self.idle_timeout = idle_timeout
+        self.last_active = time.monotonic()
+
+    def touch(self) -> None:
+        self.last_active = time.monotonic()
+
+    def service_actions(self) -> None:
+        if self.idle_timeout and time.monotonic() - self.last_active > self.idle_timeout:
+            threading.Thread(target=self.shutdown).start()
+
+
+def socket_alive(path: str) -> bool:
+    """Check whether a daemon is accepting connections on path."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(1)
+        sock.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+def serve(args: argparse.Namespace) -> None:
+    """Run the daemon in the foreground."""
+    if socket_alive(args.socket):
+        print(f"Error: Daemon already running on {args.socket}", file=sys.stderr)
+        sys.exit(1)
+    os.makedirs(os.path.dirname(args.socket), mode=0o700, exist_ok=True)
+    if os.path.exists(args.socket):
+        os.unlink(args.socket)
+
+    for name in CLIENTS:
+        load_client(name)
+    sys.stdout = ContextStream(sys.stdout)
+    sys.stderr = ContextStream(sys.stderr)
+
+    os.umask(0o077)
+    server = DaemonServer(args.socket, args.idle_timeout)
+    print(f"Listening on {args.socket}", file=sys.stderr)
+    try:
+        server.serve_forever(poll_interval=1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(args.socket)
+
+
+def stop(args: argparse.Namespace) -> None:
+    """Ask a running daemon to shut down."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(2)
+        sock.connect(args.socket)
+        sock.sendall(b'{"command": "shutdown"}\n')
+        sock.recv(1024)
+    except OSError:
+        print(f"Error: No daemon running on {args.socket}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        sock.close()
+    print("Daemon stopped")
+
+
+def status(args: argparse.Namespace) -> None:
+    """Report whether the daemon is running."""
+    if socket_alive(args.socket):
+        print(f"Running on {args.socket}")
+    else:
+        print("Not running")
+        sys.exit(1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Warm resident daemon for the context7, deps-dev and exa clients"
+    )
+    parser.add_argument(
+        "--socket", default=DAEMON_SOCKET, help=f"Socket path (default: {DAEMON_SOCKET})"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="Run the daemon in the foreground")
+    serve_parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=DEFAULT_IDLE_TIMEOUT,
+        help=f"Exit after this many idle seconds, 0 to never exit (default: {DEFAULT_IDLE_TIMEOUT})",
+    )
+    serve_parser.set_defaults(func=serve)
+
+    stop_parser = subparsers.add_parser("stop", help="Stop a running daemon")
+    stop_parser.set_defaults(func=stop)
+
+    status_parser = subparsers.add_parser("status", help="Check whether the daemon is running")
+    status_parser.set_defaults(func=status)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,133 +1,1035 @@
 #!/usr/bin/env python3
 """Context7 API client for retrieving library documentation."""
 
-import argparse
+from __future__ import annotations
+
+import contextlib
+import functools
+import heapq
 import json
+import math
+import mmap
 import os
+import re
+import struct
 import sys
-import tempfile
+import threading
 import time
-import urllib.error
 import urllib.parse
-import urllib.request
+import zlib
+
+from ccc_common import (
+    Api, CACHE_DIR, ClientError, Inflight, LazyModule, RETRY_STATUSES, SpooledOutput, argparse,
+    concurrent_futures, hedge_delay, http_client, http_stream, iter_text, record_stats,
+    request_stats, request_timeout, run_client, run_in_daemon, show_stats, span, thread_pool,
+    wait_before_retry,
+)
+
 
-BASE_URL = "https://context7.com/api/v2"
+# Loaded on first use, so --help and daemon-forwarded calls start faster
+hashlib = LazyModule("hashlib")
+sqlite3 = LazyModule("sqlite3")
+tomllib = LazyModule("tomllib")
+
+CLIENT = "context7"
+BASE_URL = os.environ.get("CONTEXT7_BASE_URL") or "https://context7.com/api/v2"
 MAX_RETRIES = 3
-MAX_OUTPUT_CHARS = 30000
+REQUEST_TIMEOUT = 30
+
+DAEMON_ENV = ("CCC_HEDGE", "CCC_TRACE", "CONTEXT7_API_KEY", "CONTEXT7_BASE_URL", "CONTEXT7_BUNDLE")
+# Arguments holding file paths, resolved against the caller's directory by the daemon
+PATH_ARGS = ("bundle", "manifest", "output", "spec", "trace")
+RATE_LIMIT_RATE = 5.0
+RATE_LIMIT_BURST = 10
+API = Api(CLIENT, RATE_LIMIT_RATE, RATE_LIMIT_BURST)
+CACHE_PATH = os.path.join(CACHE_DIR, "context7.sqlite3")
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+CACHE_TTLS = {
+    "libs/search": 7 * 24 * 3600,
+    "context": 24 * 3600,
+}
+LOCAL_LIMIT = 10
+# A library name resolves locally when its best match scores at least
+# LIBRARY_MATCH_MIN and beats every other library by LIBRARY_MATCH_MARGIN
+LIBRARY_MATCH_MIN = 0.6
+LIBRARY_MATCH_MARGIN = 0.1
+LIBRARY_REDIRECT_HOPS = 10
+BUNDLE_PATH = os.environ.get("CONTEXT7_BUNDLE")
+BUNDLE_MAGIC = b"CTX7BDL1"
+# Trailer: index offset, index length, magic
+BUNDLE_TRAILER = struct.Struct(">QQ8s")
+BUNDLE_QUERIES = ("getting started and installation", "API reference and usage examples")
+BUNDLE_CONCURRENCY = 4
+BM25_K1 = 1.2
+BM25_B = 0.75
+DOC_SEPARATOR = re.compile(r"^-{10,}\s*$")
+DOC_HEADING = re.compile(r"^#{1,6}\s+(.+?)\s*#*$")
+# Streamed docs are written to the local index this many chunks at a time
+INDEX_BATCH_CHUNKS = 200
 
 
 def get_api_key() -> str:
     """Get API key from environment."""
     key = os.environ.get("CONTEXT7_API_KEY")
     if not key:
-        print("Error: CONTEXT7_API_KEY environment variable not set", file=sys.stderr)
-        sys.exit(1)
+        raise ClientError("CONTEXT7_API_KEY environment variable not set")
     if not key.startswith("ctx7sk"):
         print("Warning: API key should start with 'ctx7sk'", file=sys.stderr)
     return key
 
 
-def analyze_content(content: str) -> dict:
-    """Analyze content for file summary."""
-    lines = content.split("\n")
-    line_lengths = [len(line) for line in lines]
-    return {
-        "lines": len(lines),
-        "chars": len(content),
-        "max_line_chars": max(line_lengths) if line_lengths else 0,
-    }
-
-
 def output_response(content: str, prefix: str = "context7") -> None:
     """Output response, writing to temp file if too long."""
-    if len(content) <= MAX_OUTPUT_CHARS:
-        print(content)
+    with SpooledOutput(prefix) as out:
+        out.write(content)
+
+
+def cache_key(endpoint: str, params: dict) -> str:
+    """Build cache key from endpoint and normalized params."""
+    normalized = sorted(
+        (k, " ".join(str(v).split())) for k, v in params.items() if v is not None
+    )
+    raw = f"{endpoint}?{urllib.parse.urlencode(normalized)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def open_cache() -> sqlite3.Connection | None:
+    """Open the response cache, or None if it is unavailable."""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        conn = sqlite3.connect(CACHE_PATH, timeout=5)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, endpoint TEXT NOT NULL,"
+            " content_type TEXT NOT NULL, body TEXT NOT NULL,"
+            " size INTEGER NOT NULL, created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)"
+        )
+        return conn
+    except (OSError, sqlite3.Error):
+        return None
+
+
+def cache_get(conn: sqlite3.Connection, key: str, endpoint: str) -> tuple[str, str] | None:
+    """Return cached (content_type, body) if present and within TTL."""
+    ttl = CACHE_TTLS.get(endpoint, 0)
+    now = time.time()
+    try:
+        row = conn.execute(
+            "SELECT content_type, body FROM responses WHERE key = ? AND created_at > ?",
+            (key, now - ttl),
+        ).fetchone()
+        if row:
+            with conn:
+                conn.execute(
+                    "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+    except sqlite3.Error:
+        return None
+    return row
+
+
+def cache_put(
+    conn: sqlite3.Connection, key: str, endpoint: str, content_type: str, body: str
+) -> None:
+    """Store a successful response and evict least recently used entries."""
+    now = time.time()
+    try:
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, endpoint, content_type, body, len(body), now, now),
+            )
+            # Keep the most recently used entries that fit within the size cap
+            conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM (SELECT key, SUM(size) OVER"
+                " (ORDER BY accessed_at DESC, key) AS total FROM responses)"
+                " WHERE total > ?)",
+                (CACHE_MAX_BYTES,),
+            )
+    except sqlite3.Error:
+        pass
+
+
+def decode_body(content: str, content_type: str) -> dict | str:
+    """Decode response body according to its content type."""
+    if "application/json" in content_type:
+        with span("decode", chars=len(content)):
+            return json.loads(content)
+    return content
+
+
+def open_index() -> sqlite3.Connection | None:
+    """Open the full-text docs index, creating its tables on first use."""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        conn = sqlite3.connect(CACHE_PATH, timeout=5)
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS doc_libraries (
+                library_id TEXT PRIMARY KEY, refreshed_at REAL NOT NULL);
+            CREATE TABLE IF NOT EXISTS doc_chunks (
+                id INTEGER PRIMARY KEY, library_id TEXT NOT NULL,
+                source TEXT NOT NULL, hash TEXT NOT NULL,
+                title TEXT NOT NULL, body TEXT NOT NULL,
+                UNIQUE (library_id, hash));
+            CREATE INDEX IF NOT EXISTS doc_chunks_source ON doc_chunks (source);
+            CREATE VIRTUAL TABLE IF NOT EXISTS doc_index USING fts5(
+                title, body, content='doc_chunks', content_rowid='id',
+                tokenize='porter unicode61');
+            CREATE TRIGGER IF NOT EXISTS doc_chunks_insert AFTER INSERT ON doc_chunks BEGIN
+                INSERT INTO doc_index (rowid, title, body)
+                VALUES (new.id, new.title, new.body);
+            END;
+            CREATE TRIGGER IF NOT EXISTS doc_chunks_delete AFTER DELETE ON doc_chunks BEGIN
+                INSERT INTO doc_index (doc_index, rowid, title, body)
+                VALUES ('delete', old.id, old.title, old.body);
+            END;
+            """
+        )
+        return conn
+    except (OSError, sqlite3.Error):
+        return None
+
+
+class DocSplitter:
+    """Split a text docs response into (title, body) chunks by snippet and heading.
+
+    Text can be fed in pieces as it streams in; each call returns the chunks it
+    completed. Snippets are separated by dashed rules; headings inside code fences
+    are ignored.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._lines = []
+        self._tail = ""
+        self._title = ""
+        self._has_content = False
+        self._fenced = False
+
+    def feed(self, text: str) -> list[tuple[str, str]]:
+        lines = (self._tail + text).splitlines(keepends=True)
+        # The last line may continue in the next piece
+        self._tail = lines.pop() if lines and not lines[-1].endswith("\n") else ""
+        for line in lines:
+            self._add(line.splitlines()[0])
+        return self._take()
+
+    def close(self) -> list[tuple[str, str]]:
+        if self._tail:
+            self._add(self._tail.splitlines()[0])
+            self._tail = ""
+        self._flush()
+        return self._take()
+
+    def _add(self, line: str) -> None:
+        stripped = line.lstrip()
+        if stripped.startswith(("```", "~~~")):
+            self._fenced = not self._fenced
+        elif not self._fenced and DOC_SEPARATOR.match(line):
+            self._flush()
+            self._title, self._has_content = "", False
+            return
+        elif not self._fenced and (heading := DOC_HEADING.match(stripped)):
+            if self._has_content:
+                self._flush()
+                self._has_content = False
+            self._title = heading.group(1)
+        elif stripped:
+            self._has_content = True
+        self._lines.append(line)
+
+    def _flush(self) -> None:
+        body = "\n".join(self._lines).strip()
+        if body:
+            self._chunks.append((self._title, body))
+        self._lines.clear()
+
+    def _take(self) -> list[tuple[str, str]]:
+        chunks, self._chunks = self._chunks, []
+        return chunks
+
+
+def split_docs(text: str) -> list[tuple[str, str]]:
+    """Split a whole text docs response into (title, body) chunks."""
+    splitter = DocSplitter()
+    return splitter.feed(text) + splitter.close()
+
+
+def json_docs_text(data) -> str:
+    """Render a JSON docs response as text, one snippet per object in its lists."""
+
+    def strings(value):
+        if isinstance(value, str):
+            yield value
+        elif isinstance(value, dict):
+            for item in value.values():
+                yield from strings(item)
+        elif isinstance(value, list):
+            for item in value:
+                yield from strings(item)
+
+    snippets = []
+    for value in data.values() if isinstance(data, dict) else [data]:
+        for item in value if isinstance(value, list) else []:
+            if text := "\n\n".join(s.strip() for s in strings(item) if s.strip()):
+                snippets.append(text)
+    return f"\n\n{'-' * 40}\n\n".join(snippets)
+
+
+class DocIndexer:
+    """Index one docs response as it streams in, without holding the whole body.
+
+    Completed chunks are inserted under a temporary source in batches. When the
+    block succeeds they replace the chunks indexed from the same response before
+    and the library is marked refreshed; when it fails they are dropped.
+    """
+
+    def __init__(self, library_id: str, source: str):
+        self.library_id = library_id
+        self.source = source
+        self._staging = f"{source}.{os.getpid()}.{threading.get_ident()}"
+        self._splitter = DocSplitter()
+        self._pending = []
+        self._conn = None
+        self._failed = False
+
+    def __enter__(self) -> "DocIndexer":
+        self._conn = open_index()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._conn is None:
+            return
+        try:
+            if exc_type is None and not self._failed:
+                self._pending += self._splitter.close()
+                self._insert()
+                with self._conn:
+                    self._conn.execute("DELETE FROM doc_chunks WHERE source = ?", (self.source,))
+                    self._conn.execute(
+                        "UPDATE doc_chunks SET source = ? WHERE source = ?",
+                        (self.source, self._staging),
+                    )
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO doc_libraries VALUES (?, ?)",
+                        (self.library_id, time.time()),
+                    )
+            else:
+                with self._conn:
+                    self._conn.execute(
+                        "DELETE FROM doc_chunks WHERE source = ?", (self._staging,)
+                    )
+        except sqlite3.Error:
+            pass
+        finally:
+            self._conn.close()
+
+    def feed(self, text: str) -> None:
+        if self._conn is None or self._failed:
+            return
+        self._pending += self._splitter.feed(text)
+        if len(self._pending) >= INDEX_BATCH_CHUNKS:
+            try:
+                self._insert()
+            except sqlite3.Error:
+                # Give up on this response; its staged chunks are dropped on exit
+                self._failed = True
+
+    def _insert(self) -> None:
+        rows = [
+            (
+                self.library_id, self._staging,
+                hashlib.sha256(body.encode("utf-8")).hexdigest(), title, body,
+            )
+            for title, body in self._pending
+        ]
+        self._pending = []
+        with self._conn:
+            # Snippets shared with other queries move to this response
+            self._conn.executemany(
+                "INSERT INTO doc_chunks (library_id, source, hash, title, body)"
+                " VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (library_id, hash) DO UPDATE SET source = excluded.source",
+                rows,
+            )
+
+
+def index_docs(library_id: str, source: str, text: str) -> None:
+    """Replace the indexed chunks from one docs response and mark the library refreshed."""
+    with DocIndexer(library_id, source) as indexer:
+        indexer.feed(text)
+
+
+def search_index(library_id: str, query: str, limit: int) -> tuple[float, list[dict]]:
+    """Return the library's refresh time and its BM25-ranked chunks for query."""
+    conn = open_index()
+    if conn is None:
+        raise ClientError("Local docs index is unavailable (SQLite FTS5 required)")
+    with contextlib.closing(conn):
+        row = conn.execute(
+            "SELECT refreshed_at FROM doc_libraries WHERE library_id = ?", (library_id,)
+        ).fetchone()
+        if row is None:
+            raise ClientError(
+                f"No local docs for {library_id}. Fetch docs without --local first."
+            )
+        # Quote each term so user input never parses as FTS5 syntax
+        terms = re.findall(r"\w+", query)
+        if not terms:
+            return row[0], []
+        match = " OR ".join(f'"{term}"' for term in terms)
+        results = conn.execute(
+            "SELECT c.title, c.body, bm25(doc_index, 5.0, 1.0) AS score"
+            " FROM doc_index JOIN doc_chunks c ON c.id = doc_index.rowid"
+            " WHERE doc_index MATCH ? AND c.library_id = ?"
+            " ORDER BY score LIMIT ?",
+            (match, library_id, limit),
+        ).fetchall()
+    return row[0], [
+        {"title": title, "content": body, "score": round(-score, 3)}
+        for title, body, score in results
+    ]
+
+
+def open_libraries() -> sqlite3.Connection | None:
+    """Open the library name index and redirect table, creating them on first use."""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        conn = sqlite3.connect(CACHE_PATH, timeout=5)
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS library_names (
+                name TEXT NOT NULL, library_id TEXT NOT NULL, seen_at REAL NOT NULL,
+                PRIMARY KEY (name, library_id));
+            CREATE TABLE IF NOT EXISTS library_searches (
+                name TEXT PRIMARY KEY, library_id TEXT NOT NULL, searched_at REAL NOT NULL);
+            CREATE TABLE IF NOT EXISTS library_redirects (
+                old_id TEXT PRIMARY KEY, new_id TEXT NOT NULL, moved_at REAL NOT NULL);
+            """
+        )
+        return conn
+    except (OSError, sqlite3.Error):
+        return None
+
+
+def normalize_library_name(name: str) -> str:
+    """Lowercase a library name and drop punctuation, so "Next.js" matches "nextjs"."""
+    return re.sub(r"[^0-9a-z]+", "", name.lower())
+
+
+def trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def library_names(result: dict) -> set[str]:
+    """Normalized names a search result can be referred to by."""
+    library_id = result.get("id", "")
+    parts = [p for p in library_id.split("/") if p]
+    names = {result.get("title", "")}
+    if parts:
+        # /owner/repo and /owner/repo/version are known by repo and owner/repo
+        names.add(parts[min(1, len(parts) - 1)])
+        names.add("/".join(parts[:2]))
+    return {n for n in map(normalize_library_name, names) if n}
+
+
+def remember_libraries(name: str, results: list[dict]) -> None:
+    """Add search results to the name index; the top result becomes name's answer."""
+    results = [r for r in results if isinstance(r, dict) and r.get("id")]
+    if not results:
+        return
+    conn = open_libraries()
+    if conn is None:
         return
+    now = time.time()
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO library_names VALUES (?, ?, ?)",
+                [(n, r["id"], now) for r in results for n in library_names(r)],
+            )
+            if normalize_library_name(name):
+                conn.execute(
+                    "INSERT OR REPLACE INTO library_searches VALUES (?, ?, ?)",
+                    (normalize_library_name(name), results[0]["id"], now),
+                )
+    except sqlite3.Error:
+        pass
+    finally:
+        conn.close()
+
+
+def follow_redirects(conn: sqlite3.Connection, library_id: str) -> str:
+    """Return the ID that library_id was last known to move to."""
+    seen = {library_id}
+    for _ in range(LIBRARY_REDIRECT_HOPS):
+        row = conn.execute(
+            "SELECT new_id FROM library_redirects WHERE old_id = ?", (library_id,)
+        ).fetchone()
+        if row is None or row[0] in seen:
+            break
+        library_id = row[0]
+        seen.add(library_id)
+    return library_id
+
+
+def record_redirect(old_id: str, new_id: str) -> None:
+    """Remember that a library moved and point indexed names at its new ID."""
+    conn = open_libraries()
+    if conn is None:
+        return
+    try:
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO library_redirects VALUES (?, ?, ?)",
+                (old_id, new_id, time.time()),
+            )
+            conn.execute(
+                "UPDATE OR REPLACE library_names SET library_id = ? WHERE library_id = ?",
+                (new_id, old_id),
+            )
+            conn.execute(
+                "UPDATE library_searches SET library_id = ? WHERE library_id = ?",
+                (new_id, old_id),
+            )
+    except sqlite3.Error:
+        pass
+    finally:
+        conn.close()
+
+
+def current_library_id(library_id: str) -> str:
+    """Rewrite a library ID that has moved since it was last used."""
+    conn = open_libraries()
+    if conn is None:
+        return library_id
+    try:
+        with contextlib.closing(conn):
+            return follow_redirects(conn, library_id)
+    except sqlite3.Error:
+        return library_id
+
 
-    # Write to temp file
-    stats = analyze_content(content)
-    fd, path = tempfile.mkstemp(prefix=f"{prefix}_", suffix=".txt")
-    with os.fdopen(fd, "w") as f:
-        f.write(content)
+def match_library(name: str) -> tuple[str | None, list[tuple[float, str]]]:
+    """Resolve a library name from the local index.
+
+    Returns the confident match, or None with the best candidates by score.
+    A name searched before resolves to that search's top result; otherwise
+    names are compared by exact match, then trigram similarity.
+    """
+    normalized = normalize_library_name(name)
+    conn = open_libraries()
+    if conn is None or not normalized:
+        return None, []
+    with contextlib.closing(conn):
+        try:
+            row = conn.execute(
+                "SELECT library_id FROM library_searches WHERE name = ?", (normalized,)
+            ).fetchone()
+            if row:
+                return follow_redirects(conn, row[0]), [(1.0, row[0])]
+            rows = conn.execute("SELECT name, library_id FROM library_names").fetchall()
+        except sqlite3.Error:
+            return None, []
+
+    wanted = trigrams(normalized)
+    scores: dict[str, float] = {}
+    for candidate, library_id in rows:
+        if candidate == normalized:
+            score = 1.0
+        else:
+            grams = trigrams(candidate)
+            score = 2 * len(wanted & grams) / (len(wanted) + len(grams))
+        scores[library_id] = max(score, scores.get(library_id, 0.0))
+    ranked = sorted(((score, i) for i, score in scores.items() if score), reverse=True)[:5]
+    if (
+        ranked
+        and ranked[0][0] >= LIBRARY_MATCH_MIN
+        and (len(ranked) == 1 or ranked[0][0] - ranked[1][0] >= LIBRARY_MATCH_MARGIN)
+    ):
+        return ranked[0][1], ranked
+    return None, ranked
+
+
+def resolve_library(
+    name: str,
+    query: str,
+    offline: bool = False,
+    no_cache: bool = False,
+    refresh: bool = False,
+) -> str:
+    """Turn a library name into a library ID, searching the API only when unsure."""
+    with span("resolve", library=name) as info:
+        library_id, candidates = match_library(name)
+        info["local"] = library_id is not None
+    if library_id:
+        print(f"Resolved '{name}' to {library_id}", file=sys.stderr)
+        return library_id
+    if offline:
+        listed = ", ".join(i for _, i in candidates) or "none"
+        raise ClientError(
+            f"Cannot resolve '{name}' offline (candidates: {listed}). "
+            "Run without --local or pass --library-id."
+        )
+
+    result = make_request(
+        "libs/search",
+        {"libraryName": name, "query": query},
+        no_cache=no_cache,
+        refresh=refresh,
+    )
+    results = result.get("results", []) if isinstance(result, dict) else []
+    remember_libraries(name, results)
+    if not results or not results[0].get("id"):
+        raise ClientError(f"No library found for '{name}'")
+    library_id = current_library_id(results[0]["id"])
+    print(f"Resolved '{name}' to {library_id} by search", file=sys.stderr)
+    return library_id
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def tokenize(text: str) -> list[str]:
+    return re.findall(r"\w+", text.lower())
+
+
+class DocsBundle:
+    """Read-only view of a docs bundle built by the bundle command.
+
+    The file is memory-mapped and only the index and the blocks a lookup
+    needs are decompressed. Layout: magic, zlib-compressed blocks, a
+    compressed JSON index, then BUNDLE_TRAILER.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        try:
+            with open(path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise ClientError(f"Cannot open bundle {path} - {e}") from None
+        size = len(self._map)
+        if size < len(BUNDLE_MAGIC) + BUNDLE_TRAILER.size or (
+            self._map[: len(BUNDLE_MAGIC)] != BUNDLE_MAGIC
+        ):
+            raise ClientError(f"{path} is not a context7 docs bundle")
+        offset, length, magic = BUNDLE_TRAILER.unpack(self._map[size - BUNDLE_TRAILER.size :])
+        if magic != BUNDLE_MAGIC or offset + length > size - BUNDLE_TRAILER.size:
+            raise ClientError(f"{path} is truncated or corrupt")
+        index = json.loads(self.block([offset, length]))
+        self.created_at = index["created_at"]
+        self.libraries = index["libraries"]
+        self.redirects = index["redirects"]
+        # Names a library was requested by take precedence over derived aliases
+        self._names = {
+            name: library_id
+            for field in ("aliases", "names")
+            for library_id, library in self.libraries.items()
+            for name in library[field]
+        }
+
+    def block(self, location: list[int]) -> bytes:
+        offset, length = location
+        return zlib.decompress(self._map[offset : offset + length])
+
+    def resolve(self, name: str) -> str | None:
+        return self._names.get(normalize_library_name(name))
+
+    def library_id(self, library_id: str) -> str | None:
+        """Return the bundled ID for library_id, following moves seen while bundling."""
+        library_id = self.redirects.get(library_id, library_id)
+        return library_id if library_id in self.libraries else None
+
+    def docs(self, library_id: str, query: str) -> str | None:
+        """Return the bundled response for exactly this query, if any."""
+        location = self.libraries[library_id]["queries"].get(normalize_query(query))
+        return self.block(location).decode("utf-8") if location else None
+
+    def search(self, library_id: str, query: str, limit: int) -> list[dict]:
+        """Rank the library's bundled snippets for query with BM25."""
+        library = self.libraries[library_id]
+        postings = json.loads(self.block(library["terms"]))
+        lengths = library["lengths"]
+        average = sum(lengths) / len(lengths) if lengths else 1.0
+        scores: dict[int, float] = {}
+        for term in set(tokenize(query)):
+            hits = postings.get(term)
+            if not hits:
+                continue
+            idf = math.log(1 + (len(lengths) - len(hits) + 0.5) / (len(hits) + 0.5))
+            for chunk, tf in hits:
+                norm = 1 - BM25_B + BM25_B * lengths[chunk] / average
+                scores[chunk] = scores.get(chunk, 0.0) + idf * tf * (BM25_K1 + 1) / (
+                    tf + BM25_K1 * norm
+                )
+        if not scores:
+            return []
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        chunks = json.loads(self.block(library["chunks"]))
+        return [
+            {"title": chunks[i][0], "content": chunks[i][1], "score": round(score, 3)}
+            for i, score in best
+        ]
 
-    print(f"Response too long, saved to file:", file=sys.stderr)
-    print(f"  Path: {path}", file=sys.stderr)
-    print(f"  Lines: {stats['lines']}", file=sys.stderr)
-    print(f"  Characters: {stats['chars']}", file=sys.stderr)
-    print(f"  Max line length: {stats['max_line_chars']}", file=sys.stderr)
 
+@functools.cache
+def open_bundle(path: str) -> DocsBundle:
+    return DocsBundle(path)
 
-def make_request(endpoint: str, params: dict, retries: int = MAX_RETRIES) -> dict | str:
-    """Make authenticated request to Context7 API with retry logic."""
+
+def manifest_libraries(path: str) -> list[str]:
+    """Dependency names from package.json, requirements*.txt, pyproject.toml or Cargo.toml."""
+    base = os.path.basename(path)
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+        if base == "package.json":
+            data = json.loads(raw)
+            names = [
+                name
+                for field in ("dependencies", "devDependencies", "peerDependencies")
+                for name in data.get(field) or {}
+            ]
+        elif base.endswith(".txt"):
+            names = [
+                m.group(0)
+                for line in raw.decode("utf-8").splitlines()
+                if (m := re.match(r"[A-Za-z0-9][A-Za-z0-9._-]*", line.strip()))
+            ]
+        elif base == "pyproject.toml":
+            data = tomllib.loads(raw.decode("utf-8"))
+            names = [
+                re.match(r"[A-Za-z0-9._-]*", spec.strip()).group(0)
+                for spec in data.get("project", {}).get("dependencies", [])
+            ]
+            poetry = data.get("tool", {}).get("poetry", {}).get("dependencies", {})
+            names += [name for name in poetry if name != "python"]
+        elif base == "Cargo.toml":
+            data = tomllib.loads(raw.decode("utf-8"))
+            names = [*data.get("dependencies", {}), *data.get("dev-dependencies", {})]
+        else:
+            raise ClientError(
+                f"Unsupported manifest {base}. "
+                "Use package.json, requirements*.txt, pyproject.toml or Cargo.toml."
+            )
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        raise ClientError(f"Cannot read manifest {path} - {e}") from None
+    return list(dict.fromkeys(n for n in names if n))
+
+
+def read_bundle_spec(path: str) -> list[tuple[str, str]]:
+    """Read 'LIBRARY QUERY' lines; LIBRARY is an ID (/owner/repo) or a name."""
+    try:
+        if path == "-":
+            lines = sys.stdin.read().splitlines()
+        else:
+            with open(path, encoding="utf-8") as f:
+                lines = f.read().splitlines()
+    except OSError as e:
+        raise ClientError(f"Cannot read {path} - {e}") from None
+    entries = []
+    for line in lines:
+        library, _, query = line.strip().partition(" ")
+        if library and not library.startswith("#"):
+            if not query.strip():
+                raise ClientError(f"Missing query for {library} in {path}")
+            entries.append((library, query.strip()))
+    return entries
+
+
+def write_bundle(path: str, fetched: dict[str, dict], redirects: dict[str, str]) -> int:
+    """Write fetched docs to a bundle file and return its size in bytes.
+
+    fetched maps each library ID to its names and {query: text} responses.
+    """
+    index = {"created_at": time.time(), "libraries": {}, "redirects": redirects}
+    partial = f"{path}.tmp"
+    with open(partial, "wb") as f:
+        f.write(BUNDLE_MAGIC)
+
+        def add(data: bytes) -> list[int]:
+            compressed = zlib.compress(data, 9)
+            location = [f.tell(), len(compressed)]
+            f.write(compressed)
+            return location
+
+        for library_id, library in sorted(fetched.items()):
+            chunks: dict[str, tuple[str, str]] = {}
+            queries = {}
+            for query, text in sorted(library["queries"].items()):
+                queries[normalize_query(query)] = add(text.encode("utf-8"))
+                for title, body in split_docs(text):
+                    chunks.setdefault(body, (title, body))
+            postings: dict[str, list] = {}
+            lengths = []
+            for i, (title, body) in enumerate(chunks.values()):
+                # Titles count twice so headings outrank passing mentions
+                terms = tokenize(title) * 2 + tokenize(body)
+                lengths.append(len(terms))
+                counts: dict[str, int] = {}
+                for term in terms:
+                    counts[term] = counts.get(term, 0) + 1
+                for term, count in counts.items():
+                    postings.setdefault(term, []).append([i, count])
+            index["libraries"][library_id] = {
+                "names": sorted(library["names"]),
+                "aliases": sorted(library_names({"id": library_id})),
+                "queries": queries,
+                "chunks": add(json.dumps(list(chunks.values())).encode("utf-8")),
+                "terms": add(json.dumps(postings, separators=(",", ":")).encode("utf-8")),
+                "lengths": lengths,
+            }
+        offset, length = add(json.dumps(index, separators=(",", ":")).encode("utf-8"))
+        f.write(BUNDLE_TRAILER.pack(offset, length, BUNDLE_MAGIC))
+        size = f.tell()
+    os.replace(partial, path)
+    return size
+
+
+def deliver(body: str, content_type: str, out: SpooledOutput | None) -> dict | str | None:
+    """Return a stored response body, or write text bodies to out."""
+    if out is not None and "application/json" not in content_type:
+        out.write(body)
+        return None
+    return decode_body(body, content_type)
+
+
+def make_request(
+    endpoint: str,
+    params: dict,
+    retries: int = MAX_RETRIES,
+    no_cache: bool = False,
+    refresh: bool = False,
+    out: SpooledOutput | None = None,
+) -> dict | str | None:
+    """Make authenticated request to Context7 API with retry logic and caching.
+
+    When out is given, text responses are written to it as they stream in and
+    None is returned. Identical requests from concurrent processes are coalesced.
+    """
+    start = time.perf_counter()
+    cache = None if no_cache else open_cache()
+    key = cache_key(endpoint, params)
+    if cache and not refresh:
+        with span("cache", endpoint=endpoint) as info:
+            cached = cache_get(cache, key, endpoint)
+            info["hit"] = cached is not None
+        if cached:
+            record_stats("cache", endpoint, 200, time.perf_counter() - start, len(cached[1]), 0)
+            return deliver(cached[1], cached[0], out)
+
+    with Inflight(key, fresh=no_cache or refresh) as inflight:
+        if inflight.result is not None:
+            content_type, _, body = inflight.result.partition(b"\n")
+            record_stats("cache", endpoint, 200, time.perf_counter() - start, len(body), 0)
+            return deliver(body.decode("utf-8"), content_type.decode("utf-8"), out)
+        with request_stats(endpoint) as stats:
+            return fetch(endpoint, params, retries, key, cache, inflight, out, stats)
+
+
+def fetch(
+    endpoint: str,
+    params: dict,
+    retries: int,
+    key: str,
+    cache: sqlite3.Connection | None,
+    inflight: Inflight,
+    out: SpooledOutput | None,
+    stats: dict,
+) -> dict | str | None:
+    """Fetch from the API, caching and publishing successful responses."""
     api_key = get_api_key()
     query_string = urllib.parse.urlencode(params)
     url = f"{BASE_URL}/{endpoint}?{query_string}"
-
-    request = urllib.request.Request(url)
-    request.add_header("Authorization", f"Bearer {api_key}")
+    headers = {"Authorization": f"Bearer {api_key}"}
 
     for attempt in range(retries):
+        API.rate_limiter.acquire()
+        # A first attempt that stalls well past the usual latency is retried in full
+        timeout = request_timeout(endpoint, REQUEST_TIMEOUT) if attempt == 0 else REQUEST_TIMEOUT
+        status = None
         try:
-            with urllib.request.urlopen(request, timeout=30) as response:
-                content = response.read().decode("utf-8")
+            with http_stream(
+                "GET", url, headers, timeout=timeout, attempt=attempt, stats=stats,
+                hedge_after=hedge_delay(endpoint),
+            ) as response:
+                API.rate_limiter.observe(response.headers)
+                status = response.status
                 content_type = response.headers.get("Content-Type", "")
+                retry_after = response.headers.get("Retry-After")
 
-                if "application/json" in content_type:
-                    return json.loads(content)
-                return content
-
-        except urllib.error.HTTPError as e:
-            # Handle retryable errors
-            if e.code in (202, 429, 500, 503) and attempt < retries - 1:
-                retry_after = e.headers.get("Retry-After")
-                wait_time = int(retry_after) if retry_after else 2 ** attempt
-                print(f"Retrying in {wait_time}s... (attempt {attempt + 1})", file=sys.stderr)
-                time.sleep(wait_time)
+                if 200 <= status < 300 and status != 202:
+                    cacheable = cache and status == 200
+                    streamed = out is not None and "application/json" not in content_type
+                    # Docs reach the local index whatever their cache or format settings;
+                    # streamed ones are indexed as they arrive instead of as a whole
+                    indexer = (
+                        DocIndexer(params["libraryId"], key)
+                        if endpoint == "context" and streamed
+                        else contextlib.nullcontext()
+                    )
+                    with indexer as index, inflight.writer() as shared:
+                        shared.write(content_type.encode("utf-8") + b"\n")
+                        if not streamed:
+                            data = response.read()
+                            shared.write(data)
+                            content = data.decode("utf-8")
+                        else:
+                            parts = []
+                            for text in iter_text(response):
+                                out.write(text)
+                                shared.write(text.encode("utf-8"))
+                                if index:
+                                    index.feed(text)
+                                if cacheable:
+                                    parts.append(text)
+                            content = "".join(parts)
+                    if cacheable:
+                        cache_put(cache, key, endpoint, content_type, content)
+                    if streamed:
+                        return None
+                    result = decode_body(content, content_type)
+                    if endpoint == "context":
+                        text = result if isinstance(result, str) else json_docs_text(result)
+                        index_docs(params["libraryId"], key, text)
+                    return result
+
+                body = response.read()
+        except TimeoutError:
+            if status is None and attempt < retries - 1:
+                print(f"Timed out after {timeout:.0f}s, retrying...", file=sys.stderr)
                 continue
+            raise ClientError(f"Network error - timed out after {timeout:.0f}s") from None
+        except (http_client.HTTPException, OSError) as e:
+            raise ClientError(f"Network error - {e}") from None
 
-            # Handle redirect
-            if e.code == 301:
-                try:
-                    body = json.loads(e.read().decode("utf-8"))
-                    new_id = body.get("redirectUrl", "")
-                    print(f"Error: Library moved to {new_id}", file=sys.stderr)
-                except Exception:
-                    print("Error: Library redirected. Check response for new ID.", file=sys.stderr)
-                sys.exit(1)
-
-            error_messages = {
-                202: "Library not finalized. Try again later.",
-                400: "Bad request. Check parameters.",
-                401: "Invalid API key. Verify CONTEXT7_API_KEY is correct (should start with ctx7sk).",
-                403: "Access denied.",
-                404: "Library not found. Use 'search' to find the correct library ID.",
-                422: "Library too large or has no code snippets.",
-                429: "Rate limit exceeded. Wait before retrying.",
-                500: "Server error. Try again later.",
-                503: "Service unavailable. Try again later.",
-            }
-            message = error_messages.get(e.code, f"HTTP {e.code}: {e.reason}")
-            print(f"Error: {message}", file=sys.stderr)
-            sys.exit(1)
+        # Handle retryable errors
+        if (
+            (status == 202 or status in RETRY_STATUSES)
+            and attempt < retries - 1
+            and wait_before_retry(status, retry_after, attempt)
+        ):
+            continue
 
-        except urllib.error.URLError as e:
-            print(f"Error: Network error - {e.reason}", file=sys.stderr)
-            sys.exit(1)
+        # Handle redirect
+        if status == 301:
+            try:
+                new_id = json.loads(body).get("redirectUrl", "")
+            except Exception:
+                raise ClientError("Library redirected. Check response for new ID.") from None
+            new_id = "/" + urllib.parse.urlsplit(new_id).path.strip("/")
+            old_id = params.get("libraryId")
+            if old_id and new_id not in ("/", old_id) and attempt < retries - 1:
+                record_redirect(old_id, new_id)
+                print(f"Library {old_id} moved to {new_id}", file=sys.stderr)
+                params = {**params, "libraryId": new_id}
+                url = f"{BASE_URL}/{endpoint}?{urllib.parse.urlencode(params)}"
+                continue
+            raise ClientError(f"Library moved to {new_id}")
 
-    print("Error: Max retries exceeded", file=sys.stderr)
-    sys.exit(1)
+        error_messages = {
+            202: "Library not finalized. Try again later.",
+            400: "Bad request. Check parameters.",
+            401: "Invalid API key. Verify CONTEXT7_API_KEY is correct (should start with ctx7sk).",
+            403: "Access denied.",
+            404: "Library not found. Use 'search' to find the correct library ID.",
+            422: "Library too large or has no code snippets.",
+            429: "Rate limit exceeded. Wait before retrying.",
+            500: "Server error. Try again later.",
+            503: "Service unavailable. Try again later.",
+        }
+        message = error_messages.get(status, f"HTTP {status}: {response.reason}")
+        raise ClientError(message)
+
+    raise ClientError("Max retries exceeded")
 
 
 def search(args: argparse.Namespace) -> None:
     """Search for libraries by name."""
     params = {"libraryName": args.library, "query": args.query}
-    result = make_request("libs/search", params)
-    output = json.dumps(result, indent=2)
+    result = make_request(
+        "libs/search", params, no_cache=args.no_cache, refresh=args.refresh
+    )
+    if isinstance(result, dict):
+        remember_libraries(args.library, result.get("results", []))
+    with span("format"):
+        output = json.dumps(result, indent=2)
     output_response(output, "context7_search")
 
 
+def write_snippets(
+    args: argparse.Namespace, refreshed_at: float, results: list[dict], source: str
+) -> None:
+    """Output ranked snippets from the local index or a bundle."""
+    if args.format == "json":
+        output = json.dumps(
+            {"libraryId": args.library_id, "refreshedAt": refreshed_at, "results": results},
+            indent=2,
+        )
+        output_response(output, "context7_docs")
+    elif not results:
+        print(f"No matching snippets in the {source}.")
+    else:
+        separator = "\n\n" + "-" * 40 + "\n\n"
+        output_response(separator.join(r["content"] for r in results), "context7_docs")
+
+
+def local_docs(args: argparse.Namespace) -> None:
+    """Answer a docs query from the local full-text index."""
+    with span("index", library=args.library_id):
+        refreshed_at, results = search_index(args.library_id, args.query, args.limit)
+    refreshed = time.strftime("%Y-%m-%d %H:%M", time.localtime(refreshed_at))
+    print(f"Local index for {args.library_id}, refreshed {refreshed}", file=sys.stderr)
+    write_snippets(args, refreshed_at, results, "local index")
+
+
+def bundle_docs(args: argparse.Namespace, bundle: DocsBundle) -> None:
+    """Answer a docs query from a bundle: the exact bundled query, else ranked snippets."""
+    built = time.strftime("%Y-%m-%d %H:%M", time.localtime(bundle.created_at))
+    print(f"Bundle {bundle.path} for {args.library_id}, built {built}", file=sys.stderr)
+    if args.format == "txt":
+        with span("bundle", library=args.library_id, exact=True):
+            text = bundle.docs(args.library_id, args.query)
+        if text is not None:
+            output_response(text, "context7_docs")
+            return
+    with span("bundle", library=args.library_id, exact=False):
+        results = bundle.search(args.library_id, args.query, args.limit)
+    write_snippets(args, bundle.created_at, results, "bundle")
+
+
 def docs(args: argparse.Namespace) -> None:
     """Get documentation for a library."""
+    bundle = open_bundle(args.bundle) if args.bundle else None
+    bundled = None
+    if bundle and args.library:
+        bundled = bundle.resolve(args.library)
+    elif bundle:
+        bundled = bundle.library_id(args.library_id)
+    if bundled:
+        args.library_id = bundled
+        bundle_docs(args, bundle)
+        return
+
+    if args.library:
+        args.library_id = resolve_library(
+            args.library, args.query, args.local, args.no_cache, args.refresh
+        )
+    else:
+        args.library_id = current_library_id(args.library_id)
+    if args.local:
+        local_docs(args)
+        return
+
     params = {"libraryId": args.library_id, "query": args.query}
 
     if args.format == "json":
@@ -135,19 +1037,114 @@ def docs(args: argparse.Namespace) -> None:
     else:
         params["type"] = "txt"
 
-    result = make_request("context", params)
+    with SpooledOutput("context7_docs") as out:
+        result = make_request(
+            "context", params, no_cache=args.no_cache, refresh=args.refresh, out=out
+        )
+        if isinstance(result, str):
+            out.write(result)
+        elif result is not None:
+            with span("format"):
+                output = json.dumps(result, indent=2)
+            out.write(output)
 
-    if isinstance(result, str):
-        output_response(result, "context7_docs")
-    else:
-        output = json.dumps(result, indent=2)
-        output_response(output, "context7_docs")
 
+def bundle(args: argparse.Namespace) -> None:
+    """Fetch docs for many libraries concurrently and pack them into one bundle file."""
+    entries = []
+    for path in args.spec or []:
+        entries += read_bundle_spec(path)
+    for path in args.manifest or []:
+        queries = args.query or BUNDLE_QUERIES
+        entries += [(name, q) for name in manifest_libraries(path) for q in queries]
+    entries = list(dict.fromkeys(entries))
+    if not entries:
+        raise ClientError("Nothing to bundle. Pass --spec or --manifest.")
+
+    def resolve_entry(library: str, query: str) -> str:
+        if library.startswith("/"):
+            return current_library_id(library)
+        return resolve_library(library, query, no_cache=args.no_cache)
+
+    def fetch_entry(library_id: str, query: str) -> str:
+        text = make_request(
+            "context",
+            {"libraryId": library_id, "query": query, "type": "txt"},
+            no_cache=args.no_cache,
+            refresh=args.refresh,
+        )
+        if not isinstance(text, str):
+            raise ClientError("Unexpected JSON response")
+        return text
 
-def main() -> None:
+    fetched: dict[str, dict] = {}
+    redirects: dict[str, str] = {}
+    failures = 0
+    with thread_pool(args.concurrency) as pool:
+        # Resolve each library once before fetching its queries
+        first_query = {}
+        for library, query in entries:
+            first_query.setdefault(library, query)
+        resolving = {
+            library: pool.submit(resolve_entry, library, query)
+            for library, query in first_query.items()
+        }
+        futures = {}
+        for library, query in entries:
+            try:
+                library_id = resolving[library].result()
+            except ClientError as e:
+                failures += 1
+                print(f"Error: {library} ({query}): {e}", file=sys.stderr)
+                continue
+            futures[pool.submit(fetch_entry, library_id, query)] = (library, library_id, query)
+        for future in concurrent_futures.as_completed(futures):
+            library, library_id, query = futures[future]
+            try:
+                text = future.result()
+            except ClientError as e:
+                failures += 1
+                print(f"Error: {library} ({query}): {e}", file=sys.stderr)
+                continue
+            # Pick up moves the docs request itself discovered
+            moved = current_library_id(library_id)
+            if moved != library_id:
+                redirects[library_id] = moved
+            entry = fetched.setdefault(moved, {"names": set(), "queries": {}})
+            entry["queries"][query] = text
+            if not library.startswith("/"):
+                entry["names"].add(normalize_library_name(library))
+    if not fetched:
+        raise ClientError("No docs could be fetched")
+
+    with span("write", libraries=len(fetched)):
+        size = write_bundle(args.output, fetched, redirects)
+    print(
+        f"Bundled {len(entries) - failures} docs for {len(fetched)} libraries "
+        f"into {args.output} ({size / 1024:.0f} KB, {failures} failed)"
+    )
+    if failures:
+        raise ClientError(f"{failures} of {len(entries)} docs failed")
+
+
+def build_parser(prog: str | None = None) -> argparse.ArgumentParser:
+    """Build the command-line argument parser."""
     parser = argparse.ArgumentParser(
+        prog=prog,
         description="Context7 API client for library documentation"
     )
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="Write timing spans to FILE ('-' for stderr, *.json for trace viewers); "
+        "defaults to $CCC_TRACE",
+    )
+    parser.add_argument(
+        "--hedge",
+        action="store_true",
+        help="Resend slow read-only requests on a second connection and take the first "
+        "response; defaults to $CCC_HEDGE",
+    )
     subparsers = parser.add_subparsers(dest="command", required=True)
 
     # Search subcommand
@@ -158,12 +1155,24 @@ def main() -> None:
     search_parser.add_argument(
         "--query", "-q", required=True, help="Query for relevance ranking"
     )
+    search_parser.add_argument(
+        "--no-cache", action="store_true", help="Bypass the local response cache"
+    )
+    search_parser.add_argument(
+        "--refresh", action="store_true", help="Fetch fresh results and update the cache"
+    )
     search_parser.set_defaults(func=search)
 
     # Docs subcommand
     docs_parser = subparsers.add_parser("docs", help="Get library documentation")
-    docs_parser.add_argument(
-        "--library-id", "-l", required=True, help="Library ID (e.g., /facebook/react)"
+    library_group = docs_parser.add_mutually_exclusive_group(required=True)
+    library_group.add_argument(
+        "--library-id", "-l", help="Library ID (e.g., /facebook/react)"
+    )
+    library_group.add_argument(
+        "--library",
+        "-n",
+        help="Library name (e.g., react), resolved from past searches when possible",
     )
     docs_parser.add_argument(
         "--query", "-q", required=True, help="Documentation topic or question"
@@ -175,10 +1184,110 @@ def main() -> None:
         default="txt",
         help="Output format (default: txt)",
     )
+    docs_parser.add_argument(
+        "--no-cache", action="store_true", help="Bypass the local response cache"
+    )
+    docs_parser.add_argument(
+        "--refresh", action="store_true", help="Fetch fresh results and update the cache"
+    )
+    docs_parser.add_argument(
+        "--local",
+        action="store_true",
+        help="Search previously fetched docs offline instead of calling the API",
+    )
+    docs_parser.add_argument(
+        "--limit",
+        type=int,
+        default=LOCAL_LIMIT,
+        help=f"Maximum snippets returned with --local or a bundle (default: {LOCAL_LIMIT})",
+    )
+    docs_parser.add_argument(
+        "--bundle",
+        default=BUNDLE_PATH,
+        help="Serve libraries found in this bundle file offline; defaults to $CONTEXT7_BUNDLE",
+    )
     docs_parser.set_defaults(func=docs)
 
-    args = parser.parse_args()
-    args.func(args)
+    # Bundle subcommand
+    bundle_parser = subparsers.add_parser(
+        "bundle", help="Prefetch docs into one file for offline use"
+    )
+    bundle_parser.add_argument(
+        "--output", "-o", required=True, help="Bundle file to write"
+    )
+    bundle_parser.add_argument(
+        "--spec",
+        action="append",
+        help="File of 'LIBRARY QUERY' lines, LIBRARY being an ID or a name ('-' for stdin)",
+    )
+    bundle_parser.add_argument(
+        "--manifest",
+        "-m",
+        action="append",
+        help="Bundle the dependencies of package.json, requirements*.txt, "
+        "pyproject.toml or Cargo.toml",
+    )
+    bundle_parser.add_argument(
+        "--query",
+        "-q",
+        action="append",
+        help="Query fetched for each manifest dependency (repeatable; "
+        "default: getting started and API reference)",
+    )
+    bundle_parser.add_argument(
+        "--concurrency",
+        "-c",
+        type=int,
+        default=BUNDLE_CONCURRENCY,
+        help=f"Maximum concurrent requests (default: {BUNDLE_CONCURRENCY})",
+    )
+    bundle_parser.add_argument(
+        "--no-cache", action="store_true", help="Bypass the local response cache"
+    )
+    bundle_parser.add_argument(
+        "--refresh", action="store_true", help="Fetch fresh docs and update the cache"
+    )
+    bundle_parser.set_defaults(func=bundle)
+
+    # Stats subcommand
+    stats_parser = subparsers.add_parser(
+        "stats", help="Show latency and error statistics from past calls"
+    )
+    stats_parser.add_argument(
+        "--all", action="store_true", help="Include endpoints of the other clients"
+    )
+    stats_parser.add_argument(
+        "--format",
+        "-f",
+        choices=["text", "json"],
+        default="text",
+        help="Output format (default: text)",
+    )
+    stats_parser.add_argument(
+        "--reset", action="store_true", help="Clear the recorded statistics"
+    )
+    stats_parser.set_defaults(func=show_stats)
+
+    return parser
+
+
+def run(args: argparse.Namespace) -> None:
+    """Run a parsed command, tracing it when requested."""
+    run_client(API, args)
+
+
+def main(argv: list[str] | None = None, prog: str | None = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    exit_code = run_in_daemon(CLIENT, argv, DAEMON_ENV)
+    if exit_code is not None:
+        sys.exit(exit_code)
+
+    args = build_parser(prog).parse_args(argv)
+    try:
+        run(args)
+    except ClientError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
 
 
 if __name__ == "__main__":
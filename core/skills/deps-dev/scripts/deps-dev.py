@@ -1,14 +1,43 @@
 #!/usr/bin/env python3
 """deps.dev API client for looking up package versions."""
 
-import argparse
+from __future__ import annotations
+
+import bisect
 import json
+import os
+import re
 import sys
-import urllib.error
+import time
 import urllib.parse
-import urllib.request
 
-BASE_URL = "https://api.deps.dev/v3"
+from ccc_common import (
+    Api, CACHE_DIR, ClientError, Inflight, LazyModule, RETRY_STATUSES, argparse,
+    concurrent_futures, hedge_delay, http_client, http_request, record_stats, request_stats,
+    request_timeout, run_client, run_in_daemon, show_stats, span, thread_pool, wait_before_retry,
+)
+
+
+# Loaded on first use, so --help and daemon-forwarded calls start faster
+hashlib = LazyModule("hashlib")
+sqlite3 = LazyModule("sqlite3")
+
+CLIENT = "deps-dev"
+BASE_URL = os.environ.get("DEPS_DEV_BASE_URL") or "https://api.deps.dev/v3"
+MAX_RETRIES = 3
+REQUEST_TIMEOUT = 30
+
+DAEMON_ENV = ("CCC_HEDGE", "CCC_TRACE", "DEPS_DEV_BASE_URL")
+# Arguments holding file paths, resolved against the caller's directory by the daemon
+PATH_ARGS = ("lockfile", "trace")
+RATE_LIMIT_RATE = 100.0
+RATE_LIMIT_BURST = 200
+# A scan sends two requests per lockfile entry; this budget lets 1,500 entries finish
+# in seconds while 429s and rate-limit headers still hold every process back
+SCAN_RATE_LIMIT_RATE = 500.0
+SCAN_RATE_LIMIT_BURST = 1000
+API = Api(CLIENT, RATE_LIMIT_RATE, RATE_LIMIT_BURST)
+CACHE_PATH = os.path.join(CACHE_DIR, "deps-dev.sqlite3")
 
 SYSTEMS = {
     "npm": "NPM",
@@ -21,29 +50,83 @@ SYSTEMS = {
 }
 
 
-def make_request(path: str) -> dict:
-    """Make request to deps.dev API."""
+def endpoint_name(path: str) -> str:
+    """Name the API endpoint a request path belongs to, for statistics."""
+    parts = path.split("/")
+    if parts[-1].endswith(":dependencies"):
+        return "dependencies"
+    if parts[0] == "advisories":
+        return "advisory"
+    if "versions" in parts:
+        return "version"
+    if "packages" in parts:
+        return "package"
+    return parts[0]
+
+
+def make_request(path: str, fresh: bool = False) -> dict:
+    """Make request to deps.dev API.
+
+    With fresh, a response another process published just before is not reused.
+    """
     url = f"{BASE_URL}/{path}"
+    endpoint = endpoint_name(path)
+    start = time.perf_counter()
 
-    try:
-        with urllib.request.urlopen(url, timeout=30) as response:
-            return json.loads(response.read().decode("utf-8"))
-
-    except urllib.error.HTTPError as e:
-        error_messages = {
-            400: "Bad request. Check package name and system.",
-            404: "Package not found. Check spelling and ecosystem.",
-            429: "Rate limit exceeded. Wait before retrying.",
-            500: "Server error. Try again later.",
-            503: "Service unavailable. Try again later.",
-        }
-        message = error_messages.get(e.code, f"HTTP {e.code}: {e.reason}")
-        print(f"Error: {message}", file=sys.stderr)
-        sys.exit(1)
+    with Inflight(hashlib.sha256(url.encode("utf-8")).hexdigest(), fresh) as inflight:
+        if inflight.result is not None:
+            record_stats(
+                "cache", endpoint, 200, time.perf_counter() - start, len(inflight.result), 0
+            )
+            return json.loads(inflight.result)
+        with request_stats(endpoint) as stats:
+            for attempt in range(MAX_RETRIES):
+                API.rate_limiter.acquire()
+                # A first attempt that stalls well past the usual latency is retried in full
+                timeout = (
+                    request_timeout(endpoint, REQUEST_TIMEOUT)
+                    if attempt == 0
+                    else REQUEST_TIMEOUT
+                )
+                try:
+                    response = http_request(
+                        "GET", url, timeout=timeout, attempt=attempt, stats=stats,
+                        hedge_after=hedge_delay(endpoint),
+                    )
+                except TimeoutError:
+                    if attempt < MAX_RETRIES - 1:
+                        print(f"Timed out after {timeout:.0f}s, retrying...", file=sys.stderr)
+                        continue
+                    raise ClientError(
+                        f"Network error - timed out after {timeout:.0f}s"
+                    ) from None
+                except (http_client.HTTPException, OSError) as e:
+                    raise ClientError(f"Network error - {e}") from None
+                API.rate_limiter.observe(response.headers)
+                if 200 <= response.status < 300:
+                    inflight.publish(response.body)
+                    with span("decode", bytes=len(response.body)):
+                        return json.loads(response.body)
+                if not (
+                    response.status in RETRY_STATUSES
+                    and attempt < MAX_RETRIES - 1
+                    and wait_before_retry(
+                        response.status, response.headers.get("Retry-After"), attempt
+                    )
+                ):
+                    break
 
-    except urllib.error.URLError as e:
-        print(f"Error: Network error - {e.reason}", file=sys.stderr)
-        sys.exit(1)
+    error_messages = {
+        400: "Bad request. Check package name and system.",
+        404: "Package not found. Check spelling and ecosystem.",
+        429: "Rate limit exceeded. Wait before retrying.",
+        500: "Server error. Try again later.",
+        503: "Service unavailable. Try again later.",
+    }
+    message = error_messages.get(
+        response.status, f"HTTP {response.status}: {response.reason}"
+    )
+    raise ClientError(message)
 
 
 def normalize_system(system: str) -> str:
@@ -54,9 +137,9 @@ def normalize_system(system: str) -> str:
     # Already uppercase format
     if system.upper() in SYSTEMS.values():
         return system.upper()
-    print(f"Error: Unknown system '{system}'", file=sys.stderr)
-    print(f"Supported systems: {', '.join(SYSTEMS.keys())}", file=sys.stderr)
-    sys.exit(1)
+    raise ClientError(
+        f"Unknown system '{system}'\nSupported systems: {', '.join(SYSTEMS.keys())}"
+    )
 
 
 def encode_package_name(name: str) -> str:
@@ -64,39 +147,425 @@ def encode_package_name(name: str) -> str:
     return urllib.parse.quote(name, safe="")
 
 
+def find_default_version(package: dict) -> str | None:
+    """Find the default version in a package response."""
+    for version in package.get("versions", []):
+        if version.get("isDefault"):
+            return version.get("versionKey", {}).get("version")
+    return None
+
+
+SEMVER_RE = re.compile(
+    r"^v?(\d+(?:\.\d+){0,3})(?:[-.]?([0-9A-Za-z][0-9A-Za-z.-]*))?(?:\+.*)?$"
+)
+PEP440_RE = re.compile(
+    r"""^v?(?:(\d+)!)?(\d+(?:\.\d+)*)
+    (?:[-_.]?(a|b|c|rc|alpha|beta|pre|preview)[-_.]?(\d+)?)?
+    (?:-(\d+)|[-_.]?(post|rev|r)[-_.]?(\d+)?)?
+    (?:[-_.]?(dev)[-_.]?(\d+)?)?
+    (?:\+[a-z0-9]+(?:[-_.][a-z0-9]+)*)?$""",
+    re.IGNORECASE | re.VERBOSE,
+)
+PEP440_PHASES = {"a": 0, "alpha": 0, "b": 1, "beta": 1}
+MAVEN_QUALIFIERS = {
+    "alpha": 0, "a": 0, "beta": 1, "b": 1, "milestone": 2, "m": 2, "rc": 3, "cr": 3,
+    "snapshot": 4, "": 5, "ga": 5, "final": 5, "release": 5, "sp": 6,
+}
+MAVEN_RELEASE = 5
+RANGE_RE = re.compile(r"(\^|~=|~>|~|>=|<=|>|<|===|==|!=|=)?\s*(v?[0-9A-Za-z*][0-9A-Za-z.*+-]*)")
+# pnpm package keys: /name/1.0.0_peer@2.0.0 (v5), /name@1.0.0(peer@2.0.0) (v6+)
+PNPM_KEY_RE = re.compile(r"((?:@[^/@]+/)?[^/@]+)[/@](\d[^_/@]*)(?:_.*)?")
+REQUIREMENT_CONTINUATION_RE = re.compile(r"\\\r?\n")
+REQUIREMENT_OPTION_RE = re.compile(r"\s--?[A-Za-z]")
+MAVEN_RANGE_RE = re.compile(r"^([\[(])\s*([^,]*?)\s*,\s*([^,]*?)\s*([\])])$")
+INDEX_TTL = 3600
+# Advisories are shared by many versions and rarely change once published
+ADVISORY_TTL = 7 * 24 * 3600
+# CVSS v3 qualitative ratings, as (lowest score, rating)
+CVSS_SEVERITIES = ((9.0, "CRITICAL"), (7.0, "HIGH"), (4.0, "MEDIUM"), (0.1, "LOW"), (0.0, "NONE"))
+
+
+def semver_key(version: str) -> tuple[tuple, bool]:
+    """Sort key for semver-style versions (npm, Cargo, Go, NuGet, RubyGems)."""
+    m = SEMVER_RE.match(version.strip())
+    if not m:
+        return ((-1,), version), False
+    release = tuple(int(p) for p in m[1].split("."))
+    release += (0,) * (4 - len(release))
+    if m[2] is None:
+        return (release, (1,)), False
+    # Numeric identifiers sort before alphanumeric ones, and any prerelease before the release
+    identifiers = tuple(
+        (0, int(p), "") if p.isdigit() else (1, 0, p) for p in m[2].split(".")
+    )
+    return (release, (0, identifiers)), True
+
+
+def pep440_key(version: str) -> tuple[tuple, bool]:
+    """Sort key for PEP 440 versions (PyPI)."""
+    m = PEP440_RE.match(version.strip())
+    if not m:
+        return (-1, version), False
+    release = tuple(int(p) for p in m[2].split("."))
+    while len(release) > 1 and release[-1] == 0:
+        release = release[:-1]
+    has_post = m[5] is not None or m[6] is not None
+    if m[3]:
+        pre = (0, PEP440_PHASES.get(m[3].lower(), 2), int(m[4] or 0))
+    elif m[8] and not has_post:
+        pre = (-1,)  # 1.0.dev1 sorts before 1.0a1
+    else:
+        pre = (1,)
+    post = (1, int(m[5] or m[7] or 0)) if has_post else (0,)
+    dev = (0, int(m[9] or 0)) if m[8] else (1,)
+    return (int(m[1] or 0), release, pre, post, dev), bool(m[3] or m[8])
+
+
+def maven_key(version: str) -> tuple[tuple, bool]:
+    """Sort key approximating Maven's ComparableVersion."""
+    items = []
+    for part in version.lower().split("-"):
+        part_items = []
+        for token in re.findall(r"\d+|[a-z]+", part):
+            if token.isdigit():
+                part_items.append((1, int(token), ""))
+            else:
+                part_items.append((0, MAVEN_QUALIFIERS.get(token, MAVEN_RELEASE + 2), token))
+        # Trailing zeros and release qualifiers in each part do not change the version
+        while part_items and part_items[-1][:2] in ((1, 0), (0, MAVEN_RELEASE)):
+            part_items.pop()
+        items += part_items
+    prerelease = any(kind == 0 and rank < MAVEN_RELEASE for kind, rank, _ in items)
+    return tuple(items) + ((0, MAVEN_RELEASE, ""),), prerelease
+
+
+def version_key(system: str, version: str) -> tuple[tuple, bool]:
+    """Return an ecosystem-aware (sort key, is prerelease) for a version."""
+    if system == "PYPI":
+        return pep440_key(version)
+    if system == "MAVEN":
+        return maven_key(version)
+    return semver_key(version)
+
+
+def _tighten(group: dict, key: tuple, inclusive: bool, lower: bool) -> None:
+    """Narrow a range group's lower or upper bound."""
+    bound = "lo" if lower else "hi"
+    current = group[bound]
+    if (
+        current is None
+        or (key > current if lower else key < current)
+        or (key == current and not inclusive)
+    ):
+        group[bound], group[f"{bound}_incl"] = key, inclusive
+
+
+def _bump(numbers: list[int], index: int) -> str:
+    """Return the version string with numbers[index] incremented and the rest dropped."""
+    return ".".join(str(n) for n in numbers[:index] + [numbers[index] + 1])
+
+
+def apply_comparator(system: str, group: dict, op: str, version: str) -> None:
+    """Apply one comparator (e.g. ^1.2, >=2, ==1.4.*) to a range group."""
+    m = re.match(r"^v?((?:\d+|[xX*])(?:\.(?:\d+|[xX*]))*)(.*)$", version)
+    if not m:
+        raise ClientError(f"Invalid version in range: '{version}'")
+    segments = m[1].split(".")
+    numbers = []
+    for segment in segments:
+        if not segment.isdigit():
+            break
+        numbers.append(int(segment))
+    wildcard = len(numbers) < len(segments)
+    if m[2].lstrip("-.+"):
+        group["pre"] = group["pre"] or version_key(system, version)[1]
+    key = version_key(system, version)[0]
+    low = version_key(system, ".".join(map(str, numbers)) or "0")[0]
+
+    if not numbers:
+        return
+    if op in ("", "=", "==") and (wildcard or (len(numbers) < 3 and system != "PYPI")):
+        if op == "" and system == "CARGO" and not wildcard:
+            op = "^"
+        else:
+            _tighten(group, low, True, lower=True)
+            _tighten(group, version_key(system, _bump(numbers, len(numbers) - 1))[0], False, lower=False)
+            return
+    if op == "" and system == "CARGO":
+        op = "^"
+
+    if op in ("", "=", "==", "==="):
+        _tighten(group, key, True, lower=True)
+        _tighten(group, key, True, lower=False)
+    elif op == "!=":
+        group["exclude"].add(key)
+    elif op in (">=", ">"):
+        _tighten(group, key, op == ">=", lower=True)
+    elif op in ("<=", "<"):
+        _tighten(group, key, op == "<=", lower=False)
+    else:
+        if op == "^":
+            nonzero = [i for i, n in enumerate(numbers) if n]
+            index = nonzero[0] if nonzero else len(numbers) - 1
+        elif op == "~":
+            index = 1 if len(numbers) >= 2 else 0
+        else:  # ~= and ~> allow changes in the last given component only
+            index = max(len(numbers) - 2, 0)
+        _tighten(group, key, True, lower=True)
+        _tighten(group, version_key(system, _bump(numbers, index))[0], False, lower=False)
+
+
+def parse_range(system: str, spec: str) -> list[dict]:
+    """Parse a version range into groups of bounds; a version must match any group.
+
+    Supports npm/Cargo (^, ~, x-ranges, hyphen ranges, ||), PEP 440 (~=, ==1.2.*,
+    !=), RubyGems (~>) and Maven ([1.0,2.0)) syntax.
+    """
+    groups = []
+    for alternative in spec.split("||"):
+        group = {
+            "lo": None, "lo_incl": True, "hi": None, "hi_incl": False,
+            "exclude": set(), "pre": False,
+        }
+        alternative = alternative.strip()
+        maven = MAVEN_RANGE_RE.match(alternative)
+        if maven:
+            if maven[2]:
+                _tighten(group, version_key(system, maven[2])[0], maven[1] == "[", lower=True)
+            if maven[3]:
+                _tighten(group, version_key(system, maven[3])[0], maven[4] == "]", lower=False)
+            groups.append(group)
+            continue
+
+        alternative = re.sub(r"(\S+)\s+-\s+(\S+)", r">=\1 <=\2", alternative)
+        for op, version in RANGE_RE.findall(alternative.replace(",", " ")):
+            apply_comparator(system, group, op, version)
+        groups.append(group)
+    return groups
+
+
+def resolve_range(system: str, index: dict, spec: str) -> str | None:
+    """Find the highest indexed version satisfying a range, using bisection."""
+    keys = index["keys"]
+    best = None
+    for group in parse_range(system, spec):
+        lo = 0
+        if group["lo"] is not None:
+            lo = (bisect.bisect_left if group["lo_incl"] else bisect.bisect_right)(
+                keys, group["lo"]
+            )
+        hi = len(keys)
+        if group["hi"] is not None:
+            hi = (bisect.bisect_right if group["hi_incl"] else bisect.bisect_left)(
+                keys, group["hi"]
+            )
+        for i in range(hi - 1, lo - 1, -1):
+            if keys[i] in group["exclude"] or (index["prerelease"][i] and not group["pre"]):
+                continue
+            if best is None or i > best:
+                best = i
+            break
+    return None if best is None else index["versions"][best]
+
+
+def open_cache() -> sqlite3.Connection | None:
+    """Open the version index cache, or None if it is unavailable."""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        conn = sqlite3.connect(CACHE_PATH, timeout=5)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS version_index ("
+            " system TEXT NOT NULL, name TEXT NOT NULL, data TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL, PRIMARY KEY (system, name))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS version_advisories ("
+            " system TEXT NOT NULL, name TEXT NOT NULL, version TEXT NOT NULL,"
+            " advisories TEXT NOT NULL, fetched_at REAL NOT NULL,"
+            " PRIMARY KEY (system, name, version))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS advisories ("
+            " id TEXT PRIMARY KEY, data TEXT NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        return conn
+    except (OSError, sqlite3.Error):
+        return None
+
+
+def get_version_index(system: str, name: str, refresh: bool = False) -> dict:
+    """Return the package's versions sorted in ecosystem order, cached on disk."""
+    start = time.perf_counter()
+    index = None
+    cache = open_cache()
+    if cache and not refresh:
+        try:
+            row = cache.execute(
+                "SELECT data FROM version_index"
+                " WHERE system = ? AND name = ? AND fetched_at > ?",
+                (system, name, time.time() - INDEX_TTL),
+            ).fetchone()
+        except sqlite3.Error:
+            row = None
+        if row:
+            index = json.loads(row[0])
+            record_stats("cache", "package", 200, time.perf_counter() - start, len(row[0]), 0)
+
+    if index is None:
+        package = make_request(
+            f"systems/{system}/packages/{encode_package_name(name)}", refresh
+        )
+        versions = [
+            v["versionKey"]["version"]
+            for v in package.get("versions", [])
+            if v.get("versionKey", {}).get("version")
+        ]
+        # Each version is parsed once, for sorting and for the keys returned below
+        parsed = sorted(
+            ((version_key(system, v), v) for v in versions), key=lambda pair: pair[0][0]
+        )
+        index = {
+            "name": package.get("packageKey", {}).get("name", name),
+            "default": find_default_version(package),
+            "versions": [v for _, v in parsed],
+        }
+        if cache:
+            try:
+                with cache:
+                    cache.execute(
+                        "INSERT OR REPLACE INTO version_index VALUES (?, ?, ?, ?)",
+                        (system, name, json.dumps(index), time.time()),
+                    )
+            except sqlite3.Error:
+                pass
+    else:
+        parsed = [(version_key(system, v), v) for v in index["versions"]]
+    index["keys"] = [key for (key, _), _ in parsed]
+    index["prerelease"] = [prerelease for (_, prerelease), _ in parsed]
+    return index
+
+
+def summarize_advisory(data: dict) -> dict:
+    """Reduce an advisory response to its ID, title, aliases, CVSS and severity."""
+    score = data.get("cvss3Score")
+    severity = None
+    if isinstance(score, (int, float)):
+        severity = next(rating for low, rating in CVSS_SEVERITIES if score >= low)
+    return {
+        "id": data.get("advisoryKey", {}).get("id", ""),
+        "title": data.get("title", ""),
+        "url": data.get("url", ""),
+        "aliases": data.get("aliases", []),
+        "severity": severity,
+        "cvss3Score": score,
+        "cvss3Vector": data.get("cvss3Vector", ""),
+    }
+
+
+def get_advisories(ids, concurrency: int = 32, refresh: bool = False) -> dict[str, dict | str]:
+    """Return advisory details, or the lookup error, for each distinct ID.
+
+    Details live in the cache for ADVISORY_TTL keyed by advisory ID, so an
+    advisory shared by many versions is fetched once. The rest are fetched
+    concurrently.
+    """
+    ids = list(dict.fromkeys(ids))
+    known: dict[str, dict | str] = {}
+    cache = open_cache()
+    if cache and not refresh:
+        start = time.perf_counter()
+        try:
+            for advisory_id in ids:
+                row = cache.execute(
+                    "SELECT data FROM advisories WHERE id = ? AND fetched_at > ?",
+                    (advisory_id, time.time() - ADVISORY_TTL),
+                ).fetchone()
+                if row:
+                    known[advisory_id] = summarize_advisory(json.loads(row[0]))
+                    record_stats(
+                        "cache", "advisory", 200, time.perf_counter() - start, len(row[0]), 0
+                    )
+                    start = time.perf_counter()
+        except sqlite3.Error:
+            pass
+
+    fetched = []
+    missing = [advisory_id for advisory_id in ids if advisory_id not in known]
+    if missing:
+        with thread_pool(concurrency) as pool:
+            futures = {}
+            for advisory_id in missing:
+                path = f"advisories/{encode_package_name(advisory_id)}"
+                futures[pool.submit(make_request, path, refresh)] = advisory_id
+            for future in concurrent_futures.as_completed(futures):
+                advisory_id = futures[future]
+                try:
+                    data = future.result()
+                except ClientError as e:
+                    known[advisory_id] = str(e)
+                    continue
+                known[advisory_id] = summarize_advisory(data)
+                fetched.append((advisory_id, json.dumps(data), time.time()))
+    if cache and fetched:
+        try:
+            with cache:
+                cache.executemany("INSERT OR REPLACE INTO advisories VALUES (?, ?, ?)", fetched)
+        except sqlite3.Error:
+            pass
+    return {advisory_id: known[advisory_id] for advisory_id in ids}
+
+
+def format_advisory(advisory_id: str, details: dict | str) -> str:
+    """Describe one advisory on a line: ID, severity, title and aliases."""
+    if isinstance(details, str):
+        return f"{advisory_id}: lookup failed - {details}"
+    rating = details["severity"] or "UNRATED"
+    if details["cvss3Score"] is not None:
+        rating += f" {details['cvss3Score']}"
+    line = f"{advisory_id} [{rating}] {details['title']}".rstrip()
+    aliases = [a for a in details["aliases"] if a != advisory_id]
+    if aliases:
+        line += f" ({', '.join(aliases)})"
+    return line
+
+
 def get_package(args: argparse.Namespace) -> None:
     """Get package info including all versions."""
     system = normalize_system(args.system)
-    encoded_name = encode_package_name(args.package)
-    path = f"systems/{system}/packages/{encoded_name}"
 
-    result = make_request(path)
+    if args.format == "json" and not args.satisfies:
+        encoded_name = encode_package_name(args.package)
+        result = make_request(f"systems/{system}/packages/{encoded_name}", args.refresh)
+        print(json.dumps(result, indent=2))
+        return
 
-    # Find default version
-    default_version = None
-    for version in result.get("versions", []):
-        if version.get("isDefault"):
-            default_version = version.get("versionKey", {}).get("version")
-            break
+    with span("index", package=args.package):
+        index = get_version_index(system, args.package, refresh=args.refresh)
+    name = index["name"]
+    match = None
+    if args.satisfies:
+        match = resolve_range(system, index, args.satisfies)
+        if match is None:
+            raise ClientError(f"No version of {name} satisfies '{args.satisfies}'")
+        if args.format == "json":
+            result = {"package": name, "system": system, "range": args.satisfies, "version": match}
+            print(json.dumps(result, indent=2))
+            return
 
-    if args.format == "json":
-        print(json.dumps(result, indent=2))
+    print(f"Package: {name}")
+    print(f"System: {system}")
+    if index["default"]:
+        print(f"Latest: {index['default']}")
     else:
-        name = result.get("packageKey", {}).get("name", args.package)
-        print(f"Package: {name}")
-        print(f"System: {system}")
-        if default_version:
-            print(f"Latest: {default_version}")
-        else:
-            print("Latest: (no default version found)")
+        print("Latest: (no default version found)")
+    if match:
+        print(f"Satisfies {args.satisfies}: {match}")
 
-        if args.all_versions:
-            print("\nVersions:")
-            for v in result.get("versions", [])[-10:]:
-                vk = v.get("versionKey", {})
-                version = vk.get("version", "unknown")
-                is_default = " (default)" if v.get("isDefault") else ""
-                print(f"  {version}{is_default}")
+    if args.all_versions:
+        print("\nVersions:")
+        for version in index["versions"][-10:]:
+            is_default = " (default)" if version == index["default"] else ""
+            print(f"  {version}{is_default}")
 
 
 def get_version(args: argparse.Namespace) -> None:
@@ -107,10 +576,20 @@ def get_version(args: argparse.Namespace) -> None:
     path = f"systems/{system}/packages/{encoded_name}/versions/{encoded_version}"
 
     result = make_request(path)
+    advisory_ids = [a["id"] for a in result.get("advisoryKeys", [])]
+    details = get_advisories(advisory_ids) if args.advisories and advisory_ids else {}
 
     if args.format == "json":
-        print(json.dumps(result, indent=2))
-    else:
+        if args.advisories:
+            result["advisories"] = [
+                {"id": advisory_id, "error": d} if isinstance(d, str) else d
+                for advisory_id, d in details.items()
+            ]
+        with span("write"):
+            print(json.dumps(result, indent=2))
+        return
+
+    with span("write"):
         vk = result.get("versionKey", {})
         print(f"Package: {vk.get('name', args.package)}")
         print(f"Version: {vk.get('version', args.version)}")
@@ -122,15 +601,507 @@ def get_version(args: argparse.Namespace) -> None:
         if licenses:
             print(f"Licenses: {', '.join(licenses)}")
 
-        advisories = result.get("advisoryKeys", [])
+        if advisory_ids:
+            print(f"Advisories: {len(advisory_ids)} security advisory(ies)")
+        for advisory_id, d in details.items():
+            print(f"  {format_advisory(advisory_id, d)}")
+
+
+def parse_package_lock(text: str) -> list[tuple[str, str]]:
+    """Parse (name, version) pairs from package-lock.json."""
+    lock = json.loads(text)
+    entries = []
+    # lockfileVersion 2 and 3
+    for path, info in lock.get("packages", {}).items():
+        if "node_modules/" in path and info.get("version") and not info.get("link"):
+            entries.append((path.rsplit("node_modules/", 1)[1], info["version"]))
+    if entries:
+        return entries
+
+    # lockfileVersion 1 nests dependencies recursively
+    pending = [lock.get("dependencies", {})]
+    while pending:
+        for name, info in pending.pop().items():
+            if info.get("version"):
+                entries.append((name, info["version"]))
+            pending.append(info.get("dependencies", {}))
+    return entries
+
+
+def parse_pnpm_lock(text: str) -> list[tuple[str, str]]:
+    """Parse (name, version) pairs from the packages section of pnpm-lock.yaml."""
+    entries = []
+    in_packages = False
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        if not line.startswith(" "):
+            in_packages = line.rstrip() == "packages:"
+            continue
+        if not in_packages or line.startswith("   ") or not line.rstrip().endswith(":"):
+            continue
+        # Keys look like /name/1.0.0 (v5), /name@1.0.0(peer) (v6) or name@1.0.0 (v9)
+        key = line.strip().rstrip(":").strip("'\"").lstrip("/")
+        match = PNPM_KEY_RE.fullmatch(key.split("(", 1)[0])
+        if match:
+            entries.append((match[1], match[2]))
+    return entries
+
+
+def parse_toml_lock(text: str, require_source: bool = False) -> list[tuple[str, str]]:
+    """Parse (name, version) pairs from [[package]] tables in poetry.lock or Cargo.lock."""
+    try:
+        import tomllib
+    except ImportError:
+        raise ClientError("Parsing TOML lockfiles requires Python 3.11+") from None
+    return [
+        (pkg["name"], pkg["version"])
+        for pkg in tomllib.loads(text).get("package", [])
+        if "name" in pkg and "version" in pkg
+        # Cargo workspace members have no source and are not published
+        and (pkg.get("source") or not require_source)
+    ]
+
+
+def parse_requirements(text: str) -> list[tuple[str, str]]:
+    """Parse pinned name==version pairs from requirements.txt.
+
+    Continued lines are joined, and markers, comments and per-requirement options
+    such as pip-compile's --hash are dropped.
+    """
+    entries = []
+    for line in REQUIREMENT_CONTINUATION_RE.sub(" ", text).splitlines():
+        line = line.split("#", 1)[0].split(";", 1)[0]
+        line = REQUIREMENT_OPTION_RE.split(line, 1)[0].strip()
+        if "==" in line and not line.startswith("-"):
+            name, version = line.split("==", 1)
+            entries.append((name.split("[", 1)[0].strip(), version.strip()))
+    return entries
+
+
+def parse_go_sum(text: str) -> list[tuple[str, str]]:
+    """Parse (module, version) pairs from go.sum.
+
+    Only module zip hashes count. Lines for a version's /go.mod alone record the
+    module graph, not code that is built.
+    """
+    entries = []
+    for line in text.splitlines():
+        fields = line.split()
+        if len(fields) == 3 and not fields[1].endswith("/go.mod"):
+            entries.append((fields[0], fields[1]))
+    return list(dict.fromkeys(entries))
+
+
+LOCKFILES = {
+    "package-lock.json": ("NPM", parse_package_lock),
+    "pnpm-lock.yaml": ("NPM", parse_pnpm_lock),
+    "poetry.lock": ("PYPI", parse_toml_lock),
+    "Cargo.lock": ("CARGO", lambda text: parse_toml_lock(text, require_source=True)),
+    "go.sum": ("GO", parse_go_sum),
+}
+
+
+def read_lockfile(path: str) -> list[tuple[str, str, str]]:
+    """Read (system, name, version) entries from a supported lockfile."""
+    filename = os.path.basename(path)
+    if filename in LOCKFILES:
+        system, parser = LOCKFILES[filename]
+    elif filename.startswith("requirements") and filename.endswith(".txt"):
+        system, parser = "PYPI", parse_requirements
+    else:
+        raise ClientError(
+            f"Unsupported lockfile '{filename}'\n"
+            f"Supported files: {', '.join(LOCKFILES)}, requirements*.txt"
+        )
+    try:
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+    except OSError as e:
+        raise ClientError(f"Cannot read {path}: {e.strerror}") from None
+    try:
+        return [(system, name, version) for name, version in parser(text)]
+    except ValueError as e:
+        raise ClientError(f"Cannot parse {path}: {e}") from None
+
+
+def scan_row(entry: tuple[str, str, str], index, version) -> dict:
+    """Combine package and version lookups for one lockfile entry."""
+    system, name, installed = entry
+    row = {"system": system, "name": name, "installed": installed}
+    try:
+        row["default"] = index.result()["default"]
+        advisory_ids = [a["id"] for a in version.result().get("advisoryKeys", [])]
+        row["advisories"] = len(advisory_ids)
+        if advisory_ids:
+            row["advisory_ids"] = advisory_ids
+        row["outdated"] = bool(row["default"]) and (
+            version_key(system, installed)[0] < version_key(system, row["default"])[0]
+        )
+    except ClientError as e:
+        row["error"] = str(e)
+    return row
+
+
+def print_table(headers: list[str], rows: list[list[str]]) -> None:
+    """Print rows as an aligned text table."""
+    widths = [max(len(str(cell)) for cell in column) for column in zip(headers, *rows)]
+    for cells in [headers, *rows]:
+        print("  ".join(str(c).ljust(w) for c, w in zip(cells, widths)).rstrip())
+
+
+def scan(args: argparse.Namespace) -> None:
+    """Check every package in lockfiles for newer versions and advisories."""
+    entries = sorted({entry for path in args.lockfile for entry in read_lockfile(path)})
+    packages = sorted({(system, name) for system, name, _ in entries})
+
+    bulk = API.rate_limiter.bulk(SCAN_RATE_LIMIT_RATE, SCAN_RATE_LIMIT_BURST)
+    with bulk, thread_pool(args.concurrency) as pool:
+        index_futures = {
+            key: pool.submit(get_version_index, *key, args.refresh) for key in packages
+        }
+        version_futures = {
+            entry: pool.submit(
+                make_request,
+                f"systems/{entry[0]}/packages/{encode_package_name(entry[1])}"
+                f"/versions/{encode_package_name(entry[2])}",
+                args.refresh,
+            )
+            for entry in entries
+        }
+        rows = [
+            scan_row(entry, index_futures[entry[:2]], version_futures[entry])
+            for entry in entries
+        ]
+
+    if args.outdated:
+        rows = [r for r in rows if r.get("outdated") or r.get("advisories") or "error" in r]
+
+    details = {}
+    if args.advisories:
+        with API.rate_limiter.bulk(SCAN_RATE_LIMIT_RATE, SCAN_RATE_LIMIT_BURST):
+            details = get_advisories(
+                (advisory_id for r in rows for advisory_id in r.get("advisory_ids", [])),
+                args.concurrency,
+                args.refresh,
+            )
+
+    if args.format == "json":
+        if args.advisories:
+            for r in rows:
+                if "advisory_ids" in r:
+                    r["advisory_details"] = [
+                        {"id": advisory_id, "error": details[advisory_id]}
+                        if isinstance(details[advisory_id], str)
+                        else details[advisory_id]
+                        for advisory_id in r["advisory_ids"]
+                    ]
+        with span("write"):
+            print(json.dumps(rows, indent=2))
+        return
+
+    with span("format"):
+        table = [
+            [
+                r["name"],
+                r["installed"],
+                r.get("default") or "-",
+                r.get("advisories", "-"),
+                "error" if "error" in r else "outdated" if r["outdated"] else "current",
+            ]
+            for r in rows
+        ]
+    if table:
+        with span("write", rows=len(table)):
+            print_table(["Package", "Installed", "Default", "Advisories", "Status"], table)
+    outdated = sum(1 for r in rows if r.get("outdated"))
+    vulnerable = sum(1 for r in rows if r.get("advisories"))
+    errors = [r for r in rows if "error" in r]
+    print(
+        f"\nScanned {len(entries)} packages: {outdated} outdated, "
+        f"{vulnerable} with advisories, {len(errors)} errors"
+    )
+    if details:
+        print(f"\nAdvisories ({len(details)}):")
+        for advisory_id, d in details.items():
+            affected = [
+                f"{r['name']}@{r['installed']}" for r in rows
+                if advisory_id in r.get("advisory_ids", [])
+            ]
+            print(f"  {format_advisory(advisory_id, d)}")
+            print(f"    affects {', '.join(affected)}")
+    for r in errors:
+        print(f"  {r['name']}@{r['installed']}: {r['error']}", file=sys.stderr)
+
+
+def dependencies_path(system: str, name: str, version: str) -> str:
+    return (
+        f"systems/{system}/packages/{encode_package_name(name)}"
+        f"/versions/{encode_package_name(version)}:dependencies"
+    )
+
+
+def node_depths(count: int, edges: list[dict], root: int) -> list[int | None]:
+    """Breadth-first distance of every node from root; None when unreachable."""
+    children: list[list[int]] = [[] for _ in range(count)]
+    for edge in edges:
+        children[edge["fromNode"]].append(edge["toNode"])
+    depths: list[int | None] = [None] * count
+    depths[root] = 0
+    frontier = [root]
+    while frontier:
+        following = []
+        for node in frontier:
+            for child in children[node]:
+                if depths[child] is None:
+                    depths[child] = depths[node] + 1
+                    following.append(child)
+        frontier = following
+    return depths
+
+
+def lookup_advisories(nodes: list[dict], concurrency: int) -> None:
+    """Set each node's advisory IDs, or its lookup error.
+
+    Each distinct (system, name, version) is looked up once, from the cache when
+    it was fetched within INDEX_TTL and otherwise concurrently from the API.
+    """
+    keys = list(dict.fromkeys((n["system"], n["name"], n["version"]) for n in nodes))
+    known: dict[tuple, list | str] = {}
+    cache = open_cache()
+    if cache:
+        try:
+            for key in keys:
+                row = cache.execute(
+                    "SELECT advisories FROM version_advisories"
+                    " WHERE system = ? AND name = ? AND version = ? AND fetched_at > ?",
+                    (*key, time.time() - INDEX_TTL),
+                ).fetchone()
+                if row:
+                    known[key] = json.loads(row[0])
+        except sqlite3.Error:
+            pass
+
+    fetched = []
+    missing = [key for key in keys if key not in known]
+    with thread_pool(concurrency) as pool:
+        futures = {
+            pool.submit(
+                make_request,
+                f"systems/{key[0]}/packages/{encode_package_name(key[1])}"
+                f"/versions/{encode_package_name(key[2])}",
+            ): key
+            for key in missing
+        }
+        for future in concurrent_futures.as_completed(futures):
+            key = futures[future]
+            try:
+                known[key] = [a["id"] for a in future.result().get("advisoryKeys", [])]
+                fetched.append((*key, json.dumps(known[key]), time.time()))
+            except ClientError as e:
+                known[key] = str(e)
+    if cache and fetched:
+        try:
+            with cache:
+                cache.executemany(
+                    "INSERT OR REPLACE INTO version_advisories VALUES (?, ?, ?, ?, ?)", fetched
+                )
+        except sqlite3.Error:
+            pass
+
+    for node in nodes:
+        result = known[(node["system"], node["name"], node["version"])]
+        if isinstance(result, str):
+            node["error"] = result
+        else:
+            node["advisories"] = result
+
+
+def build_graph(system: str, name: str, version: str, args: argparse.Namespace) -> dict:
+    """Resolve the transitive dependency graph of one version.
+
+    deps.dev resolves the whole graph server-side in one request. Nodes within
+    the depth limit are then expanded with their advisories.
+    """
+    resolved = make_request(dependencies_path(system, name, version))
+    if resolved.get("error"):
+        raise ClientError(f"Cannot resolve dependencies - {resolved['error']}")
+    raw_nodes = resolved.get("nodes", [])
+    if not raw_nodes:
+        raise ClientError(f"No dependency data for {name}@{version}")
+    raw_edges = resolved.get("edges", [])
+    root = next((i for i, n in enumerate(raw_nodes) if n.get("relation") == "SELF"), 0)
+
+    with span("walk", nodes=len(raw_nodes)):
+        depths = node_depths(len(raw_nodes), raw_edges, root)
+    keep = [
+        i for i, depth in enumerate(depths)
+        if depth is not None and (args.depth is None or depth <= args.depth)
+    ]
+    ids = {old: new for new, old in enumerate(keep)}
+    nodes = []
+    for i in keep:
+        key = raw_nodes[i].get("versionKey", {})
+        nodes.append({
+            "id": ids[i],
+            "system": key.get("system", system),
+            "name": key.get("name", ""),
+            "version": key.get("version", ""),
+            "relation": raw_nodes[i].get("relation", ""),
+            "depth": depths[i],
+        })
+        if raw_nodes[i].get("bundled"):
+            nodes[-1]["bundled"] = True
+    edges = [
+        {
+            "from": ids[e["fromNode"]],
+            "to": ids[e["toNode"]],
+            "requirement": e.get("requirement", ""),
+        }
+        for e in raw_edges
+        if e["fromNode"] in ids and e["toNode"] in ids
+    ]
+
+    if args.advisories:
+        lookup_advisories(nodes, args.concurrency)
+
+    versions: dict[str, set] = {}
+    for node in nodes:
+        versions.setdefault(node["name"], set()).add(node["version"])
+    duplicates = {
+        n: sorted(v, key=lambda version: version_key(system, version)[0])
+        for n, v in sorted(versions.items())
+        if len(v) > 1
+    }
+    summary = {
+        "nodes": len(nodes),
+        "edges": len(edges),
+        "direct": sum(1 for node in nodes if node["depth"] == 1),
+        "max_depth": max(node["depth"] for node in nodes),
+        "duplicates": duplicates,
+        "errors": sum(1 for node in nodes if "error" in node),
+    }
+    result = {
+        "system": system,
+        "package": name,
+        "version": version,
+        "summary": summary,
+        "nodes": nodes,
+        "edges": edges,
+    }
+    if args.advisories:
+        summary["affected"] = [
+            f"{node['name']}@{node['version']}" for node in nodes if node.get("advisories")
+        ]
+        details = get_advisories(
+            (advisory_id for node in nodes for advisory_id in node.get("advisories", [])),
+            args.concurrency,
+        )
+        result["advisories"] = {
+            advisory_id: {"id": advisory_id, "error": d} if isinstance(d, str) else d
+            for advisory_id, d in details.items()
+        }
+    return result
+
+
+def format_dot(graph: dict) -> str:
+    """Render a graph in Graphviz DOT, marking advisory-affected nodes in red."""
+
+    def quote(text: str) -> str:
+        return '"' + text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+
+    lines = [
+        f"digraph {quote(graph['package'] + '@' + graph['version'])} {{",
+        "  node [shape=box, fontname=Helvetica];",
+    ]
+    for node in graph["nodes"]:
+        label = f"{node['name']}\n{node['version']}"
+        attrs = f"label={quote(label)}"
+        if node.get("advisories"):
+            attrs += ", color=red, fontcolor=red"
+        elif node["relation"] == "SELF":
+            attrs += ", style=bold"
+        lines.append(f"  n{node['id']} [{attrs}];")
+    for edge in graph["edges"]:
+        label = f" [label={quote(edge['requirement'])}]" if edge["requirement"] else ""
+        lines.append(f"  n{edge['from']} -> n{edge['to']}{label};")
+    lines.append("}")
+    return "\n".join(lines)
+
+
+def format_graph_summary(graph: dict) -> str:
+    """Describe a graph's size, duplicate versions and advisory-affected nodes."""
+    summary = graph["summary"]
+    lines = [
+        f"Dependency graph of {graph['package']}@{graph['version']} ({graph['system']})",
+        f"Nodes: {summary['nodes']} ({summary['direct']} direct, max depth {summary['max_depth']})",
+        f"Edges: {summary['edges']}",
+    ]
+    duplicates = summary["duplicates"]
+    lines.append(f"Duplicate versions: {len(duplicates)}")
+    lines += [f"  {name}: {', '.join(versions)}" for name, versions in duplicates.items()]
+    if "affected" in summary:
+        lines.append(f"Advisory-affected nodes: {len(summary['affected'])}")
+        for node in graph["nodes"]:
+            if node.get("advisories"):
+                lines.append(
+                    f"  {node['name']}@{node['version']}: {', '.join(node['advisories'])}"
+                )
+        advisories = graph.get("advisories", {})
         if advisories:
-            print(f"Advisories: {len(advisories)} security advisory(ies)")
+            lines.append(f"Advisories: {len(advisories)}")
+            lines += [
+                "  " + format_advisory(advisory_id, d.get("error", d))
+                for advisory_id, d in advisories.items()
+            ]
+    if summary["errors"]:
+        lines.append(f"Lookup errors: {summary['errors']}")
+    return "\n".join(lines)
+
+
+def graph(args: argparse.Namespace) -> None:
+    """Resolve and report a version's transitive dependency graph."""
+    system = normalize_system(args.system)
+    version = args.version
+    if not version:
+        with span("index", package=args.package):
+            version = get_version_index(system, args.package)["default"]
+        if not version:
+            raise ClientError(f"No default version of {args.package}, pass --version")
+
+    result = build_graph(system, args.package, version, args)
+
+    with span("format"):
+        if args.format == "json":
+            output = json.dumps(result, indent=2)
+        elif args.format == "dot":
+            output = format_dot(result)
+        else:
+            output = format_graph_summary(result)
+    with span("write", chars=len(output)):
+        print(output)
+    if args.format == "dot":
+        print(format_graph_summary(result), file=sys.stderr)
 
 
-def main() -> None:
+def build_parser(prog: str | None = None) -> argparse.ArgumentParser:
+    """Build the command-line argument parser."""
     parser = argparse.ArgumentParser(
+        prog=prog,
         description="deps.dev API client for package version lookup"
     )
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="Write timing spans to FILE ('-' for stderr, *.json for trace viewers); "
+        "defaults to $CCC_TRACE",
+    )
+    parser.add_argument(
+        "--hedge",
+        action="store_true",
+        help="Resend slow read-only requests on a second connection and take the first "
+        "response; defaults to $CCC_HEDGE",
+    )
     subparsers = parser.add_subparsers(dest="command", required=True)
 
     # Package subcommand
@@ -147,7 +1118,14 @@ def main() -> None:
         help="Output format (default: text)",
     )
     pkg_parser.add_argument(
-        "--all-versions", "-a", action="store_true", help="Show recent versions"
+        "--all-versions", "-a", action="store_true", help="Show the 10 highest versions"
+    )
+    pkg_parser.add_argument(
+        "--satisfies",
+        help="Show the highest version matching a range (e.g. '^1.2', '>=2,<3')",
+    )
+    pkg_parser.add_argument(
+        "--refresh", action="store_true", help="Refetch the cached version index"
     )
     pkg_parser.set_defaults(func=get_package)
 
@@ -158,6 +1136,11 @@ def main() -> None:
     )
     ver_parser.add_argument("--package", "-p", required=True, help="Package name")
     ver_parser.add_argument("--version", "-v", required=True, help="Version number")
+    ver_parser.add_argument(
+        "--advisories",
+        action="store_true",
+        help="Fetch severity, CVSS and aliases of each advisory",
+    )
     ver_parser.add_argument(
         "--format",
         "-f",
@@ -167,8 +1150,119 @@ def main() -> None:
     )
     ver_parser.set_defaults(func=get_version)
 
-    args = parser.parse_args()
-    args.func(args)
+    # Scan subcommand
+    scan_parser = subparsers.add_parser(
+        "scan", help="Check lockfile packages for updates and advisories"
+    )
+    scan_parser.add_argument(
+        "lockfile",
+        nargs="+",
+        help="package-lock.json, pnpm-lock.yaml, poetry.lock, requirements.txt, Cargo.lock or go.sum",
+    )
+    scan_parser.add_argument(
+        "--outdated",
+        action="store_true",
+        help="Only show outdated packages, advisories and errors",
+    )
+    scan_parser.add_argument(
+        "--advisories",
+        action="store_true",
+        help="Fetch severity, CVSS and aliases of each advisory found",
+    )
+    scan_parser.add_argument(
+        "--refresh", action="store_true", help="Refetch cached version indexes and advisories"
+    )
+    scan_parser.add_argument(
+        "--concurrency",
+        "-c",
+        type=int,
+        default=32,
+        help="Maximum concurrent requests (default: 32)",
+    )
+    scan_parser.add_argument(
+        "--format",
+        "-f",
+        choices=["json", "text"],
+        default="text",
+        help="Output format (default: text)",
+    )
+    scan_parser.set_defaults(func=scan)
+
+    # Graph subcommand
+    graph_parser = subparsers.add_parser(
+        "graph", help="Resolve a version's transitive dependency graph"
+    )
+    graph_parser.add_argument(
+        "--system", "-s", required=True, help="Package ecosystem (npm, pypi, cargo, etc.)"
+    )
+    graph_parser.add_argument("--package", "-p", required=True, help="Package name")
+    graph_parser.add_argument(
+        "--version", "-v", help="Version number (default: the package's default version)"
+    )
+    graph_parser.add_argument(
+        "--depth", "-d", type=int, help="Only include dependencies up to this depth"
+    )
+    graph_parser.add_argument(
+        "--no-advisories",
+        dest="advisories",
+        action="store_false",
+        help="Skip the per-node version lookups that find advisories",
+    )
+    graph_parser.add_argument(
+        "--concurrency",
+        "-c",
+        type=int,
+        default=32,
+        help="Maximum concurrent requests (default: 32)",
+    )
+    graph_parser.add_argument(
+        "--format",
+        "-f",
+        choices=["text", "json", "dot"],
+        default="text",
+        help="Output format: text summary (default), json or dot (Graphviz)",
+    )
+    graph_parser.set_defaults(func=graph)
+
+    # Stats subcommand
+    stats_parser = subparsers.add_parser(
+        "stats", help="Show latency and error statistics from past calls"
+    )
+    stats_parser.add_argument(
+        "--all", action="store_true", help="Include endpoints of the other clients"
+    )
+    stats_parser.add_argument(
+        "--format",
+        "-f",
+        choices=["text", "json"],
+        default="text",
+        help="Output format (default: text)",
+    )
+    stats_parser.add_argument(
+        "--reset", action="store_true", help="Clear the recorded statistics"
+    )
+    stats_parser.set_defaults(func=show_stats)
+
+    return parser
+
+
+def run(args: argparse.Namespace) -> None:
+    """Run a parsed command, tracing it when requested."""
+    run_client(API, args)
+
+
+def main(argv: list[str] | None = None, prog: str | None = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    exit_code = run_in_daemon(CLIENT, argv, DAEMON_ENV)
+    if exit_code is not None:
+        sys.exit(exit_code)
+
+    args = build_parser(prog).parse_args(argv)
+    try:
+        run(args)
+    except ClientError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
 
 
 if __name__ == "__main__":
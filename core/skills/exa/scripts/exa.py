@@ -1,115 +1,532 @@
 #!/usr/bin/env python3
 """Exa API client for web search and content extraction."""
 
-import argparse
+from __future__ import annotations
+
+import contextlib
+import heapq
 import json
 import os
+import re
 import sys
-import tempfile
-import urllib.error
-import urllib.request
+import time
+import urllib.parse
+
+from ccc_common import (
+    Api, CACHE_DIR, ClientError, LazyModule, RETRY_STATUSES, SpooledOutput, argparse,
+    concurrent_futures, hedge_delay, http_client, http_stream, iter_text, record_stats,
+    request_stats, request_timeout, retry_delay, run_client, run_in_daemon, show_stats, span,
+    thread_pool, wait_before_retry,
+)
+
 
-BASE_URL = "https://api.exa.ai"
-MAX_OUTPUT_CHARS = 30000
+# Loaded on first use, so --help and daemon-forwarded calls start faster
+sqlite3 = LazyModule("sqlite3")
+
+CLIENT = "exa"
+BASE_URL = os.environ.get("EXA_BASE_URL") or "https://api.exa.ai"
+MAX_RETRIES = 3
+REQUEST_TIMEOUT = 60
+# Idempotent calls cheap enough to send twice when the first copy is slow. Deep
+# searches run for tens of seconds and cost more, so they are never hedged.
+HEDGED_ENDPOINTS = ("search-auto", "search-fast")
+_JSON_WS = re.compile(r"[ \t\n\r]*")
+_JSON_BRACKET = re.compile(r'["\[\]{}]')
+_JSON_STRING_END = re.compile(r'["\\]')
+
+DAEMON_ENV = ("CCC_HEDGE", "CCC_TRACE", "EXA_API_KEY", "EXA_BASE_URL")
+# Arguments holding file paths, resolved against the caller's directory by the daemon
+PATH_ARGS = ("queries_file", "trace")
+RATE_LIMIT_RATE = 5.0
+RATE_LIMIT_BURST = 5
+API = Api(CLIENT, RATE_LIMIT_RATE, RATE_LIMIT_BURST)
+CACHE_PATH = os.path.join(CACHE_DIR, "exa.sqlite3")
+CACHE_MAX_BYTES = 128 * 1024 * 1024
+# How long extracted pages are reused, by --livecrawl mode (None when unset)
+CONTENTS_TTLS = {
+    "always": 0,
+    "preferred": 3600,
+    None: 24 * 3600,
+    "fallback": 24 * 3600,
+    "never": 7 * 24 * 3600,
+}
 
 
 def get_api_key() -> str:
     """Get API key from environment."""
     key = os.environ.get("EXA_API_KEY")
     if not key:
-        print("Error: EXA_API_KEY environment variable not set", file=sys.stderr)
-        sys.exit(1)
+        raise ClientError("EXA_API_KEY environment variable not set")
     return key
 
 
-def analyze_content(content: str) -> dict:
-    """Analyze content for file summary."""
-    lines = content.split("\n")
-    line_lengths = [len(line) for line in lines]
-    return {
-        "lines": len(lines),
-        "chars": len(content),
-        "max_line_chars": max(line_lengths) if line_lengths else 0,
+def output_response(content: str, prefix: str = "exa") -> None:
+    """Output response, writing to temp file if too long."""
+    with SpooledOutput(prefix) as out:
+        out.write(content)
+
+
+@contextlib.contextmanager
+def open_request(endpoint: str, data: dict):
+    """Make authenticated POST request to Exa API and yield the unread response."""
+    api_key = get_api_key()
+    url = f"{BASE_URL}/{endpoint}"
+    headers = {
+        "x-api-key": api_key,
+        "Content-Type": "application/json",
+        "User-Agent": "exa-cli/1.0",
     }
 
+    body = json.dumps(data).encode("utf-8")
+    # Search types differ in latency by an order of magnitude, so each keeps its own
+    # statistics and timeouts
+    name = f"{endpoint}-{data['type']}" if endpoint == "search" and "type" in data else endpoint
 
-def output_response(content: str, prefix: str = "exa") -> None:
-    """Output response, writing to temp file if too long."""
-    if len(content) <= MAX_OUTPUT_CHARS:
-        print(content)
-        return
+    with request_stats(name) as stats:
+        for attempt in range(MAX_RETRIES):
+            API.rate_limiter.acquire()
+            # A first attempt that stalls well past the usual latency is retried in full
+            timeout = request_timeout(name, REQUEST_TIMEOUT) if attempt == 0 else REQUEST_TIMEOUT
+            hedge_after = hedge_delay(name) if name in HEDGED_ENDPOINTS else None
+            response = None
+            try:
+                with http_stream(
+                    "POST", url, headers, body, timeout=timeout, attempt=attempt, stats=stats,
+                    hedge_after=hedge_after,
+                ) as response:
+                    API.rate_limiter.observe(response.headers)
+                    if 200 <= response.status < 300:
+                        yield response
+                        return
+                    response.read()
+            except TimeoutError:
+                if response is None and attempt < MAX_RETRIES - 1:
+                    print(f"Timed out after {timeout:.0f}s, retrying...", file=sys.stderr)
+                    continue
+                raise ClientError(f"Network error - timed out after {timeout:.0f}s") from None
+            except (http_client.HTTPException, OSError) as e:
+                raise ClientError(f"Network error - {e}") from None
 
-    # Write to temp file
-    stats = analyze_content(content)
-    fd, path = tempfile.mkstemp(prefix=f"{prefix}_", suffix=".txt")
-    with os.fdopen(fd, "w") as f:
-        f.write(content)
+            if (
+                response.status in RETRY_STATUSES
+                and attempt < MAX_RETRIES - 1
+                and wait_before_retry(
+                    response.status, response.headers.get("Retry-After"), attempt
+                )
+            ):
+                continue
 
-    print(f"Response too long, saved to file:", file=sys.stderr)
-    print(f"  Path: {path}", file=sys.stderr)
-    print(f"  Lines: {stats['lines']}", file=sys.stderr)
-    print(f"  Characters: {stats['chars']}", file=sys.stderr)
-    print(f"  Max line length: {stats['max_line_chars']}", file=sys.stderr)
+            error_messages = {
+                400: "Bad request. Check query parameters.",
+                401: "Invalid API key. Verify EXA_API_KEY is correct.",
+                429: "Rate limit exceeded.",
+                500: "Server error. Try again later.",
+            }
+            message = error_messages.get(
+                response.status, f"HTTP {response.status}: {response.reason}"
+            )
+            raise ClientError(message)
 
 
 def make_request(endpoint: str, data: dict) -> dict:
     """Make authenticated POST request to Exa API."""
-    api_key = get_api_key()
-    url = f"{BASE_URL}/{endpoint}"
+    with open_request(endpoint, data) as response:
+        body = response.read()
+    with span("decode", bytes=len(body)):
+        return json.loads(body)
 
-    request = urllib.request.Request(
-        url,
-        data=json.dumps(data).encode("utf-8"),
-        headers={
-            "x-api-key": api_key,
-            "Content-Type": "application/json",
-            "User-Agent": "exa-cli/1.0",
-        },
-        method="POST",
-    )
 
-    try:
-        with urllib.request.urlopen(request, timeout=60) as response:
-            return json.loads(response.read().decode("utf-8"))
-
-    except urllib.error.HTTPError as e:
-        error_messages = {
-            400: "Bad request. Check query parameters.",
-            401: "Invalid API key. Verify EXA_API_KEY is correct.",
-            429: "Rate limit exceeded.",
-            500: "Server error. Try again later.",
-        }
-        message = error_messages.get(e.code, f"HTTP {e.code}: {e.reason}")
-        print(f"Error: {message}", file=sys.stderr)
-        sys.exit(1)
+def scan_json_container(buf: str, pos: int, depth: int, in_string: bool):
+    """Advance over an array or object from pos, returning (pos, depth, in_string).
 
-    except urllib.error.URLError as e:
-        print(f"Error: Network error - {e.reason}", file=sys.stderr)
-        sys.exit(1)
+    Depth 0 means the container ends just before pos. Otherwise the whole of buf
+    was scanned and the call resumes from the returned state once more text
+    arrives, so each character is looked at once however many chunks it spans.
+    """
+    while True:
+        if in_string:
+            m = _JSON_STRING_END.search(buf, pos)
+            if m is None:
+                return len(buf), depth, True
+            if m[0] == "\\":
+                if m.end() == len(buf):
+                    # The escaped character is in the next chunk
+                    return m.start(), depth, True
+                pos = m.end() + 1
+                continue
+            pos, in_string = m.end(), False
+            continue
+        m = _JSON_BRACKET.search(buf, pos)
+        if m is None:
+            return len(buf), depth, False
+        pos = m.end()
+        if m[0] == '"':
+            in_string = True
+        elif m[0] in "[{":
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return pos, 0, False
+
+
+def scalar_complete(buf: str, end: int, closing: str, final: bool) -> bool:
+    """Tell whether a value decoded up to end is followed by "," or closing."""
+    after = _JSON_WS.match(buf, end).end()
+    return final or buf[after : after + 1] in (",", closing)
+
+
+def iter_json_array(response: http_client.HTTPResponse, key: str):
+    """Yield items of a top-level JSON array field as the response streams in.
+
+    Other top-level fields are skipped, so only one item is held in memory at a time.
+    An item or field spanning many chunks is scanned once and decoded once complete,
+    and text before the current item is dropped as items are yielded.
+    """
+    decoder = json.JSONDecoder()
+    chunks = iter_text(response)
+    buf, pos, state = "", 0, "start"
+    # Progress through an unfinished array or object, kept across chunks
+    scan, depth, in_string = 0, 0, False
+
+    while True:
+        chunk = next(chunks, None)
+        buf = buf[pos:] + (chunk or "")
+        scan -= pos
+        pos = 0
+        while (pos := _JSON_WS.match(buf, pos).end()) < len(buf):
+            char = buf[pos]
+            if state == "start":
+                if char != "{":
+                    raise ClientError("Invalid JSON response")
+                pos, state = pos + 1, "fields"
+            elif state == "fields":
+                if char == ",":
+                    pos += 1
+                    continue
+                if char == "}":
+                    return
+                # Parse "name": value, waiting for more data if it is incomplete
+                try:
+                    name, end = json.decoder.scanstring(buf, pos + 1)
+                    colon = _JSON_WS.match(buf, end).end()
+                    value = _JSON_WS.match(buf, colon + 1).end()
+                    if value >= len(buf):
+                        break
+                    if name == key and buf[value] == "[":
+                        pos, state = value + 1, "items"
+                    elif buf[value] in "[{":
+                        scan, depth, in_string = scan_json_container(
+                            buf, scan if depth else value, depth, in_string
+                        )
+                        if depth:
+                            break
+                        pos = scan
+                    else:
+                        end = decoder.raw_decode(buf, value)[1]
+                        # A number cut off by the chunk boundary decodes as a shorter one
+                        if not scalar_complete(buf, end, "}", chunk is None):
+                            break
+                        pos = end
+                except ValueError:
+                    break
+            else:
+                if char == ",":
+                    pos += 1
+                    continue
+                if char == "]":
+                    # Drain the rest so the connection can be reused
+                    for _ in chunks:
+                        pass
+                    return
+                if depth:
+                    # Wait for the item that failed to decode below to close
+                    scan, depth, in_string = scan_json_container(buf, scan, depth, in_string)
+                    if depth:
+                        break
+                try:
+                    with span("decode"):
+                        item, end = decoder.raw_decode(buf, pos)
+                except ValueError:
+                    if char in "[{":
+                        scan, depth, in_string = scan_json_container(buf, pos, 0, False)
+                    break
+                if char not in "[{" and not scalar_complete(buf, end, "]", chunk is None):
+                    break
+                pos = end
+                # Drop the consumed text once it outweighs the rest, keeping this linear
+                if pos > len(buf) - pos:
+                    buf, pos, scan = buf[pos:], 0, scan - pos
+                yield item
+        if chunk is None:
+            raise ClientError("Truncated JSON response")
+
+
+def format_search_result(r: dict) -> str:
+    """Format a single search result as text."""
+    output = []
+    output.append(f"## {r.get('title', 'Untitled')}")
+    output.append(f"URL: {r.get('url', '')}")
+    if r.get("publishedDate"):
+        output.append(f"Date: {r.get('publishedDate')}")
+    if r.get("queries"):
+        found_by = ", ".join(f'"{q}"' for q in r["queries"])
+        output.append(f"Found by: {found_by} (best rank {r['rank']})")
+    text = r.get("text", "")
+    if text:
+        output.append(f"\n{text}")
+    output.append("")
+    return "\n".join(output)
 
 
 def format_search_results(results: list) -> str:
     """Format search results as text."""
     if not results:
         return "No results found"
+    return "\n".join(format_search_result(r) for r in results)
 
-    output = []
-    for r in results:
-        output.append(f"## {r.get('title', 'Untitled')}")
-        output.append(f"URL: {r.get('url', '')}")
-        if r.get("publishedDate"):
-            output.append(f"Date: {r.get('publishedDate')}")
-        text = r.get("text", "")
-        if text:
-            output.append(f"\n{text}")
-        output.append("")
-    return "\n".join(output)
+
+def write_results(
+    out: SpooledOutput, results, formatter, empty: str, dedup: Deduplicator | None = None
+) -> None:
+    """Format and write results one at a time as they are parsed."""
+    count = 0
+    for r in dedup.filter(results) if dedup else results:
+        with span("format"):
+            text = formatter(r)
+        out.write(("\n" if count else "") + text)
+        count += 1
+    if not count:
+        out.write(empty)
+    if dedup and dedup.summary():
+        out.write(f"\n\n{dedup.summary()}")
+
+
+def dedup_response(result: dict, dedup: Deduplicator | None) -> dict:
+    """Filter the results of a whole JSON response through dedup, if given."""
+    if dedup and result.get("results"):
+        with span("dedup", results=len(result["results"])):
+            result["results"] = list(dedup.filter(result["results"]))
+    return result
+
+
+DEDUP_THRESHOLD = 0.8
+DEDUP_SHINGLE_WORDS = 3
+DEDUP_SKETCH_SIZE = 64
+DEDUP_CANDIDATES = 3
+# Shorter paragraphs (headings, captions) are never stripped as repeats
+DEDUP_MIN_PARAGRAPH = 40
+PARAGRAPH_SPLIT = re.compile(r"\n\s*\n")
+
+
+class Deduplicator:
+    """Collapse near-duplicate results and strip paragraphs repeated across results.
+
+    Each text is reduced to a bottom-k MinHash sketch of its word shingles, with
+    one hash per shingle. Earlier results sharing sketch values are candidates,
+    and their Jaccard similarity is estimated from the two sketches. All work
+    is linear in the combined text.
+    """
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD):
+        self.threshold = threshold
+        self.collapsed: list[tuple[str, str, float]] = []
+        self.stripped = 0
+        self._sketches: list[frozenset] = []
+        self._kept: list[dict] = []
+        self._index: dict[int, list[int]] = {}
+        self._paragraphs: set[str] = set()
+
+    @staticmethod
+    def sketch(text: str) -> frozenset:
+        words = text.lower().split()
+        shingles = zip(*(words[i:] for i in range(DEDUP_SHINGLE_WORDS)))
+        return frozenset(heapq.nsmallest(DEDUP_SKETCH_SIZE, set(map(hash, shingles))))
+
+    @staticmethod
+    def similarity(a: frozenset, b: frozenset) -> float:
+        """Estimate Jaccard similarity from the bottom-k sketch of the union."""
+        union = heapq.nsmallest(DEDUP_SKETCH_SIZE, a | b)
+        return sum(1 for value in union if value in a and value in b) / len(union)
+
+    def match(self, sketch: frozenset) -> tuple[int, float] | None:
+        """Return (index, similarity) of a kept result this sketch duplicates."""
+        shared: dict[int, int] = {}
+        for value in sketch:
+            for doc in self._index.get(value, ()):
+                shared[doc] = shared.get(doc, 0) + 1
+        best = sorted(shared, key=shared.get, reverse=True)[:DEDUP_CANDIDATES]
+        for doc in best:
+            score = self.similarity(sketch, self._sketches[doc])
+            if score >= self.threshold:
+                return doc, score
+        return None
+
+    def strip_repeats(self, text: str) -> str:
+        """Drop paragraphs already seen in an earlier result."""
+        kept, seen = [], []
+        for paragraph in PARAGRAPH_SPLIT.split(text):
+            key = " ".join(paragraph.lower().split())
+            if len(key) >= DEDUP_MIN_PARAGRAPH and key in self._paragraphs:
+                self.stripped += 1
+                continue
+            kept.append(paragraph)
+            seen.append(key)
+        self._paragraphs.update(seen)
+        return "\n\n".join(kept)
+
+    def filter(self, results):
+        """Yield results with near-duplicates dropped and repeated paragraphs stripped.
+
+        Kept results record the URLs collapsed into them under "duplicates", which
+        only shows up in output written after the whole list has been filtered.
+        """
+        for r in results:
+            text = r.get("text") or ""
+            sketch = self.sketch(text) if text else frozenset()
+            if not sketch:
+                yield r
+                continue
+            found = self.match(sketch)
+            if found:
+                doc, score = found
+                kept = self._kept[doc]
+                kept.setdefault("duplicates", []).append(r.get("url", ""))
+                self.collapsed.append((r.get("url", ""), kept.get("url", ""), score))
+                continue
+            for value in sketch:
+                self._index.setdefault(value, []).append(len(self._sketches))
+            self._sketches.append(sketch)
+            r = {**r, "text": self.strip_repeats(text)}
+            self._kept.append(r)
+            yield r
+
+    def summary(self) -> str:
+        """Describe what was collapsed, or return "" when nothing was."""
+        if not self.collapsed and not self.stripped:
+            return ""
+        lines = [
+            f"Collapsed {len(self.collapsed)} near-duplicate result(s) and stripped "
+            f"{self.stripped} repeated paragraph(s)."
+        ]
+        lines += [
+            f"  {url} (duplicate of {kept}, {score:.0%} similar)"
+            for url, kept, score in self.collapsed
+        ]
+        return "\n".join(lines)
+
+
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "msclkid", "ref_src"}
+
+
+def canonical_url(url: str) -> str:
+    """Normalize a URL so links that differ only cosmetically compare equal.
+
+    The scheme, "www.", default ports, fragments, trailing slashes, tracking
+    parameters and query parameter order are ignored.
+    """
+    try:
+        parts = urllib.parse.urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return url.strip()
+    host = (parts.hostname or "").removeprefix("www.")
+    if port and port not in (80, 443):
+        host = f"{host}:{port}"
+    query = sorted(
+        (key, value)
+        for key, value in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    return urllib.parse.urlunsplit(
+        ("", host, parts.path.rstrip("/"), urllib.parse.urlencode(query), "")
+    )
+
+
+def read_queries(args: argparse.Namespace) -> list[str]:
+    """Collect --query values and --queries-file lines, dropping repeats."""
+    queries = list(args.query or [])
+    if args.queries_file:
+        try:
+            source = (
+                contextlib.nullcontext(sys.stdin)
+                if args.queries_file == "-"
+                else open(args.queries_file, encoding="utf-8")
+            )
+            with source as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith("#"):
+                        queries.append(line)
+        except OSError as e:
+            raise ClientError(f"Cannot read queries file - {e}") from None
+    if not queries:
+        raise ClientError("No queries given, use --query or --queries-file")
+    return list(dict.fromkeys(queries))
+
+
+def merge_results(responses: list[tuple[str, list]]) -> list[dict]:
+    """Merge per-query results, keeping one entry per canonical URL.
+
+    Each entry keeps its best (lowest) rank and every query that found it, and the
+    merged list is ordered by best rank, ties broken by query order.
+    """
+    merged: dict[str, dict] = {}
+    for query, results in responses:
+        for rank, r in enumerate(results, 1):
+            key = canonical_url(r["url"]) if r.get("url") else f"#{len(merged)}"
+            entry = merged.get(key)
+            if entry is None:
+                merged[key] = {**r, "rank": rank, "queries": [query]}
+                continue
+            if query not in entry["queries"]:
+                entry["queries"].append(query)
+            if rank < entry["rank"]:
+                merged[key] = {**r, "rank": rank, "queries": entry["queries"]}
+    return sorted(merged.values(), key=lambda r: r["rank"])
+
+
+def search_many(queries: list[str], base: dict, args: argparse.Namespace) -> None:
+    """Run several searches concurrently and write one deduplicated result list."""
+    responses: dict[str, list] = {}
+    failed: dict[str, str] = {}
+    dedup = Deduplicator(args.dedup_threshold) if args.dedup else None
+
+    with thread_pool(args.concurrency) as pool:
+        futures = {pool.submit(make_request, "search", {**base, "query": q}): q for q in queries}
+        for future in concurrent_futures.as_completed(futures):
+            query = futures[future]
+            try:
+                responses[query] = future.result().get("results", [])
+            except ClientError as e:
+                failed[query] = str(e)
+
+    with span("merge", queries=len(responses)) as info:
+        results = merge_results([(q, responses[q]) for q in queries if q in responses])
+        info["results"] = len(results)
+
+    if args.format == "json":
+        response = dedup_response({"queries": queries, "results": results}, dedup)
+        with span("format"):
+            output = json.dumps(response, indent=2)
+        output_response(output, "exa_search")
+    else:
+        with SpooledOutput("exa_search") as out:
+            write_results(out, results, format_search_result, "No results found", dedup)
+
+    if failed:
+        sys.stdout.flush()
+        print(f"Failed {len(failed)} of {len(queries)} queries:", file=sys.stderr)
+        for query in queries:
+            if query in failed:
+                print(f"  {query}: {failed[query]}", file=sys.stderr)
+        raise ClientError(f"{len(failed)} of {len(queries)} queries failed")
 
 
 def search(args: argparse.Namespace) -> None:
     """Search the web using Exa."""
+    queries = read_queries(args)
     data = {
-        "query": args.query,
         "type": args.type,
         "numResults": args.num_results,
     }
@@ -132,46 +549,355 @@ def search(args: argparse.Namespace) -> None:
     if args.end_date:
         data["endPublishedDate"] = args.end_date
 
-    result = make_request("search", data)
+    if len(queries) > 1:
+        search_many(queries, data, args)
+        return
 
+    data["query"] = queries[0]
+    dedup = Deduplicator(args.dedup_threshold) if args.dedup else None
     if args.format == "json":
-        output = json.dumps(result, indent=2)
+        result = dedup_response(make_request("search", data), dedup)
+        with span("format"):
+            output = json.dumps(result, indent=2)
+        output_response(output, "exa_search")
+        return
+
+    with open_request("search", data) as response, SpooledOutput("exa_search") as out:
+        write_results(
+            out,
+            iter_json_array(response, "results"),
+            format_search_result,
+            "No results found",
+            dedup,
+        )
+
+
+def open_cache() -> sqlite3.Connection | None:
+    """Open the extracted page store, or None if it is unavailable."""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        conn = sqlite3.connect(CACHE_PATH, timeout=5)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " url TEXT PRIMARY KEY, body TEXT NOT NULL, size INTEGER NOT NULL,"
+            " fetched_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed_at)")
+        return conn
+    except (OSError, sqlite3.Error):
+        return None
+
+
+def page_key(result: dict) -> str:
+    """Canonical URL a contents result was requested for."""
+    return canonical_url(result.get("id") or result.get("url") or "")
+
+
+def cached_pages(conn: sqlite3.Connection, urls: list[str], ttl: float) -> dict[str, str]:
+    """Return stored result JSON fetched within ttl, keyed by canonical URL."""
+    keys = list(dict.fromkeys(canonical_url(url) for url in urls))
+    now = time.time()
+    found = {}
+    try:
+        # Stay under SQLite's default limit on bound parameters
+        for i in range(0, len(keys), 500):
+            batch = keys[i : i + 500]
+            found.update(
+                conn.execute(
+                    f"SELECT url, body FROM pages WHERE url IN ({','.join('?' * len(batch))})"
+                    " AND fetched_at > ?",
+                    (*batch, now - ttl),
+                ).fetchall()
+            )
+        if found:
+            with conn:
+                conn.executemany(
+                    "UPDATE pages SET accessed_at = ? WHERE url = ?",
+                    [(now, key) for key in found],
+                )
+    except sqlite3.Error:
+        return {}
+    return found
+
+
+def store_pages(conn: sqlite3.Connection, results: list[dict]) -> None:
+    """Store extracted pages and evict least recently used ones past the size cap."""
+    now = time.time()
+    rows = []
+    for r in results:
+        if r.get("text") and page_key(r):
+            body = json.dumps(r)
+            rows.append((page_key(r), body, len(body), now, now))
+    if not rows:
+        return
+    try:
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)", rows)
+            conn.execute(
+                "DELETE FROM pages WHERE url IN ("
+                " SELECT url FROM (SELECT url, SUM(size) OVER"
+                " (ORDER BY accessed_at DESC, url) AS total FROM pages)"
+                " WHERE total > ?)",
+                (CACHE_MAX_BYTES,),
+            )
+    except sqlite3.Error:
+        pass
+
+
+def stored_results(results, conn: sqlite3.Connection):
+    """Yield results unchanged, storing them once the stream is exhausted."""
+    seen = []
+    for r in results:
+        seen.append(r)
+        yield r
+    store_pages(conn, seen)
+
+
+def cache_report(hits: dict[str, str], urls: list[str]) -> dict:
+    """Hit ratio and bytes saved for a contents request served partly from the store."""
+    total = len(set(map(canonical_url, urls)))
+    return {
+        "hits": len(hits),
+        "misses": total - len(hits),
+        "hit_ratio": round(len(hits) / total, 3) if total else 0.0,
+        "bytes_saved": sum(len(body) for body in hits.values()),
+    }
+
+
+def print_cache_report(report: dict) -> None:
+    print(
+        f"Local store: {report['hits']} of {report['hits'] + report['misses']} URLs "
+        f"({report['hit_ratio']:.0%}), {report['bytes_saved'] / 1024:.1f} KB not refetched",
+        file=sys.stderr,
+    )
+
+
+def contents_partial(
+    urls: list[str],
+    base: dict,
+    args: argparse.Namespace,
+    conn: sqlite3.Connection,
+    hits: dict[str, str],
+) -> None:
+    """Fetch only the URLs missing from the store and merge results in request order.
+
+    A URL repeated in the request, even in a cosmetically different form,
+    is returned once.
+    """
+    missing: dict[str, str] = {}
+    for url in urls:
+        if canonical_url(url) not in hits:
+            missing.setdefault(canonical_url(url), url)
+    fetched: dict[str, dict] = {}
+    failed: dict[str, str] = {}
+    result = {"results": [], "statuses": []}
+    if missing:
+        size = args.chunk_size or len(missing)
+        pending = list(missing.values())
+        chunks = [pending[i : i + size] for i in range(0, len(pending), size)]
+        with thread_pool(args.concurrency) as pool:
+            futures = {
+                pool.submit(fetch_chunk, {**base, "urls": chunk}, args.retries): chunk
+                for chunk in chunks
+            }
+            for future in concurrent_futures.as_completed(futures):
+                try:
+                    response = future.result()
+                except ClientError as e:
+                    failed.update((canonical_url(url), str(e)) for url in futures[future])
+                    continue
+                fetched.update((page_key(r), r) for r in response.pop("results", []))
+                result["statuses"] += response.pop("statuses", [])
+                result.update(response)
+        for key in failed_statuses(result):
+            failed[key] = "extraction failed"
+        with span("store", pages=len(fetched)):
+            store_pages(conn, list(fetched.values()))
+
+    with span("merge", hits=len(hits), fetched=len(fetched)):
+        for key in dict.fromkeys(map(canonical_url, urls)):
+            if key in hits:
+                result["results"].append(json.loads(hits[key]))
+            elif key in fetched:
+                result["results"].append(fetched[key])
+    report = cache_report(hits, urls)
+
+    dedup = Deduplicator(args.dedup_threshold) if args.dedup else None
+    if args.format == "json":
+        result = dedup_response(result, dedup)
+        result["cache"] = report
+        with span("format"):
+            output = json.dumps(result, indent=2)
+        output_response(output, "exa_contents")
     else:
-        output = format_search_results(result.get("results", []))
+        with SpooledOutput("exa_contents") as out:
+            write_results(
+                out, result["results"], format_contents_result, "No content extracted", dedup
+            )
+    print_cache_report(report)
+    report_failures(failed, urls)
+
 
-    output_response(output, "exa_search")
+def format_contents_result(r: dict) -> str:
+    """Format a single extracted page as text."""
+    parts = []
+    parts.append(f"## {r.get('title', 'Untitled')}")
+    parts.append(f"URL: {r.get('url', '')}")
+    text = r.get("text", "")
+    if text:
+        parts.append(f"\n{text}")
+    parts.append("")
+    return "\n".join(parts)
+
+
+def format_contents_results(results: list) -> str:
+    """Format extracted contents as text."""
+    if not results:
+        return "No content extracted"
+    return "\n".join(format_contents_result(r) for r in results)
+
+
+def failed_statuses(result: dict) -> list[str]:
+    """Return the canonical form of URLs reported as failed in a contents response."""
+    return [
+        canonical_url(s.get("id", ""))
+        for s in result.get("statuses", [])
+        if s.get("status") not in (None, "success")
+    ]
+
+
+def report_failures(failed: dict[str, str], urls: list[str]) -> None:
+    """List the URLs that could not be extracted, in request order, and fail the run.
+
+    failed is keyed by canonical_url(), since the API may echo a URL in a
+    different form than it was requested.
+    """
+    if not failed:
+        return
+    requested: dict[str, str] = {}
+    for url in urls:
+        requested.setdefault(canonical_url(url), url)
+    print(f"Failed to extract {len(failed)} URL(s):", file=sys.stderr)
+    for key, url in requested.items():
+        if key in failed:
+            print(f"  {url}: {failed[key]}", file=sys.stderr)
+    raise ClientError(f"{len(failed)} of {len(requested)} URLs failed")
+
+
+def fetch_chunk(data: dict, retries: int) -> dict:
+    """Fetch one chunk of URLs, retrying the chunk on its own when it fails."""
+    for attempt in range(retries + 1):
+        try:
+            return make_request("contents", data)
+        except ClientError as e:
+            if attempt == retries:
+                raise
+            wait_time = retry_delay(attempt)
+            print(
+                f"Chunk of {len(data['urls'])} URLs failed ({e}), "
+                f"retrying in {wait_time:.1f}s... (attempt {attempt + 1})",
+                file=sys.stderr,
+            )
+            time.sleep(wait_time)
+
+
+def contents_chunked(
+    urls: list[str], base: dict, args: argparse.Namespace, conn: sqlite3.Connection | None
+) -> None:
+    """Extract URLs in concurrent chunks, printing each chunk as soon as it completes.
+
+    Chunks are written in completion order by this thread only, so they never
+    interleave. A chunk whose output passes MAX_OUTPUT_CHARS is spilled to its
+    own temp file. JSON output has one line per chunk.
+    """
+    chunks = [urls[i : i + args.chunk_size] for i in range(0, len(urls), args.chunk_size)]
+    failed: dict[str, str] = {}
+    # Shared across chunks, so pages are compared with everything emitted before them
+    dedup = Deduplicator(args.dedup_threshold) if args.dedup else None
+
+    with thread_pool(args.concurrency) as pool:
+        futures = {
+            pool.submit(fetch_chunk, {**base, "urls": chunk}, args.retries): chunk
+            for chunk in chunks
+        }
+        for future in concurrent_futures.as_completed(futures):
+            chunk = futures[future]
+            try:
+                result = future.result()
+            except ClientError as e:
+                failed.update((canonical_url(url), str(e)) for url in chunk)
+                continue
+
+            for key in failed_statuses(result):
+                failed[key] = "extraction failed"
+            if conn:
+                store_pages(conn, result.get("results", []))
+            dedup_response(result, dedup)
+            with span("format"):
+                if args.format == "json":
+                    output = json.dumps(result)
+                else:
+                    output = format_contents_results(result.get("results", []))
+            output_response(output, "exa_contents")
+            sys.stdout.flush()
+
+    if dedup and dedup.summary():
+        print(dedup.summary(), file=sys.stderr if args.format == "json" else sys.stdout)
+    report_failures(failed, urls)
 
 
 def contents(args: argparse.Namespace) -> None:
     """Extract content from specific URLs."""
+    urls = [url.strip() for url in args.urls.split(",") if url.strip()]
     data = {
-        "urls": args.urls.split(","),
+        "urls": urls,
         "text": True,
     }
 
     if args.livecrawl:
         data["livecrawl"] = args.livecrawl
 
-    result = make_request("contents", data)
+    conn = None if args.no_cache else open_cache()
+    hits = {}
+    ttl = CONTENTS_TTLS[args.livecrawl]
+    if conn and ttl and not args.refresh:
+        start = time.perf_counter()
+        with span("cache", urls=len(urls)) as info:
+            hits = cached_pages(conn, urls, ttl)
+            info["hits"] = len(hits)
+        if hits:
+            saved = sum(len(body) for body in hits.values())
+            record_stats("cache", "contents", 200, time.perf_counter() - start, saved, 0)
+            contents_partial(urls, data, args, conn, hits)
+            return
 
-    if args.format == "json":
-        output = json.dumps(result, indent=2)
+    if args.chunk_size and len(urls) > args.chunk_size:
+        contents_chunked(urls, data, args, conn)
     else:
-        results = result.get("results", [])
-        if not results:
-            output = "No content extracted"
+        dedup = Deduplicator(args.dedup_threshold) if args.dedup else None
+        if args.format == "json":
+            result = make_request("contents", data)
+            if conn:
+                store_pages(conn, result.get("results", []))
+            result = dedup_response(result, dedup)
+            if conn:
+                result["cache"] = cache_report(hits, urls)
+            with span("format"):
+                output = json.dumps(result, indent=2)
+            output_response(output, "exa_contents")
         else:
-            parts = []
-            for r in results:
-                parts.append(f"## {r.get('title', 'Untitled')}")
-                parts.append(f"URL: {r.get('url', '')}")
-                text = r.get("text", "")
-                if text:
-                    parts.append(f"\n{text}")
-                parts.append("")
-            output = "\n".join(parts)
-
-    output_response(output, "exa_contents")
+            with open_request("contents", data) as response:
+                results = iter_json_array(response, "results")
+                with SpooledOutput("exa_contents") as out:
+                    write_results(
+                        out,
+                        stored_results(results, conn) if conn else results,
+                        format_contents_result,
+                        "No content extracted",
+                        dedup,
+                    )
+    if conn:
+        print_cache_report(cache_report(hits, urls))
 
 
 def code(args: argparse.Namespace) -> None:
@@ -203,16 +929,38 @@ def code(args: argparse.Namespace) -> None:
     output_response(output, "exa_code")
 
 
-def main() -> None:
+def build_parser(prog: str | None = None) -> argparse.ArgumentParser:
+    """Build the command-line argument parser."""
     parser = argparse.ArgumentParser(
+        prog=prog,
         description="Exa API client for web search and content extraction"
     )
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="Write timing spans to FILE ('-' for stderr, *.json for trace viewers); "
+        "defaults to $CCC_TRACE",
+    )
+    parser.add_argument(
+        "--hedge",
+        action="store_true",
+        help="Resend slow read-only requests on a second connection and take the first "
+        "response; defaults to $CCC_HEDGE",
+    )
     subparsers = parser.add_subparsers(dest="command", required=True)
 
     # Search subcommand
     search_parser = subparsers.add_parser("search", help="Search the web")
     search_parser.add_argument(
-        "--query", "-q", required=True, help="Search query"
+        "--query",
+        "-q",
+        action="append",
+        help="Search query; repeat to run several queries and merge their results",
+    )
+    search_parser.add_argument(
+        "--queries-file",
+        metavar="FILE",
+        help="File with one query per line ('-' for stdin, # starts a comment)",
     )
     search_parser.add_argument(
         "--type",
@@ -253,6 +1001,23 @@ def main() -> None:
         default="text",
         help="Output format (default: text)",
     )
+    search_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Maximum concurrent queries when several are given (default: 4)",
+    )
+    search_parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Collapse near-duplicate pages and strip paragraphs repeated across results",
+    )
+    search_parser.add_argument(
+        "--dedup-threshold",
+        type=float,
+        default=DEDUP_THRESHOLD,
+        help=f"Estimated Jaccard similarity at which pages collapse (default: {DEDUP_THRESHOLD})",
+    )
     search_parser.set_defaults(func=search)
 
     # Contents subcommand
@@ -274,6 +1039,43 @@ def main() -> None:
         default="text",
         help="Output format (default: text)",
     )
+    contents_parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=0,
+        help="Split URLs into concurrent requests of this size (default: single request)",
+    )
+    contents_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Maximum concurrent chunk requests (default: 4)",
+    )
+    contents_parser.add_argument(
+        "--retries",
+        type=int,
+        default=2,
+        help="Retries per failed chunk (default: 2)",
+    )
+    contents_parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Collapse near-duplicate pages and strip paragraphs repeated across results",
+    )
+    contents_parser.add_argument(
+        "--dedup-threshold",
+        type=float,
+        default=DEDUP_THRESHOLD,
+        help=f"Estimated Jaccard similarity at which pages collapse (default: {DEDUP_THRESHOLD})",
+    )
+    contents_parser.add_argument(
+        "--no-cache", action="store_true", help="Bypass the local page store"
+    )
+    contents_parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Extract every URL again and update the local page store",
+    )
     contents_parser.set_defaults(func=contents)
 
     # Code subcommand
@@ -298,8 +1100,45 @@ def main() -> None:
     )
     code_parser.set_defaults(func=code)
 
-    args = parser.parse_args()
-    args.func(args)
+    # Stats subcommand
+    stats_parser = subparsers.add_parser(
+        "stats", help="Show latency and error statistics from past calls"
+    )
+    stats_parser.add_argument(
+        "--all", action="store_true", help="Include endpoints of the other clients"
+    )
+    stats_parser.add_argument(
+        "--format",
+        "-f",
+        choices=["text", "json"],
+        default="text",
+        help="Output format (default: text)",
+    )
+    stats_parser.add_argument(
+        "--reset", action="store_true", help="Clear the recorded statistics"
+    )
+    stats_parser.set_defaults(func=show_stats)
+
+    return parser
+
+
+def run(args: argparse.Namespace) -> None:
+    """Run a parsed command, tracing it when requested."""
+    run_client(API, args)
+
+
+def main(argv: list[str] | None = None, prog: str | None = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    exit_code = run_in_daemon(CLIENT, argv, DAEMON_ENV)
+    if exit_code is not None:
+        sys.exit(exit_code)
+
+    args = build_parser(prog).parse_args(argv)
+    try:
+        run(args)
+    except ClientError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
 
 
 if __name__ == "__main__":
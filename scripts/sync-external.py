@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""Sync external skills from vendor submodules to external/skills.
+
+Each skill keeps a manifest of the content hashes it was last synced from, so
+only added or changed files are copied and only files deleted upstream are
+removed. Skills are synced in parallel.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MANIFEST_DIR = os.path.join("external", ".sync")
+
+# Skill name -> source directory, relative to the repository root
+SKILLS = {
+    "logging-best-practices": "vendor/boristane-agent-skills/skills/logging-best-practices",
+    "react-best-practices": "vendor/vercel-agent-skills/skills/react-best-practices",
+    "web-design-guidelines": "vendor/vercel-agent-skills/skills/web-design-guidelines",
+    "design-postgres-tables": "vendor/timescale-pg-aiguide/skills/design-postgres-tables",
+}
+DESTINATION_DIR = os.path.join("external", "skills")
+IGNORED_NAMES = {".git", ".DS_Store", "__pycache__"}
+FILE_CHANGES = {"added": "+", "changed": "~", "removed": "-"}
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def list_files(root: str) -> list[str]:
+    """Relative paths of the files under root, with '/' separators."""
+    files = []
+    for directory, subdirs, names in os.walk(root):
+        subdirs[:] = sorted(d for d in subdirs if d not in IGNORED_NAMES)
+        for name in names:
+            if name not in IGNORED_NAMES:
+                path = os.path.relpath(os.path.join(directory, name), root)
+                files.append(path.replace(os.sep, "/"))
+    return sorted(files)
+
+
+def load_manifest(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f).get("files", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def is_current(destination: str, entry: dict | None, digest: str, verify: bool) -> bool:
+    """Check whether a destination file already holds content with digest.
+
+    Without verify, files recorded in the manifest are trusted when their size
+    still matches, so a sync hashes only its sources. A local edit that keeps
+    the size goes unnoticed that way. With verify, as for --check, every
+    destination file is hashed to catch such edits. mtimes are not used because
+    they differ between checkouts while the manifests are committed.
+    """
+    try:
+        size = os.path.getsize(destination)
+    except OSError:
+        return False
+    if entry is not None and not verify:
+        return entry["sha256"] == digest and entry["size"] == size
+    return file_hash(destination) == digest
+
+
+def copy_file(source: str, destination: str) -> None:
+    """Copy source over destination atomically, keeping its permission bits."""
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    partial = f"{destination}.sync-tmp"
+    shutil.copyfile(source, partial)
+    shutil.copymode(source, partial)
+    os.replace(partial, destination)
+
+
+def remove_empty_dirs(root: str) -> None:
+    for directory, _, _ in sorted(os.walk(root), key=lambda d: -len(d[0])):
+        if directory != root and not os.listdir(directory):
+            os.rmdir(directory)
+
+
+def sync_skill(root: str, name: str, source: str, check: bool) -> dict:
+    """Bring one skill's destination in line with its source.
+
+    Returns the relative paths that were (or, with check, would be) added,
+    changed and removed, and whether the manifest was out of date.
+    """
+    source_dir = os.path.join(root, source)
+    destination_dir = os.path.join(root, DESTINATION_DIR, name)
+    manifest_path = os.path.join(root, MANIFEST_DIR, f"{name}.json")
+    if not os.path.isdir(source_dir):
+        raise FileNotFoundError(f"Source {source} not found (run git submodule update)")
+
+    manifest = load_manifest(manifest_path)
+    current = set(list_files(destination_dir)) if os.path.isdir(destination_dir) else set()
+    result = {"added": [], "changed": [], "removed": []}
+    files = {}
+    for path in list_files(source_dir):
+        source_path = os.path.join(source_dir, path)
+        destination_path = os.path.join(destination_dir, path)
+        digest = file_hash(source_path)
+        files[path] = {"sha256": digest, "size": os.path.getsize(source_path)}
+        if is_current(destination_path, manifest.get(path), digest, verify=check):
+            continue
+        result["changed" if path in current else "added"].append(path)
+        if not check:
+            copy_file(source_path, destination_path)
+
+    result["removed"] = sorted(current - files.keys())
+    result["manifest"] = files != manifest
+    if check:
+        return result
+
+    for path in result["removed"]:
+        os.remove(os.path.join(destination_dir, path))
+    if result["removed"]:
+        remove_empty_dirs(destination_dir)
+    if result["manifest"]:
+        os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+        with open(f"{manifest_path}.sync-tmp", "w", encoding="utf-8") as f:
+            json.dump({"source": source, "files": files}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        os.replace(f"{manifest_path}.sync-tmp", manifest_path)
+    return result
+
+
+def describe(result: dict, check: bool) -> str:
+    parts = [f"{len(result[kind])} {kind}" for kind in FILE_CHANGES if result[kind]]
+    if result["manifest"] and not parts:
+        parts.append("manifest out of date" if check else "manifest updated")
+    return ", ".join(parts) if parts else "up to date"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Sync external skills from vendor submodules to external/skills"
+    )
+    parser.add_argument(
+        "skills", nargs="*", help=f"Skills to sync (default: all of {', '.join(SKILLS)})"
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Report drift without writing anything; exit 1 when a skill is out of date",
+    )
+    parser.add_argument(
+        "--verbose", "-v", action="store_true", help="List every added, changed and removed file"
+    )
+    parser.add_argument("--root", default=ROOT_DIR, help="Repository root (default: this checkout)")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.skills if name not in SKILLS]
+    if unknown:
+        parser.error(f"unknown skill(s): {', '.join(unknown)}")
+    names = args.skills or list(SKILLS)
+
+    print("Checking external skills..." if args.check else "Syncing external skills...")
+    with ThreadPoolExecutor(max_workers=len(names)) as pool:
+        futures = {
+            name: pool.submit(sync_skill, args.root, name, SKILLS[name], args.check)
+            for name in names
+        }
+    failed = drifted = False
+    for name, future in futures.items():
+        try:
+            result = future.result()
+        except OSError as e:
+            print(f"  - {name}: error: {e}", file=sys.stderr)
+            failed = True
+            continue
+        drifted = drifted or any(result.values())
+        print(f"  - {name}: {describe(result, args.check)}")
+        if args.verbose:
+            for kind, sign in FILE_CHANGES.items():
+                for path in result[kind]:
+                    print(f"      {sign} {path}")
+
+    if failed or (args.check and drifted):
+        sys.exit(1)
+    print("Done.")
+
+
+if __name__ == "__main__":
+    main()